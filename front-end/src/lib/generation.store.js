@@ -1,6 +1,6 @@
 import { writable } from "svelte/store";
 
-const API_ENDPOINT = "http://localhost:8504/generate-ticket";
+const API_ENDPOINT = "http://localhost:8504/generate-ticket-stream";
 
 export const generationStates = {
     IDLE: "idle",
@@ -17,11 +17,33 @@ function createGenerationStore() {
         generate: async (fromQuestion) => {
             update(() => ({ state: generationStates.LOADING, data: { title: "", text: "" } }));
             try {
-                const response = await fetch(`${API_ENDPOINT}?text=${encodeURI(fromQuestion)}`, {
-                    method: "GET",
-                });
-                const generation = await response.json();
-                update(() => ({ state: generationStates.SUCCESS, data: generation.result }));
+                const evt = new EventSource(`${API_ENDPOINT}?text=${encodeURI(fromQuestion)}`);
+                evt.onmessage = (e) => {
+                    if (!e.data) {
+                        return;
+                    }
+                    const data = JSON.parse(e.data);
+                    if (data.init) {
+                        return;
+                    }
+                    // Show the draft as soon as the title is known, then keep appending
+                    update((state) => ({
+                        state: generationStates.SUCCESS,
+                        data: {
+                            title: data.title !== undefined ? data.title : state.data.title,
+                            text: state.data.text + (data.token || ""),
+                        },
+                    }));
+                };
+                evt.onerror = () => {
+                    // Stream ends with an error; close so it doesn't reconnect
+                    evt.close();
+                    update((state) =>
+                        state.state === generationStates.LOADING
+                            ? { state: generationStates.ERROR, data: state.data }
+                            : state
+                    );
+                };
             } catch (e) {
                 console.log("e: ", e);
                 update(() => ({ state: generationStates.ERROR, data: { title: "", text: "" } }));
@@ -0,0 +1,126 @@
+"""
+Benchmark da recuperação do GraphRAG num grafo sintético de notas.
+
+Cria N nós ObsidianNote sintéticos (marcados com `synthetic = true`), com
+embeddings aleatórios da dimensão do modelo configurado, e compara a latência:
+- da consulta antiga (MATCH (n) ... CONTAINS, varrendo todo o grafo)
+- da busca híbrida (índices vetoriais + full-text, fundidos por RRF)
+
+Uso:
+    python -m scripts.benchmark_graphrag_retrieval --notes 100000 --queries 50
+    python -m scripts.benchmark_graphrag_retrieval --cleanup
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from src.agents.mcp_neo4j_integration import get_neo4j_manager
+
+LEGACY_QUERY = """
+MATCH (n)
+WHERE n.description CONTAINS $query
+   OR n.name CONTAINS $query
+   OR (n:ObsidianNote AND n.content CONTAINS $query)
+WITH n,
+     CASE
+       WHEN n.description CONTAINS $query THEN 1.0
+       WHEN n.name CONTAINS $query THEN 0.8
+       ELSE 0.5
+     END AS score
+RETURN n, score
+ORDER BY score DESC
+LIMIT 5
+"""
+
+INSERT_QUERY = """
+UNWIND $rows AS row
+CREATE (n:ObsidianNote {id: row.id, title: row.title, content: row.content,
+                        folder: 'synthetic', synthetic: true, embedding: row.embedding})
+"""
+
+WORDS = (
+    "neo4j grafo docker kestra obsidian mcp rag embedding vetor índice consulta "
+    "pipeline agente workflow cypher latência cache servidor nota tag link "
+    "streamlit langchain ollama modelo contexto resposta busca"
+).split()
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def random_embedding(rng: random.Random, dimension: int):
+    return [rng.gauss(0.0, 1.0) for _ in range(dimension)]
+
+
+def populate(manager, notes: int, batch_size: int, seed: int) -> None:
+    rng = random.Random(seed)
+    existing = manager.query_graph(
+        "MATCH (n:ObsidianNote {synthetic: true}) RETURN count(n) AS count"
+    )
+    start_at = existing[0]["count"] if existing else 0
+    for offset in range(start_at, notes, batch_size):
+        rows = [
+            {
+                "id": f"synthetic-{i}",
+                "title": f"Nota sintética {i}",
+                "content": random_text(rng, 80),
+                "embedding": random_embedding(rng, manager.embedding_dimension),
+            }
+            for i in range(offset, min(offset + batch_size, notes))
+        ]
+        manager.graph.query(INSERT_QUERY, {"rows": rows})
+        print(f"  {min(offset + batch_size, notes)}/{notes} notas")
+    manager.graph.query("CALL db.awaitIndexes(600)")
+
+
+def timed(fn, repeats: int):
+    latencies = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cleanup", action="store_true", help="Remove as notas sintéticas e sai")
+    args = parser.parse_args()
+
+    manager = get_neo4j_manager()
+
+    if args.cleanup:
+        manager.graph.query(
+            "MATCH (n:ObsidianNote {synthetic: true}) "
+            "CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS"
+        )
+        print("Notas sintéticas removidas")
+        return
+
+    print(f"Populando {args.notes} notas sintéticas...")
+    populate(manager, args.notes, args.batch_size, args.seed)
+
+    rng = random.Random(args.seed + 1)
+    questions = [random_text(rng, 8) for _ in range(args.queries)]
+    embeddings = [random_embedding(rng, manager.embedding_dimension) for _ in questions]
+
+    legacy = timed(lambda i: manager.graph.query(LEGACY_QUERY, {"query": questions[i]}), args.queries)
+    hybrid = timed(
+        lambda i: manager.hybrid_search(questions[i], k=5, embedding=embeddings[i]), args.queries
+    )
+
+    print(f"\nRecuperação em {args.notes} notas ({args.queries} consultas, embedding excluído):")
+    print(f"  CONTAINS (antiga): p50 {legacy[0]:8.1f} ms | p95 {legacy[1]:8.1f} ms")
+    print(f"  híbrida (índices): p50 {hybrid[0]:8.1f} ms | p95 {hybrid[1]:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark do índice vetorial local (IVF) contra os índices vetoriais do Neo4j.
+
+Constrói (ou reaproveita) o índice local a partir dos embeddings do grafo e,
+para consultas geradas a partir de embeddings armazenados com ruído, mede:
+- latência p50/p95 do Neo4j (três índices vetoriais) e do índice local, por nprobe;
+- recall@k do índice local em relação ao Neo4j e à busca exata (todas as listas).
+
+Uso:
+    python -m scripts.benchmark_local_vector_index --queries 200 --k 10
+    python -m scripts.benchmark_local_vector_index --rebuild --nprobe 4 8 16 32
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from src.agents.mcp_neo4j_integration import HYBRID_VECTOR_QUERY, get_neo4j_manager
+
+
+def timed(fn, queries):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return results, statistics.median(latencies), latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+
+
+def recall(found, expected, k):
+    hits = sum(len({r["element_id"] for r in f[:k]} & {r["element_id"] for r in e[:k]}) for f, e in zip(found, expected))
+    return hits / max(sum(min(len(e), k) for e in expected), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.05, help="Desvio do ruído somado aos embeddings de consulta")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--rebuild", action="store_true", help="Reconstrói o índice local antes de medir")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    manager = get_neo4j_manager()
+    index = None if args.rebuild else manager.local_vector_index
+    if index is None:
+        print("Construindo índice vetorial local...")
+        print(f"  {manager.build_local_vector_index()}")
+        index = manager.local_vector_index
+    print(f"Índice local: {len(index)} vetores, dimensão {index.dimension}, {index.nlist} listas")
+
+    rng = random.Random(args.seed)
+    queries = []
+    for position in rng.sample(range(len(index)), min(args.queries, len(index))):
+        vector = index.vectors[position]
+        queries.append([float(x) + rng.gauss(0.0, args.noise) for x in vector])
+
+    def neo4j_search(embedding):
+        records = manager.graph.query(HYBRID_VECTOR_QUERY, {"embedding": embedding, "k": args.k, "max_chars": 0})
+        return sorted(records, key=lambda r: r["score"], reverse=True)[:args.k]
+
+    neo4j_results, p50, p95 = timed(neo4j_search, queries)
+    exact_results, _, _ = timed(lambda q: index.search(q, args.k, nprobe=index.nlist), queries)
+    print(f"\n{len(queries)} consultas, k={args.k}:")
+    print(f"  Neo4j (3 índices)      : p50 {p50:7.2f} ms | p95 {p95:7.2f} ms")
+    print(f"  recall@{args.k} exata vs Neo4j: {recall(exact_results, neo4j_results, args.k):.3f}")
+
+    for nprobe in sorted(set(min(n, index.nlist) for n in args.nprobe)):
+        results, p50, p95 = timed(lambda q: index.search(q, args.k, nprobe=nprobe), queries)
+        print(
+            f"  local nprobe={nprobe:<4d}     : p50 {p50:7.2f} ms | p95 {p95:7.2f} ms | "
+            f"recall@{args.k} vs exata {recall(results, exact_results, args.k):.3f} | "
+            f"vs Neo4j {recall(results, neo4j_results, args.k):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
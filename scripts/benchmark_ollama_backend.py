@@ -0,0 +1,214 @@
+"""
+Benchmark do backend Ollama contra um servidor Ollama falso local.
+
+O servidor falso implementa /api/chat, /api/generate e /api/embed, simula o
+custo de carregar um modelo quando ele foi descarregado (keep_alive expirado),
+atende no máximo `--server-parallel` requisições por modelo ao mesmo tempo
+(como OLLAMA_NUM_PARALLEL; o resto espera na fila do servidor) e conta quantas
+conexões TCP foram abertas. Assim dá para comparar os clientes padrão
+(ChatOllama/OllamaEmbeddings) com o backend com pool, keep-alive e limite de
+concorrência sem precisar de GPU nem de um Ollama real.
+
+O keep_alive padrão do servidor é o do Ollama (5 min) e o limite do backend
+fica abaixo da concorrência dos clientes, para que o semáforo por modelo
+realmente entre em ação.
+
+Uso:
+    python -m scripts.benchmark_ollama_backend --requests 200 --concurrency 16 --max-concurrency 4
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+from src.apps.ollama_backend import (
+    OllamaBackendConfig,
+    create_chat_model,
+    create_embedding_model,
+)
+
+
+def _keep_alive_seconds(value, default: float) -> float:
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for suffix in ("ms", "s", "m", "h"):
+        if str(value).endswith(suffix):
+            return float(str(value)[: -len(suffix)]) * units[suffix]
+    return float(value)
+
+
+class FakeOllamaState:
+    def __init__(self, load_seconds: float, token_seconds: float, default_keep_alive: float, parallel: int):
+        self.load_seconds = load_seconds
+        self.token_seconds = token_seconds
+        self.default_keep_alive = default_keep_alive
+        self.parallel = parallel
+        self.slots = {}
+        self.lock = threading.Lock()
+        self.expires_at = {}
+        self.model_loads = 0
+        self.connections = 0
+
+    def touch(self, model: str, keep_alive) -> None:
+        """Simula o carregamento do modelo se ele não estiver residente."""
+        now = time.monotonic()
+        with self.lock:
+            loaded = self.expires_at.get(model, 0) > now
+            if not loaded:
+                self.model_loads += 1
+        if not loaded:
+            time.sleep(self.load_seconds)
+        with self.lock:
+            self.expires_at[model] = time.monotonic() + _keep_alive_seconds(
+                keep_alive, self.default_keep_alive
+            )
+
+    def slot(self, model: str) -> threading.Semaphore:
+        """Vagas de processamento do modelo no servidor."""
+        with self.lock:
+            if model not in self.slots:
+                self.slots[model] = threading.Semaphore(self.parallel)
+            return self.slots[model]
+
+
+def make_handler(state: FakeOllamaState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def log_message(self, *args):
+            pass
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _send_json(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            payload = self._read_json()
+            model = payload.get("model", "")
+            with state.slot(model):
+                state.touch(model, payload.get("keep_alive"))
+                self._respond(payload, model)
+
+        def _respond(self, payload, model):
+            if self.path == "/api/embed":
+                inputs = payload.get("input") or []
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                self._send_json({"model": model, "embeddings": [[0.1] * 8 for _ in inputs]})
+            elif self.path == "/api/generate":
+                self._send_json({"model": model, "response": "", "done": True})
+            elif self.path == "/api/chat":
+                tokens = ["Olá", ",", " mundo", "!"]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for token in tokens:
+                    time.sleep(state.token_seconds)
+                    self._chunk({"model": model, "created_at": "", "done": False,
+                                 "message": {"role": "assistant", "content": token}})
+                self._chunk({"model": model, "created_at": "", "done": True, "done_reason": "stop",
+                             "message": {"role": "assistant", "content": ""},
+                             "eval_count": len(tokens), "prompt_eval_count": 1})
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                self.send_error(404)
+
+        def _chunk(self, payload):
+            data = (json.dumps(payload) + "\n").encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def run_load(name, llm, embeddings, total, concurrency):
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        if i % 2:
+            embeddings.embed_query(f"texto {i}")
+        else:
+            llm.invoke(f"pergunta {i}")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "name": name,
+        "req_per_s": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--load-seconds", type=float, default=0.5,
+                        help="Custo simulado para carregar um modelo descarregado")
+    parser.add_argument("--token-seconds", type=float, default=0.005)
+    parser.add_argument("--default-keep-alive", type=float, default=300,
+                        help="keep_alive (s) que o servidor usa quando o cliente não envia (Ollama: 5 min)")
+    parser.add_argument("--server-parallel", type=int, default=4,
+                        help="Requisições atendidas ao mesmo tempo por modelo (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--max-concurrency", type=int, default=4,
+                        help="Limite por modelo do backend com pool (abaixo de --concurrency)")
+    args = parser.parse_args()
+    if args.max_concurrency >= args.concurrency:
+        parser.error("--max-concurrency precisa ser menor que --concurrency para o limite ter efeito")
+
+    for variant in ("padrão", "pool"):
+        state = FakeOllamaState(
+            args.load_seconds, args.token_seconds, args.default_keep_alive, args.server_parallel
+        )
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        if variant == "padrão":
+            llm = ChatOllama(base_url=base_url, model="fake-chat", temperature=0)
+            embeddings = OllamaEmbeddings(base_url=base_url, model="fake-embed")
+        else:
+            backend = OllamaBackendConfig(base_url=base_url, keep_alive="10m",
+                                          max_concurrency=args.max_concurrency)
+            llm = create_chat_model("fake-chat", backend, temperature=0)
+            embeddings = create_embedding_model("fake-embed", backend)
+
+        result = run_load(variant, llm, embeddings, args.requests, args.concurrency)
+        server.shutdown()
+        print(
+            f"{result['name']:>7}: {result['req_per_s']:8.1f} req/s | "
+            f"p50 {result['p50_ms']:7.1f} ms | p95 {result['p95_ms']:7.1f} ms | "
+            f"conexões {state.connections:4d} | cargas de modelo {state.model_loads}"
+        )
+
+
+if __name__ == "__main__":
+    main()
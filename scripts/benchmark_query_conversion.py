@@ -0,0 +1,87 @@
+"""
+Micro-benchmark da conversão de resultados do `query_graph`.
+
+Compara, sobre as mesmas queries, linhas/s de:
+- conversão antiga (Neo4jGraph.query + passada com hasattr/__class__/dir por valor)
+- query_graph (driver direto, conversão única dentro da transação)
+- query_graph(columnar=True)
+- iter_query (streaming em lotes de fetch_size)
+
+Usa nós ObsidianNote existentes (ex.: os do benchmark_graphrag_retrieval) e
+uma query só de escalares gerada com UNWIND.
+
+Uso:
+    python -m scripts.benchmark_query_conversion --rows 100000 --repeats 3
+"""
+
+import argparse
+import time
+
+from src.agents.mcp_neo4j_integration import get_neo4j_manager
+
+QUERIES = {
+    "escalares": "UNWIND range(1, $rows) AS i RETURN i, toString(i) AS s, [i, i * 2] AS l, i % 2 = 0 AS par",
+    "nós": "MATCH (n:ObsidianNote) RETURN n, n.title AS title LIMIT $rows",
+}
+
+
+def legacy_query_graph(manager, cypher_query, parameters):
+    """Cópia da conversão antiga do query_graph, para comparação."""
+    results = manager.graph.query(cypher_query, parameters or {})
+    converted_results = []
+    for record in results:
+        converted_record = dict(record)
+        for key, value in converted_record.items():
+            if hasattr(value, 'labels') or (hasattr(value, '__class__') and 'Node' in str(value.__class__)):
+                if hasattr(value, 'items'):
+                    converted_record[key] = dict(value)
+                elif hasattr(value, '__dict__'):
+                    converted_record[key] = {k: v for k, v in value.__dict__.items() if not k.startswith('_')}
+                else:
+                    converted_record[key] = {k: getattr(value, k) for k in dir(value) if not k.startswith('_')}
+            elif isinstance(value, list):
+                converted_record[key] = [
+                    dict(v) if (hasattr(v, 'labels') or (hasattr(v, '__class__') and 'Node' in str(v.__class__))) else v
+                    for v in value
+                ]
+        converted_results.append(converted_record)
+    return converted_results
+
+
+def best_rate(fn, repeats):
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = fn()
+        elapsed = time.perf_counter() - start
+        best = max(best, rows / elapsed if elapsed else 0.0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--fetch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    manager = get_neo4j_manager()
+    params = {"rows": args.rows}
+
+    for name, query in QUERIES.items():
+        variants = {
+            "antiga": lambda: len(legacy_query_graph(manager, query, params)),
+            "query_graph": lambda: len(manager.query_graph(query, params)),
+            "columnar": lambda: len(next(iter(manager.query_graph(query, params, columnar=True).values()), [])),
+            "iter_query": lambda: sum(1 for _ in manager.iter_query(query, params, args.fetch_size)),
+        }
+        print(f"\nQuery '{name}' (até {args.rows} linhas, melhor de {args.repeats}):")
+        baseline = None
+        for label, fn in variants.items():
+            rate = best_rate(fn, args.repeats)
+            baseline = baseline or rate
+            print(f"  {label:>12}: {rate:12.0f} linhas/s ({rate / baseline if baseline else 0:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
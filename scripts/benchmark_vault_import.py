@@ -0,0 +1,113 @@
+"""
+Benchmark da importação de vaults Obsidian grandes.
+
+Gera um vault sintético (por padrão 50 mil notas com frontmatter, tags e
+[[links]]) e mede notas/s:
+- do parsing sequencial vs. em pool de processos (não precisa de Neo4j);
+- com --import, da importação completa (parsing + embeddings + escrita) com
+  um ou vários workers de embedding.
+
+Uso:
+    python -m scripts.benchmark_vault_import --notes 50000 --parse-workers 8
+    python -m scripts.benchmark_vault_import --notes 5000 --import --embed-workers 4
+    python -m scripts.benchmark_vault_import --cleanup
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.agents.mcp_neo4j_integration import parse_obsidian_files
+
+DEFAULT_VAULT = Path(tempfile.gettempdir()) / "obsidian-benchmark-vault"
+
+WORDS = (
+    "neo4j grafo docker kestra obsidian mcp rag embedding vetor índice consulta "
+    "pipeline agente workflow cypher latência cache servidor nota tag link "
+    "streamlit langchain ollama modelo contexto resposta busca"
+).split()
+
+
+def generate_vault(root: Path, notes: int, seed: int) -> None:
+    """Cria o vault se ainda não tiver o número pedido de notas."""
+    existing = sum(1 for _ in root.rglob("*.md")) if root.exists() else 0
+    if existing >= notes:
+        print(f"Vault {root} já tem {existing} notas")
+        return
+    rng = random.Random(seed)
+    for i in range(existing, notes):
+        folder = root / f"pasta-{i % 50:02d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        body = " ".join(rng.choice(WORDS) for _ in range(300))
+        tags = " ".join(f"#{rng.choice(WORDS)}" for _ in range(3))
+        links = " ".join(f"[[nota-{rng.randrange(notes)}|ver]]" for _ in range(4))
+        (folder / f"nota-{i}.md").write_text(
+            f"---\ntitle: Nota {i}\ncreated: 2024-01-01\n---\n# Nota {i}\n\n{body}\n\n{tags}\n{links}\n",
+            encoding="utf-8",
+        )
+        if (i + 1) % 10_000 == 0:
+            print(f"  {i + 1}/{notes} notas geradas")
+
+
+def bench_parse(files, workers: int) -> float:
+    start = time.perf_counter()
+    notes = parse_obsidian_files(files, workers)
+    elapsed = time.perf_counter() - start
+    print(f"  parsing, {workers:2d} processo(s): {len(notes) / elapsed:10.0f} notas/s ({elapsed:.1f}s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--vault", type=Path, default=DEFAULT_VAULT)
+    parser.add_argument("--notes", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--embed-workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--import", dest="run_import", action="store_true",
+                        help="Também mede a importação completa no Neo4j")
+    parser.add_argument("--cleanup", action="store_true", help="Remove as notas do vault sintético do Neo4j e sai")
+    args = parser.parse_args()
+
+    if args.cleanup or args.run_import:
+        from src.agents.mcp_neo4j_integration import get_neo4j_manager
+        manager = get_neo4j_manager()
+
+    if args.cleanup:
+        manager.graph.query(
+            "MATCH (n:ObsidianNote) WHERE n.path STARTS WITH $root "
+            "CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS",
+            {"root": os.path.join(str(args.vault), "")},
+        )
+        print("Notas do vault sintético removidas")
+        return
+
+    print(f"Gerando vault sintético em {args.vault}...")
+    generate_vault(args.vault, args.notes, args.seed)
+    files = list(args.vault.rglob("*.md"))
+
+    print(f"\nParsing de {len(files)} notas:")
+    sequential = bench_parse(files, 1)
+    parallel = bench_parse(files, args.parse_workers)
+    print(f"  speedup: {sequential / parallel:.1f}x")
+
+    if args.run_import:
+        print(f"\nImportação completa de {len(files)} notas:")
+        for embed_workers in sorted({1, args.embed_workers}):
+            start = time.perf_counter()
+            imported = manager.import_obsidian_vault(
+                args.vault,
+                batch_size=args.batch_size,
+                parse_workers=args.parse_workers,
+                embed_workers=embed_workers,
+            )
+            elapsed = time.perf_counter() - start
+            print(f"  {embed_workers:2d} worker(s) de embedding: {imported / elapsed:10.1f} notas/s ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
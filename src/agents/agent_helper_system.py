@@ -22,7 +22,7 @@ from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 from langgraph.graph import StateGraph, END
 from typing_extensions import TypedDict
 
-from src.apps.chains import load_llm, load_embedding_model
+from src.apps.model_registry import get_llm
 from src.agents.orchestrator import get_orchestrator, AgentType
 
 logger = logging.getLogger(__name__)
@@ -69,18 +69,20 @@ class AgentMonitorHelper:
         
         logger.info("AgentMonitorHelper inicializado")
     
-    def monitor_agent(self, agent_name: str) -> AgentMetrics:
+    def monitor_agent(self, agent_name: str, status: Optional[Dict[str, Any]] = None) -> AgentMetrics:
         """
         Monitora um agente específico.
         
         Args:
             agent_name: Nome do agente
+            status: Status do sistema já obtido (evita consultar tudo de novo)
             
         Returns:
             Métricas do agente
         """
         try:
-            status = self.orchestrator.get_system_status()
+            if status is None:
+                status = self.orchestrator.get_system_status()
             
             # Analisa status baseado no tipo de agente
             if agent_name == "mcp_manager":
@@ -151,8 +153,14 @@ class AgentMonitorHelper:
         agents = ["mcp_manager", "neo4j", "kestra", "obsidian", "docker"]
         all_metrics = {}
         
+        try:
+            status = self.orchestrator.get_system_status()
+        except Exception as e:
+            logger.error(f"Erro ao obter status do sistema: {e}")
+            status = None
+        
         for agent_name in agents:
-            all_metrics[agent_name] = self.monitor_agent(agent_name)
+            all_metrics[agent_name] = self.monitor_agent(agent_name, status)
         
         return all_metrics
     
@@ -200,7 +208,7 @@ class AgentOptimizerHelper:
         self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         
         try:
-            self.llm = load_llm(
+            self.llm = get_llm(
                 self.llm_name,
                 logger=logger,
                 config={"ollama_base_url": self.ollama_base_url}
@@ -374,7 +382,7 @@ class AgentTunerHelper:
         self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         
         try:
-            self.llm = load_llm(
+            self.llm = get_llm(
                 self.llm_name,
                 logger=logger,
                 config={"ollama_base_url": self.ollama_base_url}
@@ -0,0 +1,310 @@
+"""
+Caminho assíncrono para o Neo4j GraphRAG.
+
+`AsyncNeo4jGraphRAGManager` expõe versões assíncronas das consultas, busca,
+estatísticas e escritas de nós do `Neo4jGraphRAGManager`, sobre o driver
+assíncrono do Neo4j com pool de conexões configurável. Ele reaproveita o
+gerenciador síncrono para configuração, embeddings e as mesmas queries Cypher.
+
+O driver assíncrono fica preso ao event loop em que foi usado, então o
+gerenciador roda num loop próprio, numa thread dedicada:
+- código síncrono (orchestrator, Streamlit, master agent) usa `run()` /
+  `gather()` para executar operações independentes em paralelo;
+- código assíncrono em outro loop (ex.: FastAPI) usa `await submit(...)`.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Union
+
+import logging
+from neo4j import AsyncGraphDatabase, Query
+from neo4j.exceptions import Neo4jError
+
+from src.agents.mcp_neo4j_integration import (
+    GRAPH_STATISTICS_KEYS,
+    GRAPH_STATISTICS_QUERY,
+    HYBRID_QUERY,
+    HYBRID_VECTOR_QUERY,
+    MCP_OBSIDIAN_RELATION_QUERY_TEMPLATE,
+    MCP_RAG_RELATION_QUERY_TEMPLATE,
+    MCP_UPSERT_QUERY,
+    RAG_UPSERT_QUERY,
+    SEARCH_QUERY,
+    Neo4jGraphRAGManager,
+    description_hash,
+    fuse_ranked_results,
+    get_neo4j_manager,
+    lucene_query,
+    mcp_node_params,
+    neo4j_to_python,
+    rag_node_params,
+    requires_auto_commit,
+    search_params,
+    search_results_to_nodes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+async def _rows_transformer(result) -> List[Dict[str, Any]]:
+    keys = result.keys()
+    return [dict(zip(keys, map(neo4j_to_python, record))) async for record in result]
+
+
+async def _columns_transformer(result) -> Dict[str, List[Any]]:
+    keys = result.keys()
+    columns = [[] for _ in keys]
+    async for record in result:
+        for column, value in zip(columns, record):
+            column.append(neo4j_to_python(value))
+    return dict(zip(keys, columns))
+
+
+class AsyncNeo4jGraphRAGManager:
+    """Versão assíncrona das operações de grafo do Neo4jGraphRAGManager."""
+
+    def __init__(
+        self,
+        manager: Optional[Neo4jGraphRAGManager] = None,
+        max_connection_pool_size: Optional[int] = None,
+        connection_acquisition_timeout: Optional[float] = None,
+        max_connection_lifetime: Optional[float] = None,
+        liveness_check_timeout: Optional[float] = None
+    ):
+        """
+        Inicializa o gerenciador assíncrono.
+
+        Args:
+            manager: Gerenciador síncrono (padrão: instância global)
+            max_connection_pool_size: Conexões máximas no pool (NEO4J_MAX_CONNECTION_POOL_SIZE)
+            connection_acquisition_timeout: Espera máxima por uma conexão livre, em segundos
+            max_connection_lifetime: Idade máxima de uma conexão, em segundos
+            liveness_check_timeout: Conexões ociosas há mais que isso são testadas antes do uso
+        """
+        self.manager = manager or get_neo4j_manager()
+        self.database = self.manager.graph._database
+        self.timeout = self.manager.graph.timeout
+        self.pool_config = {
+            "max_connection_pool_size": max_connection_pool_size
+            or int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50")),
+            "connection_acquisition_timeout": connection_acquisition_timeout
+            or _env_float("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", 30.0),
+            "max_connection_lifetime": max_connection_lifetime
+            or _env_float("NEO4J_MAX_CONNECTION_LIFETIME", 3600.0),
+            "liveness_check_timeout": liveness_check_timeout
+            or _env_float("NEO4J_LIVENESS_CHECK_TIMEOUT", None),
+        }
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="neo4j-async", daemon=True)
+        self._thread.start()
+        try:
+            self.driver = self.run(self._create_driver())
+        except Exception:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            raise
+        logger.info(f"Driver assíncrono do Neo4j pronto (pool {self.pool_config['max_connection_pool_size']})")
+
+    async def _create_driver(self):
+        driver = AsyncGraphDatabase.driver(
+            self.manager.neo4j_uri,
+            auth=(self.manager.neo4j_username, self.manager.neo4j_password),
+            **{k: v for k, v in self.pool_config.items() if v is not None}
+        )
+        await driver.verify_connectivity()
+        return driver
+
+    # Execução a partir de código síncrono ou de outros event loops
+
+    def run(self, coroutine: Awaitable) -> Any:
+        """Executa uma corrotina no loop do gerenciador e espera o resultado."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def gather(self, *coroutines: Awaitable, return_exceptions: bool = True) -> List[Any]:
+        """Executa operações independentes concorrentemente e devolve os resultados em ordem."""
+        async def _gather():
+            return await asyncio.gather(*coroutines, return_exceptions=return_exceptions)
+        return self.run(_gather())
+
+    async def submit(self, coroutine: Awaitable) -> Any:
+        """Aguarda, de qualquer event loop, uma corrotina executada no loop do gerenciador."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self._loop))
+
+    # Consultas
+
+    async def query_graph(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict] = None,
+        columnar: bool = False
+    ) -> Union[List[Dict], Dict[str, List]]:
+        """Mesma semântica do `Neo4jGraphRAGManager.query_graph`."""
+        transformer = _columns_transformer if columnar else _rows_transformer
+        try:
+            try:
+                return await self.driver.execute_query(
+                    Query(cypher_query, timeout=self.timeout),
+                    parameters_=parameters or {},
+                    database_=self.database,
+                    result_transformer_=transformer
+                )
+            except Neo4jError as e:
+                if not requires_auto_commit(e):
+                    raise
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(Query(cypher_query, timeout=self.timeout), parameters or {})
+                return await transformer(result)
+        except Exception as e:
+            logger.error(f"Erro ao executar query: {e}")
+            return {} if columnar else []
+
+    async def iter_query(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict] = None,
+        fetch_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Resultados sob demanda, em lotes de `fetch_size`; erros são propagados."""
+        async with self.driver.session(database=self.database, fetch_size=fetch_size) as session:
+            result = await session.run(Query(cypher_query, timeout=self.timeout), parameters or {})
+            keys = result.keys()
+            async for record in result:
+                yield dict(zip(keys, map(neo4j_to_python, record)))
+
+    async def hybrid_search(
+        self,
+        question: str,
+        k: int = 5,
+        embedding: Optional[List[float]] = None,
+        max_chars: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Mesma semântica do `Neo4jGraphRAGManager.hybrid_search`."""
+        if embedding is None:
+            embedding = await self.manager.embeddings.aembed_query(question)
+        text = lucene_query(question)
+        records = await self.query_graph(HYBRID_QUERY if text else HYBRID_VECTOR_QUERY, {
+            "embedding": embedding,
+            "text": text,
+            "k": k * 2,
+            "max_chars": max_chars,
+        })
+        return fuse_ranked_results(records, k)
+
+    async def search_graph(self, query: str, node_types: Optional[List[str]] = None, limit: int = 10) -> List[Dict]:
+        """Mesma semântica do `Neo4jGraphRAGManager.search_graph`."""
+        results = await self.query_graph(SEARCH_QUERY, search_params(query, node_types, limit))
+        return search_results_to_nodes(results)
+
+    async def get_graph_statistics(self, force_refresh: bool = False) -> Dict[str, int]:
+        """
+        Estatísticas do grafo, compartilhando o snapshot do gerenciador síncrono.
+
+        Só vai ao servidor se o snapshot não existir, estiver velho ou se
+        `force_refresh` for pedido.
+        """
+        snapshot, age = self.manager.statistics_snapshot()
+        if snapshot is not None and not force_refresh and age <= self.manager.statistics_ttl:
+            return snapshot
+        results = await self.query_graph(GRAPH_STATISTICS_QUERY)
+        if not results:
+            return snapshot or {key: 0 for key in GRAPH_STATISTICS_KEYS}
+        stats = {key: results[0].get(key, 0) for key in GRAPH_STATISTICS_KEYS}
+        self.manager.update_statistics_snapshot(stats)
+        return stats
+
+    # Escritas
+
+    async def _embed(self, text: str) -> List[float]:
+        if not text:
+            return [0.0] * self.manager.embedding_dimension
+        return await self.manager.embeddings.aembed_query(text)
+
+    async def _write(self, cypher_query: str, parameters: Dict[str, Any]) -> None:
+        await self.driver.execute_query(
+            Query(cypher_query, timeout=self.timeout),
+            parameters_=parameters,
+            database_=self.database
+        )
+
+    async def create_mcp_node(self, mcp_info: Dict[str, Any]) -> bool:
+        """Mesma semântica do `Neo4jGraphRAGManager.create_mcp_node`."""
+        try:
+            params = mcp_node_params(mcp_info)
+            params["description_hash"] = description_hash(params["description"], self.manager.embedding_model_name)
+            params["embedding"] = await self._embed(params["description"])
+            await self._write(MCP_UPSERT_QUERY, {"rows": [params]})
+            logger.info(f"Nó MCP '{params['name']}' criado com sucesso")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao criar nó MCP: {e}")
+            return False
+
+    async def create_rag_node(self, rag_info: Dict[str, Any]) -> bool:
+        """Mesma semântica do `Neo4jGraphRAGManager.create_rag_node`."""
+        try:
+            params = rag_node_params(rag_info)
+            params["description_hash"] = description_hash(params["description"], self.manager.embedding_model_name)
+            params["embedding"] = await self._embed(params["description"])
+            await self._write(RAG_UPSERT_QUERY, {"rows": [params]})
+            logger.info(f"Nó RAG '{params['name']}' criado com sucesso")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao criar nó RAG: {e}")
+            return False
+
+    async def create_mcp_rag_relation(self, rag_id: str, mcp_id: str, relation_type: str = "USES") -> bool:
+        """Mesma semântica do `Neo4jGraphRAGManager.create_mcp_rag_relation`."""
+        try:
+            await self._write(
+                MCP_RAG_RELATION_QUERY_TEMPLATE.format(relation_type=relation_type),
+                {"rag_id": rag_id, "mcp_id": mcp_id}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao criar relação: {e}")
+            return False
+
+    async def create_mcp_obsidian_relation(
+        self,
+        mcp_id: str,
+        note_id: str,
+        relation_type: str = "DOCUMENTED_IN"
+    ) -> bool:
+        """Mesma semântica do `Neo4jGraphRAGManager.create_mcp_obsidian_relation`."""
+        try:
+            await self._write(
+                MCP_OBSIDIAN_RELATION_QUERY_TEMPLATE.format(relation_type=relation_type),
+                {"mcp_id": mcp_id, "note_id": note_id}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao criar relação: {e}")
+            return False
+
+    def close(self) -> None:
+        """Fecha o driver e para o loop."""
+        self.run(self.driver.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+# Instância global do gerenciador assíncrono
+_async_neo4j_manager_instance: Optional[AsyncNeo4jGraphRAGManager] = None
+_async_neo4j_manager_lock = threading.Lock()
+
+
+def get_async_neo4j_manager() -> AsyncNeo4jGraphRAGManager:
+    """Retorna a instância global do gerenciador Neo4j assíncrono."""
+    global _async_neo4j_manager_instance
+    if _async_neo4j_manager_instance is None:
+        with _async_neo4j_manager_lock:
+            if _async_neo4j_manager_instance is None:
+                _async_neo4j_manager_instance = AsyncNeo4jGraphRAGManager()
+    return _async_neo4j_manager_instance
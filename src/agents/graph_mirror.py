@@ -0,0 +1,569 @@
+"""
+Réplica de leitura em memória do grafo MCP/RAG/ObsidianNote/Tag.
+
+O dashboard refaz as mesmas leituras (estatísticas, busca, visualização) a
+cada interação do Streamlit. Com a réplica ligada (GRAPH_MIRROR_ENABLED),
+essas leituras são respondidas no processo, sem ida ao Neo4j; as escritas
+continuam indo para o Neo4j e chegam à réplica na atualização seguinte:
+- nós em listas paralelas (elementId, id, nome, labels, propriedades sem
+  embedding e um texto de busca já concatenado);
+- arestas em arrays compactos (origem, destino, tipo) e adjacência CSR
+  (`offsets` + vizinhos), nos dois sentidos, para expandir um nó sem varrer
+  as arestas;
+- a atualização incremental relê só os nós com updated_at,
+  embedding_updated_at ou similarity_linked_at desde a última rodada (e as
+  arestas deles), por índices de intervalo. Contagens do count store
+  (baratas) revelam o que os timestamps não mostram: nós removidos forçam
+  uma recarga completa, relações novas/removidas saindo dos labels da
+  réplica uma recarga só das arestas.
+
+O estado é copy-on-write: cada atualização monta um estado novo e troca a
+referência, então as leituras não usam lock.
+"""
+
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIRROR_LABELS = ("MCP", "RAG", "ObsidianNote", "Tag")
+# Mesma ordem de ramos do SEARCH_QUERY/SUBGRAPH_SEEDS_QUERY
+PRIMARY_LABELS = ("MCP", "RAG", "ObsidianNote")
+# Propriedades usadas pela busca textual (ObsidianNote também busca no conteúdo)
+SEARCH_PROPERTIES = ("name", "description")
+NOTE_SEARCH_PROPERTIES = ("name", "description", "content")
+# Grupo de busca dos nós sem label principal (Tag)
+OTHERS = "__others__"
+
+MIRROR_NODES_QUERY = """
+MATCH (n:MCP|RAG|ObsidianNote|Tag)
+RETURN elementId(n) AS element_id, labels(n) AS labels, n {.*, embedding: null} AS props
+"""
+
+MIRROR_NODES_BY_ID_QUERY = """
+UNWIND $ids AS nodeId
+MATCH (n) WHERE elementId(n) = nodeId
+RETURN elementId(n) AS element_id, labels(n) AS labels, n {.*, embedding: null} AS props
+"""
+
+# Um ramo por label e timestamp, para cada um usar seu índice (migração 5 do
+# graph_schema); o UNION tira os repetidos
+CHANGE_PROPERTIES = ("updated_at", "embedding_updated_at", "similarity_linked_at")
+MIRROR_CHANGED_NODES_QUERY = (
+    "CALL {"
+    + "\n  UNION".join(
+        f"""
+  MATCH (n:{label}) WHERE n.{prop} >= $since
+  RETURN n"""
+        for label in PRIMARY_LABELS
+        for prop in CHANGE_PROPERTIES
+    )
+    + """
+}
+RETURN elementId(n) AS element_id, labels(n) AS labels, n {.*, embedding: null} AS props
+"""
+)
+
+MIRROR_EDGES_QUERY = """
+MATCH (s:MCP|RAG|ObsidianNote|Tag)-[r]->(t:MCP|RAG|ObsidianNote|Tag)
+RETURN elementId(r) AS rel_id, type(r) AS type, elementId(s) AS source, elementId(t) AS target
+"""
+
+MIRROR_INCIDENT_EDGES_QUERY = """
+UNWIND $ids AS nodeId
+MATCH (n) WHERE elementId(n) = nodeId
+MATCH (n)-[r]-(m:MCP|RAG|ObsidianNote|Tag)
+RETURN DISTINCT elementId(r) AS rel_id, type(r) AS type,
+       elementId(startNode(r)) AS source, elementId(endNode(r)) AS target
+"""
+
+# Relações que saem dos labels da réplica, lidas do count store; o
+# relation_count das estatísticas conta o banco inteiro (importações de
+# StackOverflow/PDF mudariam o total sem mudar a réplica)
+MIRROR_RELATION_COUNT_QUERY = (
+    "\n".join(
+        f"CALL {{ MATCH (:{label})-[r]->() RETURN count(r) AS {label}_out }}"
+        for label in MIRROR_LABELS
+    )
+    + "\nRETURN " + " + ".join(f"{label}_out" for label in MIRROR_LABELS) + " AS relation_count"
+)
+
+# Início da próxima janela de mudanças, com margem: updated_at é o horário do
+# comando, e uma transação ainda aberta na atualização só fica visível depois.
+# Janelas sobrepostas só relêem nós (_put_node é idempotente).
+MIRROR_CLOCK_QUERY = "RETURN datetime() - duration({seconds: $margin}) AS now"
+
+
+@dataclass
+class MirrorState:
+    """Um estado completo da réplica; nunca é alterado depois de publicado."""
+    element_ids: List[str] = field(default_factory=list)
+    position: Dict[str, int] = field(default_factory=dict)
+    keys: List[Optional[str]] = field(default_factory=list)
+    names: List[Optional[str]] = field(default_factory=list)
+    labels: List[Tuple[str, ...]] = field(default_factory=list)
+    props: List[Dict[str, Any]] = field(default_factory=list)
+    # Arestas: elementId -> índice nos arrays paralelos
+    edge_index: Dict[str, int] = field(default_factory=dict)
+    edge_ids: List[str] = field(default_factory=list)
+    edge_source: array = field(default_factory=lambda: array("i"))
+    edge_target: array = field(default_factory=lambda: array("i"))
+    edge_type: array = field(default_factory=lambda: array("H"))
+    type_names: List[str] = field(default_factory=list)
+    # CSR: vizinhos de i em neighbors[offsets[i]:offsets[i + 1]]; edge_refs guarda
+    # o índice da aresta (>= 0 saindo de i, ~índice chegando em i)
+    offsets: array = field(default_factory=lambda: array("i", [0]))
+    neighbors: array = field(default_factory=lambda: array("i"))
+    edge_refs: array = field(default_factory=lambda: array("i"))
+    # Derivados dos nós, recalculados por _index_nodes
+    counts: Dict[str, int] = field(default_factory=dict)
+    by_label: Dict[str, List[int]] = field(default_factory=dict)
+    others: List[int] = field(default_factory=list)
+    key_position: Dict[str, int] = field(default_factory=dict)
+    # Texto de busca de cada grupo (label principal ou OTHERS) concatenado, com o
+    # início de cada nó: um str.find percorre o grupo inteiro em C
+    corpora: Dict[str, Tuple[str, array]] = field(default_factory=dict)
+
+    def degree(self, position: int) -> int:
+        return self.offsets[position + 1] - self.offsets[position]
+
+
+def _haystack(labels: Tuple[str, ...], props: Dict[str, Any]) -> str:
+    # Separadores que não aparecem em buscas: achar a busca no texto equivale ao OR de CONTAINS
+    properties = NOTE_SEARCH_PROPERTIES if "ObsidianNote" in labels else SEARCH_PROPERTIES
+    return "\x00".join(value for value in (props.get(p) for p in properties) if isinstance(value, str))
+
+
+def _corpus(state: "MirrorState", positions: List[int]) -> Tuple[str, array]:
+    starts, parts, offset = array("l"), [], 0
+    for position in positions:
+        text = _haystack(state.labels[position], state.props[position])
+        starts.append(offset)
+        parts.append(text)
+        offset += len(text) + 1
+    return "\x01".join(parts), starts
+
+
+def _build_csr(state: MirrorState) -> None:
+    size = len(state.element_ids)
+    degree = [0] * (size + 1)
+    for source, target in zip(state.edge_source, state.edge_target):
+        degree[source + 1] += 1
+        degree[target + 1] += 1
+    for i in range(size):
+        degree[i + 1] += degree[i]
+    state.offsets = array("i", degree)
+    state.neighbors = array("i", bytes(4 * degree[size]))
+    state.edge_refs = array("i", bytes(4 * degree[size]))
+    cursor = degree[:size]
+    for edge, (source, target) in enumerate(zip(state.edge_source, state.edge_target)):
+        state.neighbors[cursor[source]] = target
+        state.edge_refs[cursor[source]] = edge
+        cursor[source] += 1
+        state.neighbors[cursor[target]] = source
+        state.edge_refs[cursor[target]] = ~edge
+        cursor[target] += 1
+
+
+class GraphMirror:
+    """Réplica de leitura do grafo, atualizada por uma thread em segundo plano."""
+
+    def __init__(
+        self,
+        neo4j_manager,
+        refresh_interval: Optional[float] = None,
+        full_reload_interval: Optional[float] = None
+    ):
+        self.neo4j_manager = neo4j_manager
+        self.refresh_interval = refresh_interval or float(os.getenv("GRAPH_MIRROR_REFRESH", "5"))
+        # Recarga completa periódica: pega mudanças de arestas que não alteram contagens
+        self.full_reload_interval = full_reload_interval or float(os.getenv("GRAPH_MIRROR_FULL_RELOAD", "600"))
+        # Duração máxima esperada de uma transação de escrita
+        self.since_margin = float(os.getenv("GRAPH_MIRROR_SINCE_MARGIN", "60"))
+        self._state: Optional[MirrorState] = None
+        self._since = None
+        self._loaded_at = 0.0
+        self.last_refresh: Dict[str, Any] = {}
+        self._statistics_snapshot: Dict[str, int] = {}
+        self._relation_count = 0
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    def __len__(self) -> int:
+        state = self._state
+        return len(state.element_ids) if state else 0
+
+    # ------------------------------------------------------------------
+    # Carga e atualização
+    # ------------------------------------------------------------------
+
+    def _query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        # Erros sobem: uma atualização que falha mantém o estado anterior
+        return self.neo4j_manager.graph.query(query, params or {})
+
+    def _statistics(self) -> Dict[str, int]:
+        # Também atualiza o snapshot de estatísticas do gerenciador
+        return self.neo4j_manager.refresh_graph_statistics()
+
+    def _clock(self):
+        return self._query(MIRROR_CLOCK_QUERY, {"margin": self.since_margin})[0]["now"]
+
+    @staticmethod
+    def _is_current(state: MirrorState, record: Dict[str, Any]) -> bool:
+        position = state.position.get(record["element_id"])
+        if position is None:
+            return False
+        props = {k: v for k, v in (record.get("props") or {}).items() if v is not None}
+        return state.labels[position] == tuple(record.get("labels") or ()) and state.props[position] == props
+
+    def _mirrored_relation_count(self) -> int:
+        rows = self._query(MIRROR_RELATION_COUNT_QUERY)
+        return rows[0]["relation_count"] if rows else 0
+
+    @staticmethod
+    def _put_node(state: MirrorState, record: Dict[str, Any]) -> None:
+        labels = tuple(record.get("labels") or ())
+        props = {k: v for k, v in (record.get("props") or {}).items() if v is not None}
+        position = state.position.get(record["element_id"])
+        if position is None:
+            position = state.position[record["element_id"]] = len(state.element_ids)
+            state.element_ids.append(record["element_id"])
+            state.keys.append(None)
+            state.names.append(None)
+            state.labels.append(())
+            state.props.append({})
+        state.keys[position] = props.get("id")
+        state.names[position] = props.get("name") or props.get("title") or props.get("id")
+        state.labels[position] = labels
+        state.props[position] = props
+
+    @staticmethod
+    def _put_edges(state: MirrorState, records: Iterable[Dict[str, Any]]) -> int:
+        type_codes = {name: code for code, name in enumerate(state.type_names)}
+        added = 0
+        for record in records:
+            source = state.position.get(record["source"])
+            target = state.position.get(record["target"])
+            if source is None or target is None or record["rel_id"] in state.edge_index:
+                continue
+            code = type_codes.get(record["type"])
+            if code is None:
+                code = type_codes[record["type"]] = len(state.type_names)
+                state.type_names.append(record["type"])
+            state.edge_index[record["rel_id"]] = len(state.edge_ids)
+            state.edge_ids.append(record["rel_id"])
+            state.edge_source.append(source)
+            state.edge_target.append(target)
+            state.edge_type.append(code)
+            added += 1
+        return added
+
+    @staticmethod
+    def _index_nodes(state: MirrorState) -> None:
+        state.by_label = {label: [] for label in PRIMARY_LABELS}
+        state.others = []
+        state.key_position = {}
+        counts = {label: 0 for label in MIRROR_LABELS}
+        for position, labels in enumerate(state.labels):
+            primary = False
+            for label in labels:
+                if label in counts:
+                    counts[label] += 1
+                if label in state.by_label:
+                    state.by_label[label].append(position)
+                    primary = True
+            if not primary:
+                state.others.append(position)
+            elif state.keys[position] is not None:
+                state.key_position.setdefault(state.keys[position], position)
+        state.counts = counts
+        state.corpora = {label: _corpus(state, positions) for label, positions in state.by_label.items()}
+        state.corpora[OTHERS] = _corpus(state, state.others)
+
+    def load(self) -> Dict[str, Any]:
+        """Carrega a réplica inteira (nós e arestas) do Neo4j."""
+        with self._refresh_lock:
+            return self._load()
+
+    def _load(self, edges_only: bool = False) -> Dict[str, Any]:
+        start = time.perf_counter()
+        since = self._clock()
+        statistics = self._statistics()
+        relation_count = self._mirrored_relation_count()
+        if edges_only and self._state is not None:
+            previous = self._state
+            # Nós inalterados: o estado novo compartilha as listas (nenhuma é modificada)
+            state = MirrorState(
+                element_ids=previous.element_ids, position=previous.position, keys=previous.keys,
+                names=previous.names, labels=previous.labels, props=previous.props,
+                counts=previous.counts, by_label=previous.by_label, others=previous.others,
+                key_position=previous.key_position, corpora=previous.corpora
+            )
+        else:
+            state = MirrorState()
+            for record in self.neo4j_manager.iter_query(MIRROR_NODES_QUERY):
+                self._put_node(state, record)
+            self._index_nodes(state)
+        self._put_edges(state, self.neo4j_manager.iter_query(MIRROR_EDGES_QUERY))
+        _build_csr(state)
+
+        self._publish(state, since, statistics, relation_count)
+        if not edges_only:
+            self._loaded_at = time.monotonic()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Réplica do grafo {'(arestas) ' if edges_only else ''}carregada: "
+            f"{len(state.element_ids)} nós, {len(state.edge_ids)} arestas em {elapsed:.2f}s"
+        )
+        return {"mode": "edges" if edges_only else "full", "nodes": len(state.element_ids),
+                "edges": len(state.edge_ids), "seconds": elapsed}
+
+    def _publish(self, state: MirrorState, since, statistics: Dict[str, int], relation_count: int) -> None:
+        self._state = state
+        self._since = since
+        self._relation_count = relation_count
+        self._statistics_snapshot = statistics
+        self.last_refresh = {"at": time.time(), **statistics}
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Atualização incremental; decide sozinha quando é preciso recarregar.
+
+        Returns:
+            Modo usado (full, edges, incremental ou none), nós alterados e segundos
+        """
+        with self._refresh_lock:
+            previous = self._state
+            if previous is None or time.monotonic() - self._loaded_at > self.full_reload_interval:
+                return self._load()
+
+            start = time.perf_counter()
+            since = self._clock()
+            statistics = self._statistics()
+            relation_count = self._mirrored_relation_count()
+            # A margem relê nós já aplicados; só os que mudaram contam
+            changed = [
+                record for record in self._query(MIRROR_CHANGED_NODES_QUERY, {"since": self._since})
+                if not self._is_current(previous, record)
+            ]
+            state = self._apply_changes(previous, changed) if changed else previous
+
+            # Contagens que os nós alterados não explicam: remoções ou nós sem timestamp
+            if any(state.counts.get(label) != statistics.get(f"{label}_count") for label in MIRROR_LABELS):
+                return self._load()
+            # Relações criadas/removidas fora dos nós alterados (ex.: USES criada à mão)
+            relation_delta = relation_count - self._relation_count
+            if relation_delta != len(state.edge_ids) - len(previous.edge_ids):
+                return self._load(edges_only=True)
+
+            self._publish(state, since, statistics, relation_count)
+            elapsed = time.perf_counter() - start
+            if changed:
+                logger.debug(f"Réplica do grafo: {len(changed)} nós atualizados em {elapsed * 1000:.0f}ms")
+            return {"mode": "incremental" if changed else "none", "changed": len(changed), "seconds": elapsed}
+
+    def _apply_changes(self, previous: MirrorState, changed: List[Dict[str, Any]]) -> MirrorState:
+        """Estado novo com os nós alterados relidos e as arestas deles substituídas pelas atuais."""
+        state = MirrorState(
+            element_ids=list(previous.element_ids), position=dict(previous.position),
+            keys=list(previous.keys), names=list(previous.names), labels=list(previous.labels),
+            props=list(previous.props), type_names=list(previous.type_names)
+        )
+        for record in changed:
+            self._put_node(state, record)
+        changed_ids = [r["element_id"] for r in changed]
+        incident = self._query(MIRROR_INCIDENT_EDGES_QUERY, {"ids": changed_ids})
+        # Tags novas chegam só pelas arestas
+        unknown = {
+            element_id
+            for record in incident
+            for element_id in (record["source"], record["target"])
+            if element_id not in state.position
+        }
+        if unknown:
+            for record in self._query(MIRROR_NODES_BY_ID_QUERY, {"ids": list(unknown)}):
+                self._put_node(state, record)
+
+        changed_positions = {state.position[element_id] for element_id in changed_ids}
+        kept = (
+            {"rel_id": rel_id, "type": previous.type_names[previous.edge_type[i]],
+             "source": previous.element_ids[previous.edge_source[i]],
+             "target": previous.element_ids[previous.edge_target[i]]}
+            for i, rel_id in enumerate(previous.edge_ids)
+            if previous.edge_source[i] not in changed_positions and previous.edge_target[i] not in changed_positions
+        )
+        self._put_edges(state, kept)
+        self._put_edges(state, incident)
+        self._index_nodes(state)
+        _build_csr(state)
+        return state
+
+    def request_refresh(self) -> None:
+        """Antecipa a próxima atualização (chamado depois de escritas no grafo)."""
+        self._wake.set()
+
+    def start(self) -> None:
+        """Carrega a réplica (se preciso) e inicia a thread de atualização."""
+        if self._thread and self._thread.is_alive():
+            return
+        if self._state is None:
+            self.load()
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                self._wake.wait(self.refresh_interval)
+                self._wake.clear()
+                if self._stop.is_set():
+                    return
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning(f"Erro ao atualizar réplica do grafo: {e}")
+
+        self._thread = threading.Thread(target=loop, name="graph-mirror", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Leituras
+    # ------------------------------------------------------------------
+
+    def statistics(self) -> Dict[str, int]:
+        """Contagens da última atualização (mesmas chaves de get_graph_statistics)."""
+        return dict(self._statistics_snapshot)
+
+    @staticmethod
+    def covers(node_types: Optional[List[str]]) -> bool:
+        """
+        Se uma leitura restrita a `node_types` tem o mesmo resultado na réplica.
+
+        A réplica só guarda MIRROR_LABELS; sem filtro (None), as queries também
+        alcançam os outros labels do banco (Question, Answer, PdfBotChunk, ...).
+        """
+        return bool(node_types) and set(node_types) <= set(MIRROR_LABELS)
+
+    @staticmethod
+    def _search_positions(state: MirrorState, query: str, node_types: Optional[List[str]], limit: int) -> List[int]:
+        # Labels principais primeiro, na ordem dos ramos do SEARCH_QUERY; depois os demais
+        wanted = set(node_types) if node_types else None
+        groups = [label for label in PRIMARY_LABELS if wanted is None or label in wanted]
+        if wanted is None or wanted - set(PRIMARY_LABELS):
+            groups.append(OTHERS)
+        found, seen = [], set()
+        for group in groups:
+            positions = state.others if group == OTHERS else state.by_label[group]
+            corpus, starts = state.corpora[group]
+            at = corpus.find(query) if positions else -1
+            while at != -1 and len(found) < limit:
+                i = bisect_right(starts, at) - 1
+                position = positions[i]
+                if position not in seen and (
+                    group != OTHERS or wanted is None or wanted & set(state.labels[position])
+                ):
+                    seen.add(position)
+                    found.append(position)
+                # Continua a partir do próximo nó do grupo
+                if i + 1 >= len(starts):
+                    break
+                at = corpus.find(query, starts[i + 1])
+        return found
+
+    def search(self, query: str, node_types: Optional[List[str]] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Mesmo resultado de search_graph: propriedades (sem embedding) + `__label__`."""
+        state = self._state
+        return [
+            {**state.props[position], "__label__": list(state.labels[position])}
+            for position in self._search_positions(state, query, node_types, limit)
+        ]
+
+    def search_ids(self, query: str, node_types: Optional[List[str]] = None, limit: int = 10) -> List[str]:
+        """elementIds dos nós que search() devolveria."""
+        state = self._state
+        return [state.element_ids[position] for position in self._search_positions(state, query, node_types, limit)]
+
+    def list_nodes(self, label: str) -> List[Dict[str, Any]]:
+        """id e nome dos nós de um label principal, ordenados por nome."""
+        state = self._state
+        nodes = [{"id": state.keys[p], "name": state.props[p].get("name")} for p in state.by_label.get(label, [])]
+        return sorted(nodes, key=lambda node: (node["name"] is None, node["name"] or ""))
+
+    def find_node(self, focus: str) -> Optional[str]:
+        """elementId de um nó pelo elementId ou pelo id (MCP/RAG/ObsidianNote)."""
+        state = self._state
+        if focus in state.position:
+            return focus
+        position = state.key_position.get(focus)
+        return state.element_ids[position] if position is not None else None
+
+    def seed_ids(self, labels: Optional[List[str]], limit: int) -> List[str]:
+        """Mesmas sementes do SUBGRAPH_SEEDS_QUERY: quaisquer nós dos labels pedidos."""
+        state = self._state
+        return [state.element_ids[position] for position in self._search_positions(state, "", labels, limit)]
+
+    def _node_record(self, state: MirrorState, position: int) -> Dict[str, Any]:
+        return {
+            "element_id": state.element_ids[position],
+            "key": state.keys[position],
+            "name": state.names[position],
+            "labels": list(state.labels[position]),
+            "degree": state.degree(position),
+        }
+
+    def node_records(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Mesmas colunas do SUBGRAPH_NODES_QUERY."""
+        state = self._state
+        return [self._node_record(state, state.position[i]) for i in ids if i in state.position]
+
+    def expand(self, frontier: List[str], labels: Optional[List[str]], max_degree: int) -> List[Dict[str, Any]]:
+        """Mesmas colunas do SUBGRAPH_EXPAND_QUERY, lidas da adjacência CSR."""
+        state = self._state
+        wanted = set(labels) if labels else None
+        records = []
+        for element_id in frontier:
+            position = state.position.get(element_id)
+            if position is None:
+                continue
+            taken = 0
+            for slot in range(state.offsets[position], state.offsets[position + 1]):
+                if taken >= max_degree:
+                    break
+                neighbour = state.neighbors[slot]
+                if wanted is not None and not wanted & set(state.labels[neighbour]):
+                    continue
+                edge = state.edge_refs[slot]
+                outgoing = edge >= 0
+                edge = edge if outgoing else ~edge
+                records.append({
+                    "source": element_id,
+                    "rel_id": state.edge_ids[edge],
+                    "type": state.type_names[state.edge_type[edge]],
+                    "outgoing": outgoing,
+                    **self._node_record(state, neighbour),
+                })
+                taken += 1
+        return records
+
+    def info(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "ready": state is not None,
+            "nodes": len(state.element_ids) if state else 0,
+            "edges": len(state.edge_ids) if state else 0,
+            "last_refresh": self.last_refresh,
+        }
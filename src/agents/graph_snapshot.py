@@ -0,0 +1,447 @@
+"""
+Snapshot do grafo de conhecimento em formato colunar (Parquet ou Arrow IPC).
+
+Exporta os nós MCP, RAG, ObsidianNote e Tag, as relações entre eles e os
+embeddings para um diretório, e importa esse diretório de volta em lote.
+Serve para análise offline e para subir um ambiente novo (testes, outra
+máquina) sem refazer sincronizações e embeddings:
+
+    python -m src.agents.graph_snapshot export snapshots/grafo --format parquet
+    python -m src.agents.graph_snapshot import snapshots/grafo
+
+Estrutura do diretório:
+- um arquivo por label (`MCP.parquet`, ...) e um `relationships.parquet`;
+- `manifest.json`, gravado por último (snapshot sem manifest está incompleto),
+  com formato, modelo e dimensão dos embeddings e contagens.
+
+Os nós e relações são lidos com `iter_query` e gravados em lotes, então a
+memória fica constante. Embeddings viram listas float32 de tamanho fixo
+(metade do espaço de float64, e leitura direta como matriz); datas viram
+timestamps em milissegundos. Parquet sai comprimido (zstd, menor em disco);
+Arrow IPC sai sem compressão e é lido com memory-map (importação mais rápida).
+
+Precisa de pyarrow (já instalado junto com o streamlit); sem ele o snapshot
+fica indisponível.
+"""
+
+import json
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+MANIFEST_FILE = "manifest.json"
+RELATIONSHIPS_TABLE = "relationships"
+
+# Datas gravadas pelos upserts, sync e SIMILAR_TO
+NODE_TIMESTAMPS = ("created_at", "updated_at", "embedding_updated_at", "similarity_linked_at")
+# Sem os embeddings, estas propriedades fariam sync/upsert acharem que o nó está em dia
+EMBEDDING_STATE_PROPERTIES = ("embedding_updated_at", "description_hash", "content_hash")
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class GraphSnapshotError(RuntimeError):
+    """Snapshot incompleto, de outro formato ou incompatível com o modelo de embedding atual."""
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    label: str
+    key: str
+    # (propriedade, tipo): string, strings, bool, float ou timestamp
+    columns: Tuple[Tuple[str, str], ...]
+    embedding: bool = True
+
+    @property
+    def timestamps(self) -> Tuple[str, ...]:
+        return tuple(name for name, kind in self.columns if kind == "timestamp")
+
+    def export_query(self) -> str:
+        fields = [
+            f"n.{name}.epochMillis AS {name}" if kind == "timestamp" else f"n.{name} AS {name}"
+            for name, kind in self.columns
+        ]
+        if self.embedding:
+            fields.append("n.embedding AS embedding")
+        return f"MATCH (n:{self.label})\nRETURN " + ",\n       ".join(fields)
+
+    def import_query(self) -> str:
+        query = (
+            "UNWIND $rows AS row\n"
+            f"MERGE (n:{self.label} {{{self.key}: row.key}})\n"
+            "SET n += row.props"
+        )
+        for name in self.timestamps:
+            query += (
+                f",\n    n.{name} = CASE WHEN row.{name} IS NULL THEN n.{name} "
+                f"ELSE datetime({{epochMillis: row.{name}}}) END"
+            )
+        return query
+
+    def schema(self, dimension: int) -> "pa.Schema":
+        fields = [pa.field(name, _arrow_type(kind)) for name, kind in self.columns]
+        if self.embedding:
+            fields.append(pa.field("embedding", pa.list_(pa.float32(), dimension)))
+        return pa.schema(fields)
+
+
+_TIMESTAMP_COLUMNS = tuple((name, "timestamp") for name in NODE_TIMESTAMPS)
+
+SNAPSHOT_TABLES: Tuple[SnapshotTable, ...] = (
+    SnapshotTable("MCP", "id", (
+        ("id", "string"), ("name", "string"), ("command", "string"), ("args", "strings"),
+        ("description", "string"), ("enabled", "bool"), ("description_hash", "string"),
+    ) + _TIMESTAMP_COLUMNS),
+    SnapshotTable("RAG", "id", (
+        ("id", "string"), ("name", "string"), ("description", "string"), ("model", "string"),
+        ("embedding_model", "string"), ("vector_store", "string"), ("enabled", "bool"),
+        ("description_hash", "string"),
+    ) + _TIMESTAMP_COLUMNS),
+    SnapshotTable("ObsidianNote", "id", (
+        ("id", "string"), ("title", "string"), ("content", "string"), ("folder", "string"),
+        ("path", "string"), ("links", "strings"), ("content_hash", "string"), ("mtime", "float"),
+    ) + _TIMESTAMP_COLUMNS),
+    SnapshotTable("Tag", "name", (("name", "string"),), embedding=False),
+)
+SNAPSHOT_LABELS = tuple(table.label for table in SNAPSHOT_TABLES)
+_TABLES_BY_LABEL = {table.label: table for table in SNAPSHOT_TABLES}
+
+RELATIONSHIP_COLUMNS = (
+    ("type", "string"), ("source_label", "string"), ("source_key", "string"),
+    ("target_label", "string"), ("target_key", "string"), ("score", "float"), ("linked_at", "timestamp"),
+)
+
+# Relações entre os nós exportados, de qualquer tipo (USES, TAGGED, LINKS_TO, SIMILAR_TO, ...)
+RELATIONSHIPS_EXPORT_QUERY = """
+MATCH (s:MCP|RAG|ObsidianNote|Tag)-[r]->(t:MCP|RAG|ObsidianNote|Tag)
+WITH s, r, t,
+     [l IN labels(s) WHERE l IN $labels][0] AS source_label,
+     [l IN labels(t) WHERE l IN $labels][0] AS target_label
+RETURN type(r) AS type,
+       source_label, CASE source_label WHEN 'Tag' THEN s.name ELSE s.id END AS source_key,
+       target_label, CASE target_label WHEN 'Tag' THEN t.name ELSE t.id END AS target_key,
+       r.score AS score, r.linked_at.epochMillis AS linked_at
+"""
+
+RELATIONSHIPS_IMPORT_QUERY_TEMPLATE = """
+UNWIND $rows AS row
+MATCH (s:{source_label} {{{source_key}: row.source_key}})
+MATCH (t:{target_label} {{{target_key}: row.target_key}})
+MERGE (s)-[r:{type}]->(t)
+SET r.score = coalesce(row.score, r.score),
+    r.linked_at = CASE WHEN row.linked_at IS NULL THEN r.linked_at ELSE datetime({{epochMillis: row.linked_at}}) END
+RETURN count(*) AS linked
+"""
+
+
+def _require_pyarrow() -> None:
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow é necessário para snapshots do grafo (pip install pyarrow)")
+
+
+def _arrow_type(kind: str) -> "pa.DataType":
+    return {
+        "string": pa.string(),
+        "strings": pa.list_(pa.string()),
+        "bool": pa.bool_(),
+        "float": pa.float64(),
+        "timestamp": pa.timestamp("ms", tz="UTC"),
+    }[kind]
+
+
+class _TableWriter:
+    """Grava lotes de linhas (dicts) num arquivo Parquet ou Arrow IPC."""
+
+    def __init__(self, path: Path, schema: "pa.Schema", fmt: str):
+        self.schema = schema
+        self.rows = 0
+        if fmt == "parquet":
+            self._sink = None
+            self._writer = pq.ParquetWriter(str(path), schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(str(path), "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+
+def _iter_file_batches(path: Path, fmt: str, batch_size: int) -> Iterator["pa.RecordBatch"]:
+    if fmt == "parquet":
+        yield from pq.ParquetFile(str(path)).iter_batches(batch_size=batch_size)
+        return
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+
+
+def _iter_file_rows(path: Path, fmt: str, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Lê um arquivo do snapshot em lotes de linhas; timestamps voltam como epoch ms."""
+    for batch in _iter_file_batches(path, fmt, batch_size):
+        columns = {}
+        for name, column in zip(batch.schema.names, batch.columns):
+            if pa.types.is_timestamp(column.type):
+                column = column.cast(pa.int64())
+            columns[name] = column.to_pylist()
+        yield [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _node_export_row(table: SnapshotTable, record: Dict[str, Any], dimension: int) -> Tuple[Dict[str, Any], bool]:
+    """Linha para o arquivo; embeddings de outra dimensão (modelo antigo) ficam nulos."""
+    row = {name: record.get(name) for name, _ in table.columns}
+    dropped = False
+    if table.embedding:
+        embedding = record.get("embedding")
+        if embedding is not None and len(embedding) != dimension:
+            embedding, dropped = None, True
+        row["embedding"] = embedding
+    return row, dropped
+
+
+def _node_import_row(table: SnapshotTable, row: Dict[str, Any], with_embeddings: bool) -> Dict[str, Any]:
+    timestamps = set(table.timestamps)
+    skip = timestamps if with_embeddings else timestamps | set(EMBEDDING_STATE_PROPERTIES) | {"embedding"}
+    item = {
+        "key": row.get(table.key),
+        # Nulos ficam de fora: em `SET n += props` eles apagariam a propriedade
+        "props": {name: value for name, value in row.items() if value is not None and name not in skip},
+    }
+    for name in table.timestamps:
+        item[name] = row.get(name) if with_embeddings or name not in EMBEDDING_STATE_PROPERTIES else None
+    return item
+
+
+def export_snapshot(
+    manager,
+    path: Path,
+    fmt: str = "parquet",
+    batch_size: int = 5000,
+    fetch_size: int = 2000
+) -> Dict[str, Any]:
+    """
+    Exporta o grafo de conhecimento para um diretório de snapshot.
+
+    Args:
+        manager: Neo4jGraphRAGManager conectado
+        path: Diretório de destino (criado se não existir; arquivos são sobrescritos)
+        fmt: "parquet" ou "arrow" (Arrow IPC)
+        batch_size: Linhas por lote gravado (row group no Parquet)
+        fetch_size: Linhas por lote lido do Neo4j
+
+    Returns:
+        O manifest gravado (contagens por arquivo, modelo, dimensão, segundos)
+    """
+    _require_pyarrow()
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt} (use {', '.join(SNAPSHOT_FORMATS)})")
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / MANIFEST_FILE).unlink(missing_ok=True)
+    dimension = int(manager.embedding_dimension)
+    start = time.perf_counter()
+
+    counts: Dict[str, int] = {}
+    dropped_embeddings = 0
+    for table in SNAPSHOT_TABLES:
+        writer = _TableWriter(path / f"{table.label}{SNAPSHOT_FORMATS[fmt]}", table.schema(dimension), fmt)
+        try:
+            rows = []
+            for record in manager.iter_query(table.export_query(), fetch_size=fetch_size):
+                row, dropped = _node_export_row(table, record, dimension)
+                dropped_embeddings += dropped
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    writer.write(rows)
+                    rows = []
+            writer.write(rows)
+        finally:
+            writer.close()
+        counts[table.label] = writer.rows
+        logger.info(f"Snapshot: {writer.rows} nós {table.label} exportados")
+
+    schema = pa.schema([pa.field(name, _arrow_type(kind)) for name, kind in RELATIONSHIP_COLUMNS])
+    writer = _TableWriter(path / f"{RELATIONSHIPS_TABLE}{SNAPSHOT_FORMATS[fmt]}", schema, fmt)
+    try:
+        rows = []
+        for record in manager.iter_query(
+            RELATIONSHIPS_EXPORT_QUERY, {"labels": list(SNAPSHOT_LABELS)}, fetch_size=fetch_size
+        ):
+            rows.append(record)
+            if len(rows) >= batch_size:
+                writer.write(rows)
+                rows = []
+        writer.write(rows)
+    finally:
+        writer.close()
+    counts[RELATIONSHIPS_TABLE] = writer.rows
+    logger.info(f"Snapshot: {writer.rows} relações exportadas")
+
+    if dropped_embeddings:
+        logger.warning(f"Snapshot: {dropped_embeddings} embeddings com dimensão diferente de {dimension} exportados como nulos")
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "format": fmt,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "embedding_model": manager.embedding_model_name,
+        "embedding_dimension": dimension,
+        "counts": counts,
+        "dropped_embeddings": dropped_embeddings,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    (path / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def read_manifest(path: Path) -> Dict[str, Any]:
+    """Manifest do snapshot; falha se o snapshot estiver incompleto ou for de outra versão."""
+    manifest_path = Path(path) / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise GraphSnapshotError(f"{manifest_path} não encontrado (snapshot incompleto?)")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise GraphSnapshotError(f"Versão de snapshot não suportada: {manifest.get('format_version')}")
+    return manifest
+
+
+def import_snapshot(
+    manager,
+    path: Path,
+    batch_size: int = 2000,
+    skip_embeddings: bool = False
+) -> Dict[str, Any]:
+    """
+    Carrega um snapshot no Neo4j (MERGE pelos ids, então pode repetir).
+
+    Os nós são gravados antes das relações, em lotes UNWIND, um arquivo por vez.
+
+    Args:
+        manager: Neo4jGraphRAGManager conectado (o schema já é garantido por ele)
+        path: Diretório do snapshot
+        batch_size: Linhas por transação
+        skip_embeddings: Importa sem embeddings; necessário quando o snapshot
+            foi gerado com outro modelo. Os nós ficam marcados como desatualizados
+            e ganham embedding no próximo sync/upsert
+
+    Returns:
+        Contagens importadas por arquivo e segundos
+    """
+    _require_pyarrow()
+    path = Path(path)
+    manifest = read_manifest(path)
+    fmt = manifest["format"]
+    same_model = (
+        manifest.get("embedding_model") == manager.embedding_model_name
+        and int(manifest.get("embedding_dimension") or 0) == int(manager.embedding_dimension)
+    )
+    if not same_model and not skip_embeddings:
+        raise GraphSnapshotError(
+            f"Snapshot gerado com {manifest.get('embedding_model')} ({manifest.get('embedding_dimension')}d), "
+            f"modelo atual é {manager.embedding_model_name} ({manager.embedding_dimension}d); "
+            "importe com skip_embeddings"
+        )
+    start = time.perf_counter()
+
+    counts: Dict[str, int] = {}
+    for table in SNAPSHOT_TABLES:
+        file_path = path / f"{table.label}{SNAPSHOT_FORMATS[fmt]}"
+        if not file_path.exists():
+            continue
+        query = table.import_query()
+        written = 0
+        for rows in _iter_file_rows(file_path, fmt, batch_size):
+            items = [_node_import_row(table, row, not skip_embeddings) for row in rows]
+            items = [item for item in items if item["key"] is not None]
+            manager.graph.query(query, {"rows": items})
+            written += len(items)
+        counts[table.label] = written
+        logger.info(f"Snapshot: {written} nós {table.label} importados")
+
+    linked = 0
+    file_path = path / f"{RELATIONSHIPS_TABLE}{SNAPSHOT_FORMATS[fmt]}"
+    if file_path.exists():
+        for rows in _iter_file_rows(file_path, fmt, batch_size):
+            groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+            for row in rows:
+                groups.setdefault((row["type"], row["source_label"], row["target_label"]), []).append(row)
+            for (rel_type, source_label, target_label), group in groups.items():
+                if (
+                    source_label not in _TABLES_BY_LABEL or target_label not in _TABLES_BY_LABEL
+                    or not rel_type or not _IDENTIFIER.match(rel_type)
+                ):
+                    logger.warning(f"Snapshot: relação ignorada {source_label}-[{rel_type}]->{target_label}")
+                    continue
+                query = RELATIONSHIPS_IMPORT_QUERY_TEMPLATE.format(
+                    source_label=source_label,
+                    source_key=_TABLES_BY_LABEL[source_label].key,
+                    target_label=target_label,
+                    target_key=_TABLES_BY_LABEL[target_label].key,
+                    type=rel_type
+                )
+                result = manager.graph.query(query, {"rows": group})
+                linked += result[0]["linked"] if result else 0
+    counts[RELATIONSHIPS_TABLE] = linked
+    logger.info(f"Snapshot: {linked} relações importadas")
+
+    manager.notify_graph_changed()
+    manager.refresh_graph_statistics()
+    return {
+        "counts": counts,
+        "embeddings": not skip_embeddings,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def main():
+    import argparse
+
+    from src.agents.mcp_neo4j_integration import get_neo4j_manager
+
+    parser = argparse.ArgumentParser(description="Exporta/importa o grafo de conhecimento em Parquet ou Arrow IPC")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Grava um snapshot do grafo")
+    export_parser.add_argument("path", type=Path)
+    export_parser.add_argument("--format", choices=sorted(SNAPSHOT_FORMATS), default="parquet")
+    export_parser.add_argument("--batch-size", type=int, default=5000)
+    import_parser = subparsers.add_parser("import", help="Carrega um snapshot no Neo4j")
+    import_parser.add_argument("path", type=Path)
+    import_parser.add_argument("--batch-size", type=int, default=2000)
+    import_parser.add_argument("--skip-embeddings", action="store_true", help="Ignora os embeddings do snapshot")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    manager = get_neo4j_manager()
+    if args.command == "export":
+        print(json.dumps(export_snapshot(manager, args.path, args.format, args.batch_size), indent=2))
+    else:
+        print(json.dumps(import_snapshot(manager, args.path, args.batch_size, args.skip_embeddings), indent=2))
+
+
+if __name__ == "__main__":
+    main()
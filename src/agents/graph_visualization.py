@@ -0,0 +1,345 @@
+"""
+Subgrafos conexos e paginados para visualização.
+
+Em vez de buscar N nós e N relações arbitrários (cujas arestas quase sempre
+apontam para nós que não vieram), a visualização parte de nós foco (um id ou
+uma busca) e expande em largura:
+- cada página expande parte da fronteira e só devolve arestas entre nós já
+  enviados, então o que o cliente tem é sempre um subgrafo conexo;
+- o grau é limitado no servidor (`max_degree` vizinhos por nó expandido), com
+  o grau real de cada nó no payload para a UI mostrar "+N";
+- o payload é colunar, com labels/tipos codificados em dicionário e arestas
+  referenciando nós por índice inteiro estável entre páginas, o que mantém
+  respostas de 10k+ nós pequenas e baratas de decodificar;
+- o estado da BFS fica no servidor, atrás de um cursor opaco; `expand` pede a
+  expansão de nós específicos (ex.: o usuário clicou num nó).
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Um ramo por label principal (varredura só do label pedido) e um ramo genérico
+# para os demais; o filtro é parâmetro, então o plano é o mesmo para qualquer
+# combinação de labels.
+SEED_LABELS = ("MCP", "RAG", "ObsidianNote")
+_SEED_BRANCH = """
+  WITH $labels AS wanted WHERE wanted IS NULL OR '{label}' IN wanted
+  MATCH (n:{label})
+  RETURN n LIMIT $limit"""
+SUBGRAPH_SEEDS_QUERY = (
+    "CALL {"
+    + "\n  UNION".join(_SEED_BRANCH.format(label=label) for label in SEED_LABELS)
+    + """
+  UNION
+  WITH $labels AS wanted WHERE wanted IS NULL OR any(label IN wanted WHERE NOT label IN $seed_labels)
+  MATCH (n)
+  WHERE NOT any(label IN labels(n) WHERE label IN $seed_labels)
+    AND (wanted IS NULL OR any(label IN labels(n) WHERE label IN wanted))
+  RETURN n LIMIT $limit
+}
+RETURN elementId(n) AS element_id
+LIMIT $limit
+"""
+)
+
+SUBGRAPH_FOCUS_QUERY = """
+CALL {
+  MATCH (n) WHERE elementId(n) = $focus RETURN n
+  UNION
+  MATCH (n:MCP {id: $focus}) RETURN n
+  UNION
+  MATCH (n:RAG {id: $focus}) RETURN n
+  UNION
+  MATCH (n:ObsidianNote {id: $focus}) RETURN n
+}
+RETURN elementId(n) AS element_id
+LIMIT 1
+"""
+
+SUBGRAPH_NODES_QUERY = """
+UNWIND $ids AS nodeId
+MATCH (n) WHERE elementId(n) = nodeId
+RETURN elementId(n) AS element_id, n.id AS key,
+       coalesce(n.name, n.title, n.id) AS name, labels(n) AS labels,
+       COUNT { (n)--() } AS degree
+"""
+
+# Vizinhos de cada nó da fronteira, no máximo $max_degree por nó
+SUBGRAPH_EXPAND_QUERY = """
+UNWIND $frontier AS nodeId
+MATCH (n) WHERE elementId(n) = nodeId
+CALL {
+  WITH n
+  MATCH (n)-[r]-(m)
+  WHERE $labels IS NULL OR any(label IN labels(m) WHERE label IN $labels)
+  RETURN r, m
+  LIMIT $max_degree
+}
+RETURN nodeId AS source, elementId(r) AS rel_id, type(r) AS type,
+       elementId(startNode(r)) = nodeId AS outgoing,
+       elementId(m) AS element_id, m.id AS key,
+       coalesce(m.name, m.title, m.id) AS name, labels(m) AS labels,
+       COUNT { (m)--() } AS degree
+"""
+
+
+@dataclass
+class SubgraphCursor:
+    """Estado da BFS de uma sessão de visualização."""
+    labels: Optional[List[str]]
+    max_depth: int
+    max_degree: int
+    index: Dict[str, int] = field(default_factory=dict)
+    depth: Dict[str, int] = field(default_factory=dict)
+    expanded: Set[str] = field(default_factory=set)
+    frontier: Deque[str] = field(default_factory=deque)
+    edges: Set[str] = field(default_factory=set)
+    label_names: Dict[str, int] = field(default_factory=dict)
+    type_names: Dict[str, int] = field(default_factory=dict)
+    touched_at: float = field(default_factory=time.monotonic)
+
+
+class SubgraphPager:
+    """Gera páginas colunares de um subgrafo conexo, com cursor no servidor."""
+
+    def __init__(self, neo4j_manager, max_cursors: int = 128, cursor_ttl: float = 900.0):
+        self.neo4j_manager = neo4j_manager
+        self.max_cursors = max_cursors
+        self.cursor_ttl = cursor_ttl
+        self._cursors: "OrderedDict[str, SubgraphCursor]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        focus: Optional[str] = None,
+        query: Optional[str] = None,
+        node_types: Optional[List[str]] = None,
+        seeds: int = 10,
+        max_depth: int = 2,
+        max_degree: int = 50,
+        page_size: int = 500
+    ) -> Dict[str, Any]:
+        """
+        Abre uma sessão e devolve a primeira página.
+
+        Args:
+            focus: elementId ou id de um nó MCP/RAG/ObsidianNote
+            query: Texto; os nós da busca híbrida viram sementes (também
+                usado quando o foco não é encontrado)
+            node_types: Labels permitidos (None para todos)
+            seeds: Sementes quando não há foco nem busca (ou resultados da busca)
+            max_depth: Saltos máximos a partir das sementes
+            max_degree: Vizinhos máximos por nó expandido
+            page_size: Nós novos por página (aproximado)
+        """
+        cursor = SubgraphCursor(labels=node_types or None, max_depth=max(max_depth, 1), max_degree=max_degree)
+        seed_ids = self._seed_ids(focus, query, cursor.labels, seeds)
+        for element_id in seed_ids:
+            cursor.frontier.append(element_id)
+            cursor.depth[element_id] = 0
+        token = self._store(cursor)
+
+        mirror = self._mirror(cursor.labels)
+        if mirror is not None:
+            seed_nodes = mirror.node_records(seed_ids)
+        else:
+            seed_nodes = self.neo4j_manager.query_graph(SUBGRAPH_NODES_QUERY, {"ids": seed_ids})
+        page = self._new_page()
+        for record in seed_nodes:
+            self._add_node(cursor, page, record)
+        return self._expand(token, cursor, page, page_size)
+
+    def next_page(
+        self,
+        cursor_token: str,
+        page_size: int = 500,
+        expand: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Continua a BFS de uma sessão.
+
+        Args:
+            cursor_token: Cursor devolvido pela página anterior
+            page_size: Nós novos por página (aproximado)
+            expand: elementIds a expandir primeiro, mesmo além de `max_depth`
+        """
+        with self._lock:
+            cursor = self._cursors.get(cursor_token)
+            if cursor is not None:
+                self._cursors.move_to_end(cursor_token)
+        if cursor is None:
+            raise KeyError(f"Cursor de visualização inválido ou expirado: {cursor_token}")
+        for element_id in reversed(expand or []):
+            if element_id in cursor.index:
+                cursor.expanded.discard(element_id)
+                cursor.depth[element_id] = min(cursor.depth.get(element_id, 0), cursor.max_depth - 1)
+                cursor.frontier.appendleft(element_id)
+        return self._expand(cursor_token, cursor, self._new_page(), page_size)
+
+    def close(self, cursor_token: str) -> None:
+        with self._lock:
+            self._cursors.pop(cursor_token, None)
+
+    def _mirror(self, labels: Optional[List[str]]):
+        # Réplica em memória do gerenciador, quando ligada, carregada e com todos
+        # os labels pedidos (sem filtro, a sessão alcança labels fora dela)
+        mirror = getattr(self.neo4j_manager, "graph_mirror", None)
+        return mirror if mirror is not None and mirror.ready and mirror.covers(labels) else None
+
+    def _seed_ids(self, focus, query, labels, seeds) -> List[str]:
+        mirror = self._mirror(labels)
+        if focus:
+            if mirror is not None:
+                found = [element_id for element_id in [mirror.find_node(focus)] if element_id]
+            else:
+                found = [r["element_id"] for r in self.neo4j_manager.query_graph(SUBGRAPH_FOCUS_QUERY, {"focus": focus})]
+            if found or not query:
+                return found
+        if query:
+            # Na réplica, busca textual local; sem resultados, cai na busca híbrida
+            if mirror is not None:
+                found = mirror.search_ids(query, labels, seeds)
+                if found:
+                    return found
+            results = self.neo4j_manager.hybrid_search(query, k=seeds)
+            return [r["element_id"] for r in results
+                    if not labels or set(r.get("labels", [])) & set(labels)]
+        if mirror is not None:
+            return mirror.seed_ids(labels, seeds)
+        results = self.neo4j_manager.query_graph(SUBGRAPH_SEEDS_QUERY, {
+            "labels": labels,
+            "seed_labels": list(SEED_LABELS),
+            "limit": seeds
+        })
+        return [r["element_id"] for r in results]
+
+    def _store(self, cursor: SubgraphCursor) -> str:
+        token = secrets.token_urlsafe(12)
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, c in self._cursors.items() if now - c.touched_at > self.cursor_ttl]:
+                del self._cursors[key]
+            self._cursors[token] = cursor
+            while len(self._cursors) > self.max_cursors:
+                self._cursors.popitem(last=False)
+        return token
+
+    @staticmethod
+    def _new_page() -> Dict[str, Any]:
+        return {
+            "nodes": {"index": [], "element_id": [], "key": [], "name": [], "label": [], "degree": []},
+            "edges": {"source": [], "target": [], "type": []},
+            "label_names": [],
+            "type_names": [],
+        }
+
+    @staticmethod
+    def _code(names: Dict[str, int], page_names: List[str], name: str) -> int:
+        # Códigos estáveis na sessão; a página traz só os nomes novos, na ordem dos códigos
+        code = names.get(name)
+        if code is None:
+            code = names[name] = len(names)
+            page_names.append(name)
+        return code
+
+    def _add_node(self, cursor: SubgraphCursor, page: Dict[str, Any], record: Dict[str, Any]) -> int:
+        element_id = record["element_id"]
+        index = cursor.index.get(element_id)
+        if index is not None:
+            return index
+        index = cursor.index[element_id] = len(cursor.index)
+        nodes = page["nodes"]
+        nodes["index"].append(index)
+        nodes["element_id"].append(element_id)
+        nodes["key"].append(record.get("key"))
+        nodes["name"].append(record.get("name"))
+        labels = record.get("labels") or [""]
+        nodes["label"].append(self._code(cursor.label_names, page["label_names"], labels[0]))
+        nodes["degree"].append(record.get("degree", 0))
+        return index
+
+    def _expand(self, token: str, cursor: SubgraphCursor, page: Dict[str, Any], page_size: int) -> Dict[str, Any]:
+        cursor.touched_at = time.monotonic()
+        added_before = len(cursor.index) - len(page["nodes"]["index"])
+        batch_size = max(1, min(100, page_size // max(cursor.max_degree, 1) or 1))
+
+        while cursor.frontier and len(cursor.index) - added_before < page_size:
+            batch = []
+            while cursor.frontier and len(batch) < batch_size:
+                element_id = cursor.frontier.popleft()
+                if element_id in cursor.expanded or cursor.depth.get(element_id, 0) >= cursor.max_depth:
+                    continue
+                cursor.expanded.add(element_id)
+                batch.append(element_id)
+            if not batch:
+                continue
+
+            mirror = self._mirror(cursor.labels)
+            if mirror is not None:
+                records = mirror.expand(batch, cursor.labels, cursor.max_degree)
+            else:
+                records = self.neo4j_manager.query_graph(SUBGRAPH_EXPAND_QUERY, {
+                    "frontier": batch,
+                    "labels": cursor.labels,
+                    "max_degree": cursor.max_degree
+                })
+            for record in records:
+                source = record["source"]
+                neighbour = record["element_id"]
+                if neighbour not in cursor.index:
+                    self._add_node(cursor, page, record)
+                    cursor.depth[neighbour] = cursor.depth[source] + 1
+                    cursor.frontier.append(neighbour)
+                if record["rel_id"] in cursor.edges:
+                    continue
+                cursor.edges.add(record["rel_id"])
+                start, end = (source, neighbour) if record["outgoing"] else (neighbour, source)
+                edges = page["edges"]
+                edges["source"].append(cursor.index[start])
+                edges["target"].append(cursor.index[end])
+                edges["type"].append(self._code(cursor.type_names, page["type_names"], record["type"]))
+
+        # Descarta da fronteira o que já não pode ser expandido
+        cursor.frontier = deque(
+            element_id for element_id in cursor.frontier
+            if element_id not in cursor.expanded and cursor.depth.get(element_id, 0) < cursor.max_depth
+        )
+        # O cursor continua válido mesmo sem fronteira, para `expand` de nós específicos
+        page["cursor"] = token
+        page["has_more"] = bool(cursor.frontier)
+        page["total_nodes"] = len(cursor.index)
+        page["total_edges"] = len(cursor.edges)
+        return page
+
+
+def pages_to_node_edge_lists(pages: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Converte páginas colunares para o formato {nodes: [...], edges: [...]} da UI."""
+    label_names: List[str] = []
+    type_names: List[str] = []
+    nodes: List[Dict[str, Any]] = []
+    keys: Dict[int, str] = {}
+    edges: List[Dict[str, Any]] = []
+    for page in pages:
+        label_names.extend(page["label_names"])
+        type_names.extend(page["type_names"])
+        columns = page["nodes"]
+        for i, index in enumerate(columns["index"]):
+            key = columns["key"][i] or columns["element_id"][i]
+            keys[index] = key
+            nodes.append({
+                "id": key,
+                "name": columns["name"][i] or key,
+                "label": [label_names[columns["label"][i]]],
+                "degree": columns["degree"][i],
+            })
+        for source, target, type_code in zip(page["edges"]["source"], page["edges"]["target"], page["edges"]["type"]):
+            edges.append({"source": keys[source], "target": keys[target], "relation": type_names[type_code]})
+    return {"nodes": nodes, "edges": edges}
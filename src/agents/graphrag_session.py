@@ -0,0 +1,227 @@
+"""
+Sessões de conversa do GraphRAG.
+
+Cada sessão guarda o que uma conversa com várias perguntas precisa entre um
+turno e outro, com tamanho limitado:
+- histórico: só as últimas `max_messages` mensagens ficam literais; as mais
+  antigas são condensadas num resumo (via LLM, fora do caminho da resposta)
+  que entra no prompt no lugar delas, então o prompt não cresce com a conversa;
+- recuperação de continuações: a busca no grafo usa a pergunta anterior junto
+  com a nova ("e quais dependem dele?" sozinha não acha nada), e o contexto
+  do turno anterior é somado ao recuperado agora;
+- cache de contexto: o contexto recuperado do grafo em cada turno, junto com
+  o embedding da busca que o recuperou. Uma busca seguinte parecida o
+  bastante (cosseno >= `reuse_threshold`) reaproveita esse contexto em vez de
+  consultar o grafo de novo.
+
+As sessões ficam em memória, num LRU limitado (GRAPHRAG_MAX_SESSIONS).
+"""
+
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+GRAPHRAG_MAX_SESSIONS = int(os.getenv("GRAPHRAG_MAX_SESSIONS", "100"))
+GRAPHRAG_SESSION_MAX_MESSAGES = int(os.getenv("GRAPHRAG_SESSION_MAX_MESSAGES", "6"))
+GRAPHRAG_SESSION_CONTEXT_CACHE = int(os.getenv("GRAPHRAG_SESSION_CONTEXT_CACHE", "4"))
+GRAPHRAG_SESSION_REUSE_THRESHOLD = float(os.getenv("GRAPHRAG_SESSION_REUSE_THRESHOLD", "0.8"))
+# Resumo acima disso é cortado (mantém o fim, que é o mais recente)
+GRAPHRAG_SUMMARY_MAX_CHARS = 2000
+# Contexto do prompt (novo + turno anterior) acima disso perde os trechos antigos
+GRAPHRAG_CONTEXT_MAX_CHARS = 8000
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class GraphRAGSession:
+    """Histórico limitado e cache de contexto de uma conversa com o GraphRAG."""
+
+    def __init__(
+        self,
+        session_id: str,
+        max_messages: int = GRAPHRAG_SESSION_MAX_MESSAGES,
+        context_cache_size: int = GRAPHRAG_SESSION_CONTEXT_CACHE,
+        reuse_threshold: float = GRAPHRAG_SESSION_REUSE_THRESHOLD
+    ):
+        self.session_id = session_id
+        self.max_messages = max(max_messages, 2)
+        self.reuse_threshold = reuse_threshold
+        self.summary = ""
+        self.messages: deque = deque()
+        # Mensagens que já saíram da janela e aguardam entrar no resumo
+        self._unsummarized: List[BaseMessage] = []
+        self.last_context: Optional[str] = None
+        self.turns = 0
+        self.retrievals = 0
+        self.context_hits = 0
+        self.updated_at = time.time()
+        # (embedding da pergunta, contexto), do mais antigo para o mais recente
+        self._contexts: deque = deque(maxlen=max(context_cache_size, 1))
+        # Um turno por vez: o histórico de um turno é a entrada do seguinte
+        self.lock = threading.Lock()
+        # Um resumo por vez, para as mensagens entrarem nele na ordem
+        self._summary_lock = threading.Lock()
+
+    def prompt_history(self) -> List[BaseMessage]:
+        """Mensagens que entram no prompt: o resumo, as ainda não resumidas e as recentes."""
+        history = list(self._unsummarized) + list(self.messages)
+        if self.summary:
+            history.insert(0, SystemMessage(content=f"Resumo da conversa até aqui:\n{self.summary}"))
+        return history
+
+    def retrieval_query(self, question: str) -> str:
+        """Texto da busca no grafo: a pergunta anterior da conversa seguida da nova."""
+        for message in reversed(list(self._unsummarized) + list(self.messages)):
+            if isinstance(message, HumanMessage):
+                return f"{message.content}\n{question}"
+        return question
+
+    def with_previous_context(self, context: str) -> str:
+        """Contexto recuperado agora, completado com os trechos do turno anterior que não repete."""
+        if not self.last_context or self.last_context == context:
+            return context
+        parts = context.split("\n\n") if context else []
+        seen = set(parts)
+        size = len(context)
+        for part in self.last_context.split("\n\n"):
+            if part in seen or size + len(part) + 2 > GRAPHRAG_CONTEXT_MAX_CHARS:
+                continue
+            seen.add(part)
+            parts.append(part)
+            size += len(part) + 2
+        return "\n\n".join(parts)
+
+    def cached_context(self, embedding: List[float]) -> Optional[str]:
+        """
+        Contexto já recuperado para uma pergunta parecida, se houver.
+
+        Args:
+            embedding: Embedding da nova pergunta
+
+        Returns:
+            O contexto mais similar acima do limiar, ou None para consultar o grafo
+        """
+        best_score, best_context = self.reuse_threshold, None
+        for cached_embedding, context in self._contexts:
+            score = _cosine(embedding, cached_embedding)
+            if score >= best_score:
+                best_score, best_context = score, context
+        if best_context is not None:
+            self.context_hits += 1
+            self.last_context = best_context
+        return best_context
+
+    def remember_context(self, embedding: List[float], context: str) -> None:
+        """Guarda o contexto recuperado para reaproveitar nas próximas perguntas."""
+        self.retrievals += 1
+        self._contexts.append((embedding, context))
+        self.last_context = context
+
+    def record_turn(self, question: str, answer: str) -> bool:
+        """
+        Registra pergunta e resposta; as mensagens excedentes aguardam o resumo.
+
+        As mensagens saem do histórico em bloco (metade da janela, arredondada
+        para pares pergunta/resposta), para que o resumo seja refeito a cada
+        poucos turnos e não a cada pergunta. Até `summarize_pending` rodar,
+        elas continuam no prompt literalmente.
+
+        Args:
+            question: Pergunta do usuário
+            answer: Resposta gerada
+
+        Returns:
+            True se há mensagens esperando o resumo
+        """
+        self.messages.append(HumanMessage(content=question))
+        self.messages.append(AIMessage(content=answer))
+        self.turns += 1
+        self.updated_at = time.time()
+        if len(self.messages) <= self.max_messages:
+            return bool(self._unsummarized)
+
+        # Par (pergunta, resposta) sai junto: o histórico nunca começa numa resposta
+        keep = self.max_messages // 2 // 2 * 2
+        self._unsummarized.extend(self.messages.popleft() for _ in range(len(self.messages) - keep))
+        return True
+
+    def summarize_pending(self, summarize: Callable[[str, List[BaseMessage]], str]) -> bool:
+        """
+        Condensa no resumo as mensagens que saíram da janela.
+
+        Pode rodar em paralelo com o turno seguinte: o LLM é chamado sem o
+        lock do turno, e as mensagens só saem do prompt depois que o resumo
+        novo já está valendo.
+
+        Args:
+            summarize: Função (resumo atual, mensagens antigas) -> novo resumo
+
+        Returns:
+            True se o resumo foi atualizado
+        """
+        with self._summary_lock:
+            pending = list(self._unsummarized)
+            if not pending:
+                return False
+            self.summary = summarize(self.summary, pending)[-GRAPHRAG_SUMMARY_MAX_CHARS:]
+            del self._unsummarized[:len(pending)]
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "turns": self.turns,
+            "messages": len(self.messages),
+            "pending_summary": len(self._unsummarized),
+            "summary_chars": len(self.summary),
+            "cached_contexts": len(self._contexts),
+            "retrievals": self.retrievals,
+            "context_hits": self.context_hits
+        }
+
+
+class GraphRAGSessionStore:
+    """Sessões em memória, descartando as menos usadas acima de `max_sessions`."""
+
+    def __init__(self, max_sessions: int = GRAPHRAG_MAX_SESSIONS):
+        self.max_sessions = max(max_sessions, 1)
+        self._sessions: "OrderedDict[str, GraphRAGSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: Optional[str] = None) -> Tuple[GraphRAGSession, bool]:
+        """
+        Sessão pelo id, criando se não existir (ou se nenhum id for dado).
+
+        Returns:
+            (sessão, True se foi criada agora)
+        """
+        with self._lock:
+            if session_id and session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+                return self._sessions[session_id], False
+            session = GraphRAGSession(session_id or uuid.uuid4().hex)
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session, True
+
+    def peek(self, session_id: str) -> Optional[GraphRAGSession]:
+        """Sessão pelo id, sem criar nem alterar a ordem do LRU."""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def end(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
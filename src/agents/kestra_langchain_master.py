@@ -24,7 +24,7 @@ from langgraph.prebuilt import ToolNode
 from langchain.tools import StructuredTool
 from typing_extensions import TypedDict
 
-from src.apps.chains import load_llm, load_embedding_model
+from src.apps.model_registry import get_llm, get_embedding_model
 from src.agents.orchestrator import get_orchestrator, AgentType
 from src.agents.mcp_kestra_integration import get_kestra_agent, KestraWorkflow
 from src.agents.mcp_manager import get_mcp_manager
@@ -81,12 +81,12 @@ class KestraLangChainMaster:
         
         # Carrega modelos
         try:
-            self.llm = load_llm(
+            self.llm = get_llm(
                 self.llm_name,
                 logger=logger,
                 config={"ollama_base_url": self.ollama_base_url}
             )
-            self.embeddings, _ = load_embedding_model(
+            self.embeddings, _ = get_embedding_model(
                 self.embedding_model_name,
                 logger=logger,
                 config={"ollama_base_url": self.ollama_base_url}
@@ -149,6 +149,11 @@ class KestraLangChainMaster:
             status = self.orchestrator.get_system_status()
             return json.dumps(status, indent=2)
         
+        def get_graph_overview(search: Optional[str] = None) -> str:
+            """Obtém estatísticas do grafo Neo4j e nós relacionados a um termo (consultas em paralelo)."""
+            overview = self.orchestrator.get_graph_overview(search)
+            return json.dumps(overview, indent=2, default=str)
+        
         def create_custom_workflow(workflow_id: str, tasks: List[Dict], schedule: Optional[str] = None) -> str:
             """Cria workflow customizado."""
             workflow = KestraWorkflow(
@@ -168,6 +173,7 @@ class KestraLangChainMaster:
             StructuredTool.from_function(sync_mcp_to_neo4j),
             StructuredTool.from_function(sync_mcp_to_obsidian),
             StructuredTool.from_function(get_system_status),
+            StructuredTool.from_function(get_graph_overview),
             StructuredTool.from_function(create_custom_workflow),
         ]
         
@@ -0,0 +1,380 @@
+"""
+Índice vetorial aproximado local (IVF) sobre os embeddings do grafo.
+
+Cópia em processo dos embeddings de MCP, RAG e ObsidianNote, para buscas por
+similaridade sem ida ao Neo4j (latência) ou sem Neo4j nenhum (fallback):
+- IVF: k-means esférico separa os vetores em `nlist` listas; a busca compara a
+  pergunta com os centróides e varre só as `nprobe` listas mais próximas;
+- os vetores ficam normalizados em float32, ordenados por lista num .npy que
+  é aberto com memory-map, então carregar o índice não lê os vetores do disco;
+- os scores seguem a escala do índice vetorial do Neo4j ((1 + cosseno) / 2),
+  então limiares e fusão RRF valem para as duas fontes.
+
+Precisa de numpy (instalado junto com sentence-transformers); sem ele o índice
+fica indisponível e tudo continua indo ao Neo4j.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+# Abaixo disso uma varredura completa é mais rápida (e exata)
+IVF_MIN_VECTORS = 2000
+MAX_LABELS = 8
+
+# Nós com embedding, em ordem estável (para o índice ser reprodutível)
+LOCAL_INDEX_NODES_QUERY = """
+MATCH (n:MCP|RAG|ObsidianNote)
+WHERE n.embedding IS NOT NULL
+RETURN elementId(n) AS element_id, n.id AS id, labels(n) AS labels,
+       coalesce(n.name, n.title, n.id) AS name,
+       left(coalesce(n.description, n.content, ''), $max_chars) AS text,
+       n.embedding AS embedding
+ORDER BY element_id
+"""
+
+
+def default_index_path() -> Path:
+    return Path(os.getenv("LOCAL_VECTOR_INDEX_PATH", "local_vector_index"))
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy é necessário para o índice vetorial local")
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _kmeans(data, nlist: int, iterations: int, seed: int):
+    """k-means esférico (produto interno) numa amostra dos vetores."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(data), nlist * 64)
+    sample = np.asarray(data[np.sort(rng.choice(len(data), sample_size, replace=False))])
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        # Lista vazia mantém o centróide anterior
+        empty = ~np.bincount(assign, minlength=nlist).astype(bool)
+        sums[empty] = centroids[empty]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _assign(data, centroids, chunk: int = 8192):
+    return np.concatenate([
+        np.argmax(data[i:i + chunk] @ centroids.T, axis=1)
+        for i in range(0, len(data), chunk)
+    ]) if len(data) else np.zeros(0, dtype=np.int64)
+
+
+class LocalVectorIndex:
+    """Índice IVF em memória/disco; imutável depois de construído."""
+
+    def __init__(
+        self,
+        vectors,
+        centroids,
+        offsets,
+        label_bits,
+        nodes: Dict[str, List[Any]],
+        meta: Dict[str, Any]
+    ):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.offsets = offsets
+        self.label_bits = label_bits
+        self.nodes = nodes
+        self.meta = meta
+        self.label_names: List[str] = meta["label_names"]
+
+    def __len__(self) -> int:
+        return len(self.nodes["element_id"])
+
+    @property
+    def dimension(self) -> int:
+        return self.meta["dimension"]
+
+    @property
+    def embedding_model(self) -> Optional[str]:
+        return self.meta.get("embedding_model")
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        records: Iterable[Dict[str, Any]],
+        embedding_model: Optional[str] = None,
+        nlist: Optional[int] = None,
+        iterations: int = 10,
+        seed: int = 42
+    ) -> "LocalVectorIndex":
+        """
+        Constrói o índice a partir de records com element_id, id, labels, name, text e embedding.
+
+        Args:
+            records: Nós (ex.: LOCAL_INDEX_NODES_QUERY via iter_query)
+            embedding_model: Modelo que gerou os embeddings (gravado nos metadados)
+            nlist: Número de listas (padrão: ~sqrt(N); 1 = busca exata)
+            iterations: Iterações do k-means
+            seed: Semente do k-means
+        """
+        _require_numpy()
+        nodes: Dict[str, List[Any]] = {"element_id": [], "id": [], "name": [], "text": []}
+        label_names: List[str] = []
+        bits: List[int] = []
+        chunks: List[Any] = []
+        pending: List[List[float]] = []
+        dimension = None
+        for record in records:
+            embedding = record["embedding"]
+            if dimension is None:
+                dimension = len(embedding)
+            if len(embedding) != dimension:
+                logger.warning(f"Embedding com dimensão {len(embedding)} != {dimension} ignorado: {record['element_id']}")
+                continue
+            mask = 0
+            for label in record.get("labels") or []:
+                if label not in label_names:
+                    if len(label_names) == MAX_LABELS:
+                        continue
+                    label_names.append(label)
+                mask |= 1 << label_names.index(label)
+            bits.append(mask)
+            for key in nodes:
+                nodes[key].append(record.get(key))
+            pending.append(embedding)
+            if len(pending) == 4096:
+                chunks.append(np.asarray(pending, dtype=np.float32))
+                pending = []
+        if pending:
+            chunks.append(np.asarray(pending, dtype=np.float32))
+
+        count = len(bits)
+        data = _normalize(np.concatenate(chunks)) if chunks else np.zeros((0, dimension or 0), dtype=np.float32)
+        if nlist is None:
+            nlist = 1 if count < IVF_MIN_VECTORS else int(np.sqrt(count))
+        nlist = max(1, min(nlist, count or 1))
+
+        if nlist == 1:
+            centroids = _normalize(data.sum(axis=0, keepdims=True)) if count else np.zeros((1, data.shape[1]), np.float32)
+            order = np.arange(count)
+            offsets = np.array([0, count], dtype=np.int64)
+        else:
+            centroids = _kmeans(data, nlist, iterations, seed)
+            assign = _assign(data, centroids)
+            order = np.argsort(assign, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))]).astype(np.int64)
+
+        meta = {
+            "format": INDEX_FORMAT_VERSION,
+            "dimension": int(data.shape[1]),
+            "embedding_model": embedding_model,
+            "count": count,
+            "label_names": label_names,
+            "built_at": time.time(),
+        }
+        return cls(
+            vectors=np.ascontiguousarray(data[order], dtype=np.float32),
+            centroids=centroids.astype(np.float32),
+            offsets=offsets,
+            label_bits=np.asarray(bits, dtype=np.uint8)[order],
+            nodes={key: [values[i] for i in order] for key, values in nodes.items()},
+            meta=meta,
+        )
+
+    def save(self, path: Path) -> None:
+        """Grava o índice; a troca do diretório é atômica para quem está lendo."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        old = path.with_name(path.name + ".old")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "vectors.npy", self.vectors)
+        np.save(tmp / "centroids.npy", self.centroids)
+        np.save(tmp / "offsets.npy", self.offsets)
+        np.save(tmp / "label_bits.npy", self.label_bits)
+        with open(tmp / "nodes.json", "w", encoding="utf-8") as f:
+            json.dump(self.nodes, f, ensure_ascii=False)
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        shutil.rmtree(old, ignore_errors=True)
+        if path.exists():
+            path.rename(old)
+        tmp.rename(path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalVectorIndex":
+        """Abre o índice; os vetores são mapeados em memória, não lidos."""
+        _require_numpy()
+        path = Path(path)
+        with open(path / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Formato de índice local não suportado: {meta.get('format')}")
+        with open(path / "nodes.json", encoding="utf-8") as f:
+            nodes = json.load(f)
+        return cls(
+            vectors=np.load(path / "vectors.npy", mmap_mode="r"),
+            centroids=np.load(path / "centroids.npy"),
+            offsets=np.load(path / "offsets.npy"),
+            label_bits=np.load(path / "label_bits.npy"),
+            nodes=nodes,
+            meta=meta,
+        )
+
+    def search(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        nprobe: Optional[int] = None,
+        labels: Optional[List[str]] = None,
+        min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Vizinhos aproximados de um embedding.
+
+        Args:
+            embedding: Vetor da pergunta
+            k: Número de resultados
+            nprobe: Listas varridas (padrão: LOCAL_VECTOR_INDEX_NPROBE ou ~nlist/16, mínimo 8)
+            labels: Só nós com algum destes labels
+            min_score: Score mínimo (escala do Neo4j)
+
+        Returns:
+            Records no formato do hybrid_search (element_id, labels, name,
+            text, score, source='vector') e o id do nó
+        """
+        if not len(self) or k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        wanted = 0
+        for label in labels or []:
+            if label in self.label_names:
+                wanted |= 1 << self.label_names.index(label)
+        if labels and not wanted:
+            return []
+
+        if nprobe is None:
+            nprobe = int(os.getenv("LOCAL_VECTOR_INDEX_NPROBE", "0")) or max(8, self.nlist // 16)
+        nprobe = min(max(nprobe, 1), self.nlist)
+        if nprobe == self.nlist:
+            lists = range(self.nlist)
+        else:
+            lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        positions, scores = [], []
+        for lst in lists:
+            start, end = int(self.offsets[lst]), int(self.offsets[lst + 1])
+            if start == end:
+                continue
+            list_scores = self.vectors[start:end] @ query
+            list_positions = np.arange(start, end)
+            if wanted:
+                keep = (self.label_bits[start:end] & wanted) != 0
+                list_scores, list_positions = list_scores[keep], list_positions[keep]
+            positions.append(list_positions)
+            scores.append(list_scores)
+        if not positions:
+            return []
+        positions = np.concatenate(positions)
+        scores = (1.0 + np.concatenate(scores)) / 2.0
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            positions, scores = positions[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+
+        results = []
+        for i in order:
+            score = float(scores[i])
+            if min_score is not None and score < min_score:
+                break
+            position = int(positions[i])
+            mask = int(self.label_bits[position])
+            results.append({
+                "element_id": self.nodes["element_id"][position],
+                "id": self.nodes["id"][position],
+                "labels": [name for bit, name in enumerate(self.label_names) if mask >> bit & 1],
+                "name": self.nodes["name"][position],
+                "text": self.nodes["text"][position],
+                "score": score,
+                "source": "vector",
+            })
+        return results
+
+
+_local_indexes: Dict[str, Optional[LocalVectorIndex]] = {}
+_local_indexes_lock = threading.Lock()
+
+
+def get_local_vector_index(path: Optional[Path] = None, reload: bool = False) -> Optional[LocalVectorIndex]:
+    """
+    Índice local do caminho (padrão: LOCAL_VECTOR_INDEX_PATH), carregado na primeira chamada.
+
+    Returns:
+        O índice, ou None se não houver índice gravado ou numpy não estiver instalado
+    """
+    path = Path(path) if path else default_index_path()
+    key = str(path.resolve())
+    with _local_indexes_lock:
+        if key in _local_indexes and not reload:
+            return _local_indexes[key]
+        index = None
+        if NUMPY_AVAILABLE and (path / "meta.json").exists():
+            try:
+                index = LocalVectorIndex.load(path)
+                logger.info(f"Índice vetorial local carregado: {len(index)} vetores, {index.nlist} listas ({path})")
+            except Exception as e:
+                logger.error(f"Erro ao carregar índice vetorial local {path}: {e}")
+        _local_indexes[key] = index
+        return index
+
+
+def set_local_vector_index(index: Optional[LocalVectorIndex], path: Optional[Path] = None) -> None:
+    """Publica um índice recém-construído para os próximos get_local_vector_index."""
+    path = Path(path) if path else default_index_path()
+    with _local_indexes_lock:
+        _local_indexes[str(path.resolve())] = index
+
+
+def local_results_to_nodes(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Resultados do índice local no formato do search_graph (propriedades + `__label__`)."""
+    return [
+        {
+            "id": r["id"],
+            "name": r["name"],
+            "description": r["text"],
+            "score": r["score"],
+            "__label__": r["labels"],
+        }
+        for r in results
+    ]
@@ -525,15 +525,19 @@ class DockerIntegrationAgent:
             # 2. Sincroniza com Neo4j
             if self.neo4j_manager:
                 logger.info("Sincronizando com Neo4j...")
-                for mcp in mcp_services:
-                    try:
-                        mcp_dict = asdict(mcp)
-                        if self.neo4j_manager.create_mcp_node(mcp_dict):
+                try:
+                    upserts = self.neo4j_manager.upsert_mcp_nodes([asdict(mcp) for mcp in mcp_services])
+                    for upsert in upserts:
+                        if upsert["success"]:
                             results["neo4j_synced"] += 1
-                    except Exception as e:
-                        error_msg = f"Erro ao sincronizar MCP {mcp.name} com Neo4j: {e}"
-                        logger.error(error_msg)
-                        results["errors"].append(error_msg)
+                        else:
+                            error_msg = f"Erro ao sincronizar MCP {upsert['id']} com Neo4j: {upsert.get('error')}"
+                            logger.error(error_msg)
+                            results["errors"].append(error_msg)
+                except Exception as e:
+                    error_msg = f"Erro ao sincronizar MCPs com Neo4j: {e}"
+                    logger.error(error_msg)
+                    results["errors"].append(error_msg)
             else:
                 logger.warning("Neo4j manager não disponível")
             
@@ -45,7 +45,14 @@ def get_neo4j_manager_safe():
     if not NEO4J_AVAILABLE:
         return None, False
     try:
-        return get_neo4j_manager(), True
+        neo4j_manager = get_neo4j_manager()
+        if os.getenv("GRAPH_MIRROR_ENABLED", "false").lower() == "true":
+            # Estatísticas, busca e visualização respondidas pela réplica em memória
+            neo4j_manager.start_graph_mirror()
+        else:
+            # O dashboard lê o snapshot das estatísticas, mantido por esta thread
+            neo4j_manager.start_statistics_refresher()
+        return neo4j_manager, True
     except Exception as e:
         return None, False
 
@@ -662,9 +669,8 @@ elif page == "Neo4j GraphRAG":
             st.markdown("### Importar MCPs")
             if st.button("📥 Importar Todos os MCPs"):
                 servers = manager.list_servers()
-                imported = 0
-                for server in servers:
-                    mcp_info = {
+                mcp_infos = [
+                    {
                         "name": server.name,
                         "id": server.name,
                         "command": server.command,
@@ -672,8 +678,10 @@ elif page == "Neo4j GraphRAG":
                         "description": server.description or "",
                         "enabled": server.enabled
                     }
-                    if neo4j_manager.create_mcp_node(mcp_info):
-                        imported += 1
+                    for server in servers
+                ]
+                results = neo4j_manager.upsert_mcp_nodes(mcp_infos)
+                imported = sum(1 for r in results if r["success"])
                 st.success(f"✅ {imported} MCP(s) importado(s) para o Neo4j")
             
             # Importar notas do Obsidian
@@ -684,8 +692,31 @@ elif page == "Neo4j GraphRAG":
                     with st.spinner("Importando notas..."):
                         imported = neo4j_manager.import_obsidian_vault(obsidian_manager.vault_path)
                         st.success(f"✅ {imported} nota(s) importada(s) para o Neo4j")
+                if st.button("🔄 Sincronizar Alterações do Obsidian"):
+                    with st.spinner("Sincronizando notas alteradas..."):
+                        sync_stats = neo4j_manager.sync_obsidian_vault(obsidian_manager.vault_path)
+                        st.success(
+                            f"✅ {sync_stats.get('added', 0)} nova(s), "
+                            f"{sync_stats.get('updated', 0)} alterada(s), "
+                            f"{sync_stats.get('removed', 0)} removida(s), "
+                            f"{sync_stats.get('unchanged', 0)} sem alteração"
+                        )
             else:
                 st.warning("⚠️ Vault do Obsidian não configurado. Configure na sidebar.")
+            
+            # Ligações por similaridade
+            st.markdown("### Ligar Nós Similares")
+            st.caption("Cria arestas SIMILAR_TO entre MCPs, RAGs e notas com embeddings próximos (só nós alterados).")
+            if st.button("🧲 Ligar Nós Similares"):
+                with st.spinner("Buscando vizinhos nos índices vetoriais..."):
+                    link_stats = neo4j_manager.link_similar_nodes()
+                if link_stats.get("error"):
+                    st.error(f"❌ {link_stats['error']}")
+                else:
+                    st.success(
+                        f"✅ {link_stats['processed']} nó(s) processado(s), "
+                        f"{link_stats['linked']} aresta(s) SIMILAR_TO gravada(s)"
+                    )
         
         with tab2:
             st.subheader("➕ Criar Nós no Grafo")
@@ -754,11 +785,8 @@ elif page == "Neo4j GraphRAG":
             st.markdown("### Criar Relação MCP-RAG")
             with st.form("create_mcp_rag_relation_form"):
                 # Busca MCPs e RAGs existentes
-                mcp_query = "MATCH (m:MCP) RETURN m.id as id, m.name as name ORDER BY m.name"
-                rag_query = "MATCH (r:RAG) RETURN r.id as id, r.name as name ORDER BY r.name"
-                
-                mcps = neo4j_manager.query_graph(mcp_query)
-                rags = neo4j_manager.query_graph(rag_query)
+                mcps = neo4j_manager.list_nodes("MCP")
+                rags = neo4j_manager.list_nodes("RAG")
                 
                 if mcps and rags:
                     mcp_options = [m["id"] for m in mcps]
@@ -788,27 +816,49 @@ elif page == "Neo4j GraphRAG":
             st.subheader("🔍 Consultar GraphRAG")
             st.markdown("Consulte o grafo de conhecimento usando GraphRAG com LangGraph")
             
-            # Nota: Para usar GraphRAG, precisamos de um LLM
-            # Por enquanto, vamos apenas buscar no grafo
+            # Perguntas seguintes usam o histórico e o contexto já recuperado da mesma sessão
+            if "graphrag_session_id" not in st.session_state:
+                st.session_state.graphrag_session_id = neo4j_manager.start_graphrag_session()
+            
             query = st.text_input("Digite sua pergunta", placeholder="Ex: Quais MCPs estão relacionados ao sistema RAG?")
             
-            if st.button("🔍 Consultar"):
+            col1, col2 = st.columns(2)
+            with col1:
+                ask = st.button("🔍 Consultar")
+            with col2:
+                if st.button("🆕 Nova Conversa"):
+                    neo4j_manager.end_graphrag_session(st.session_state.graphrag_session_id)
+                    st.session_state.graphrag_session_id = neo4j_manager.start_graphrag_session()
+                    st.success("✅ Histórico da conversa descartado")
+            
+            if ask:
                 if query:
-                    with st.spinner("Consultando o grafo..."):
-                        # Busca no grafo
-                        results = neo4j_manager.search_graph(query, limit=10)
-                        
-                        if results:
-                            st.write(f"**{len(results)} resultado(s) encontrado(s):**")
-                            for i, result in enumerate(results, 1):
-                                with st.expander(f"{i}. {result.get('name', result.get('id', 'Sem nome'))}"):
-                                    st.write(f"**Tipo:** {result.get('__label__', 'Unknown')}")
-                                    if result.get('description'):
-                                        st.write(f"**Descrição:** {result.get('description')}")
-                                    if result.get('content'):
-                                        st.write(f"**Conteúdo:** {result.get('content')[:500]}...")
-                        else:
-                            st.info("ℹ️ Nenhum resultado encontrado.")
+                    # Resposta aparece token a token; latências por etapa ao final
+                    status = st.empty()
+                    final = {}
+                    
+                    def tokens():
+                        for event in neo4j_manager.stream_graphrag(query, session_id=st.session_state.graphrag_session_id):
+                            if event["type"] == "node_start":
+                                status.caption("🔎 Recuperando contexto do grafo..." if event["node"] == "retrieve" else "✍️ Gerando resposta...")
+                            elif event["type"] == "node_end" and event.get("cached"):
+                                status.caption("♻️ Reaproveitando contexto desta conversa...")
+                            elif event["type"] == "token":
+                                yield event["content"]
+                            elif event["type"] == "done":
+                                final.update(event)
+                    
+                    st.write_stream(tokens())
+                    timings = final.get("timings") or {}
+                    if final.get("error"):
+                        status.error(f"❌ {final.get('answer')}")
+                    elif timings:
+                        status.caption(" | ".join(
+                            f"{name}: {seconds * 1000:.0f} ms"
+                            for name, seconds in timings.items()
+                        ))
+                    else:
+                        status.empty()
                 else:
                     st.warning("⚠️ Por favor, digite uma pergunta")
         
@@ -826,6 +876,10 @@ elif page == "Neo4j GraphRAG":
                 )
             with col2:
                 limit = st.number_input("Limite de Nós", min_value=10, max_value=200, value=50)
+            focus_query = st.text_input(
+                "Centralizar em (id do nó ou termo de busca)",
+                help="Vazio usa algumas sementes; o grafo é expandido a partir delas e só mostra arestas entre nós exibidos"
+            )
             
             # Estado para armazenar dados do grafo
             if "graph_data" not in st.session_state:
@@ -836,7 +890,9 @@ elif page == "Neo4j GraphRAG":
                     with st.spinner("Carregando dados do grafo..."):
                         graph_data = neo4j_manager.get_graph_visualization_data(
                             node_types=node_types_filter if node_types_filter else None,
-                            limit=limit
+                            limit=limit,
+                            focus=focus_query or None,
+                            query=focus_query or None
                         )
                         st.session_state.graph_data = graph_data
                         
@@ -3,40 +3,655 @@ Integração com Neo4j para GraphRAG e gerenciamento de grafo de conhecimento.
 Conecta MCPs, RAGs e notas do Obsidian em um grafo Neo4j.
 """
 
+import hashlib
 import os
 import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from queue import Queue
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 from datetime import datetime
 import logging
 from dotenv import load_dotenv
 
 from langchain_neo4j import Neo4jGraph, Neo4jVector
-from langchain_core.prompts import ChatPromptTemplate
+from neo4j import Query
+from neo4j.exceptions import Neo4jError
+from neo4j.graph import Node, Path as GraphPath, Relationship
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough
+from langchain_core.runnables import RunnableConfig, RunnableParallel, RunnablePassthrough
 from langgraph.graph import StateGraph, END
 from typing_extensions import TypedDict, Annotated
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 
-from src.apps.chains import load_llm, load_embedding_model
+from src.apps.graph_schema import SchemaMigrationError, ensure_schema
+from src.apps.model_registry import get_llm, get_embedding_model
 from src.agents.mcp_obsidian_integration import ObsidianManager
+from src.agents.graph_mirror import GraphMirror
+from src.agents.graphrag_session import GraphRAGSession, GraphRAGSessionStore
+from src.agents.graph_visualization import SubgraphPager, pages_to_node_edge_lists
+from src.agents.local_vector_index import (
+    LOCAL_INDEX_NODES_QUERY,
+    LocalVectorIndex,
+    default_index_path,
+    get_local_vector_index,
+    set_local_vector_index,
+)
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 
+# Índices vetoriais (um por label), mantidos por src.apps.graph_schema
+VECTOR_INDEXES = ("mcp_embedding", "rag_embedding", "obsidian_embedding")
+FULLTEXT_INDEX = "graph_text"
+
+_VECTOR_BRANCH = """
+  CALL db.index.vector.queryNodes('{index}', $k, $embedding) YIELD node, score
+  RETURN node, score, 'vector' AS source"""
+_FULLTEXT_BRANCH = """
+  CALL db.index.fulltext.queryNodes('graph_text', $text, {limit: $k}) YIELD node, score
+  RETURN node, score, 'fulltext' AS source"""
+_HYBRID_RETURN = """
+}
+RETURN elementId(node) AS element_id, labels(node) AS labels,
+       coalesce(node.name, node.title, node.id) AS name,
+       left(coalesce(node.description, node.content, ''), $max_chars) AS text,
+       score, source
+"""
+HYBRID_VECTOR_QUERY = (
+    "CALL {" + "\n  UNION ALL".join(_VECTOR_BRANCH.format(index=i) for i in VECTOR_INDEXES)
+    + _HYBRID_RETURN
+)
+HYBRID_QUERY = (
+    "CALL {"
+    + "\n  UNION ALL".join([_VECTOR_BRANCH.format(index=i) for i in VECTOR_INDEXES] + [_FULLTEXT_BRANCH])
+    + _HYBRID_RETURN
+)
+# Só o full-text: a parte vetorial vem do índice local
+HYBRID_FULLTEXT_QUERY = "CALL {" + _FULLTEXT_BRANCH + _HYBRID_RETURN
+
+# Constante do Reciprocal Rank Fusion (valor usual da literatura)
+RRF_K = 60
+
+
+def lucene_query(text: str, max_terms: int = 16) -> str:
+    """
+    Converte uma pergunta livre em query Lucene: termos em OR.
+    
+    Só caracteres de palavra sobrevivem, então nenhum operador Lucene
+    (aspas, parênteses, curingas) da pergunta chega ao índice.
+    """
+    terms = [t for t in re.findall(r"\w+", text.lower()) if len(t) > 2][:max_terms]
+    return " OR ".join(terms)
+
+
+def fuse_ranked_results(records: List[Dict], k: int) -> List[Dict]:
+    """
+    Funde resultados vetoriais e full-text por Reciprocal Rank Fusion.
+
+    Os scores brutos não são comparáveis entre fontes (cosseno vs BM25), então
+    cada fonte contribui 1 / (RRF_K + posição) para o score final do nó.
+    """
+    by_source: Dict[str, List[Dict]] = {}
+    for record in records:
+        by_source.setdefault(record["source"], []).append(record)
+
+    fused: Dict[str, Dict] = {}
+    for source, items in by_source.items():
+        items.sort(key=lambda r: r["score"], reverse=True)
+        for rank, record in enumerate(items, start=1):
+            entry = fused.setdefault(record["element_id"], {**record, "score": 0.0, "sources": []})
+            entry["score"] += 1.0 / (RRF_K + rank)
+            if source not in entry["sources"]:
+                entry["sources"].append(source)
+
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:k]
+
+
+# Peso de cada tipo de relação na expansão de vizinhança do GraphRAG
+DEFAULT_RELATIONSHIP_WEIGHTS = {
+    "DOCUMENTED_IN": 0.9,
+    "USES": 0.9,
+    "LINKS_TO": 0.8,
+    "TAGGED": 0.5,
+    "SIMILAR_TO": 0.7,
+}
+MAX_EXPANSION_HOPS = 3
+# Nós intermediários com mais relações que isso (ex.: Tags compartilhadas com
+# as perguntas do StackOverflow) não são atravessados
+MAX_EXPANSION_HUB_DEGREE = 200
+
+# O comprimento do caminho não pode ser parâmetro em Cypher; o texto é gerado
+# uma vez por (tipos de relação, saltos) e reaproveitado pelo cache de planos.
+# O caminho só passa por MCP/RAG/ObsidianNote/Tag (Question/Answer ficam fora do
+# contexto) e cada nó alcançado conta uma vez (melhor caminho) em $per_seed.
+_EXPANSION_QUERY_TEMPLATE = """
+UNWIND $seeds AS seed
+MATCH (s) WHERE elementId(s) = seed.element_id
+CALL {{
+  WITH s, seed
+  RETURN s AS node, seed.score AS score, 0 AS hops
+  UNION
+  WITH s, seed
+  MATCH p = (s)-[:{rel_types}*1..{hops}]-(m:MCP|RAG|ObsidianNote|Tag)
+  WHERE m <> s
+    AND all(x IN nodes(p)[1..] WHERE x:MCP OR x:RAG OR x:ObsidianNote OR x:Tag)
+    AND all(x IN nodes(p)[1..-1] WHERE COUNT {{ (x)--() }} <= $max_hub_degree)
+  WITH m, seed, relationships(p) AS rels
+  WITH m, size(rels) AS hops,
+       reduce(w = seed.score, r IN rels |
+              w * coalesce($weights[type(r)], $default_weight) * coalesce(r.score, 1.0)) AS score
+  WITH m, max(score) AS score, min(hops) AS hops
+  ORDER BY score DESC
+  LIMIT $per_seed
+  RETURN m AS node, score, hops
+}}
+WITH node, max(score) AS score, min(hops) AS hops
+ORDER BY score DESC
+LIMIT $budget
+RETURN elementId(node) AS element_id, labels(node) AS labels,
+       coalesce(node.name, node.title, node.id) AS name,
+       left(coalesce(node.description, node.content, ''), $max_chars) AS text,
+       score, hops
+"""
+
+
+# Grava a nota e reconcilia TAGGED/LINKS_TO: remove só as arestas que saíram
+# da nota; as que continuam ficam como estão.
+NOTE_UPSERT_QUERY = """
+UNWIND $rows AS row
+MERGE (n:ObsidianNote {id: row.id})
+ON CREATE SET n.created_at = datetime()
+SET n.title = row.title,
+    n.content = row.content,
+    n.folder = row.folder,
+    n.path = row.path,
+    n.links = row.links,
+    n.content_hash = row.content_hash,
+    n.mtime = row.mtime,
+    n.embedding = row.embedding,
+    n.embedding_updated_at = datetime(),
+    n.updated_at = datetime()
+WITH n, row
+CALL {
+  WITH n, row
+  OPTIONAL MATCH (n)-[old:TAGGED]->(t:Tag) WHERE NOT t.name IN row.tags
+  DELETE old
+}
+CALL {
+  WITH n, row
+  OPTIONAL MATCH (n)-[old:LINKS_TO]->(m:ObsidianNote) WHERE NOT m.id IN row.links
+  DELETE old
+}
+FOREACH (tagName IN row.tags |
+    MERGE (t:Tag {name: tagName})
+    MERGE (n)-[:TAGGED]->(t)
+)
+"""
+
+NOTE_SYNC_STATE_BY_ROOT_QUERY = """
+MATCH (n:ObsidianNote) WHERE n.path STARTS WITH $root
+RETURN n.path AS path, n.content_hash AS content_hash, n.mtime AS mtime
+"""
+
+NOTE_SYNC_STATE_BY_PATHS_QUERY = """
+MATCH (n:ObsidianNote) WHERE n.path IN $paths
+RETURN n.path AS path, n.content_hash AS content_hash, n.mtime AS mtime
+"""
+
+NOTE_TOUCH_QUERY = """
+UNWIND $rows AS row
+MATCH (n:ObsidianNote {path: row.path})
+SET n.mtime = row.mtime
+"""
+
+NOTE_DELETE_QUERY = """
+MATCH (n:ObsidianNote) WHERE n.path IN $paths
+DETACH DELETE n
+RETURN count(*) AS removed
+"""
+
+# Notas já existentes que apontavam para notas que só agora foram criadas. Uma
+# varredura por lote; as notas regravadas ($changed) já tiveram seus links
+# gravados por NOTE_LINKS_QUERY.
+NOTE_BACKLINKS_QUERY = """
+MATCH (source:ObsidianNote)
+WHERE NOT source.id IN $changed AND any(link IN source.links WHERE link IN $ids)
+UNWIND [link IN source.links WHERE link IN $ids] AS id
+MATCH (target:ObsidianNote {id: id}) WHERE target <> source
+MERGE (source)-[:LINKS_TO]->(target)
+RETURN count(*) AS linked
+"""
+
+NOTE_LINKS_QUERY = """
+UNWIND $rows AS row
+MATCH (source:ObsidianNote {id: row.source})
+MATCH (target:ObsidianNote {id: row.target})
+MERGE (source)-[:LINKS_TO]->(target)
+RETURN count(*) AS linked
+"""
+
+# Upserts em lote: o embedding só é regravado quando a linha traz um novo
+# (descrição com hash diferente); created_at só é definido na criação.
+MCP_UPSERT_QUERY = """
+UNWIND $rows AS row
+MERGE (m:MCP {id: row.id})
+ON CREATE SET m.created_at = datetime()
+SET m.name = row.name,
+    m.command = row.command,
+    m.args = row.args,
+    m.description = row.description,
+    m.enabled = row.enabled,
+    m.description_hash = row.description_hash,
+    m.updated_at = datetime()
+FOREACH (_ IN CASE WHEN row.embedding IS NULL THEN [] ELSE [1] END |
+    SET m.embedding = row.embedding, m.embedding_updated_at = datetime()
+)
+RETURN row.id AS id
+"""
+
+RAG_UPSERT_QUERY = """
+UNWIND $rows AS row
+MERGE (r:RAG {id: row.id})
+ON CREATE SET r.created_at = datetime()
+SET r.name = row.name,
+    r.description = row.description,
+    r.model = row.model,
+    r.embedding_model = row.embedding_model,
+    r.vector_store = row.vector_store,
+    r.enabled = row.enabled,
+    r.description_hash = row.description_hash,
+    r.updated_at = datetime()
+FOREACH (_ IN CASE WHEN row.embedding IS NULL THEN [] ELSE [1] END |
+    SET r.embedding = row.embedding, r.embedding_updated_at = datetime()
+)
+RETURN row.id AS id
+"""
+
+# Hashes atuais, para decidir o que precisa de novo embedding
+DESCRIPTION_HASHES_QUERY_TEMPLATE = """
+UNWIND $ids AS id
+MATCH (n:{label} {{id: id}})
+RETURN n.id AS id, n.description_hash AS description_hash
+"""
+
+MCP_RAG_RELATION_QUERY_TEMPLATE = """
+MATCH (r:RAG {{id: $rag_id}})
+MATCH (m:MCP {{id: $mcp_id}})
+MERGE (r)-[:{relation_type}]->(m)
+RETURN r, m
+"""
+
+MCP_OBSIDIAN_RELATION_QUERY_TEMPLATE = """
+MATCH (m:MCP {{id: $mcp_id}})
+MATCH (n:ObsidianNote {{id: $note_id}})
+MERGE (m)-[:{relation_type}]->(n)
+RETURN m, n
+"""
+
+# Arestas SIMILAR_TO: os k vizinhos mais próximos de cada nó, buscados nos três
+# índices vetoriais. Só entram nós cujo embedding mudou desde a última ligação
+# (embedding_updated_at > similarity_linked_at), ou todos com $full. Embeddings
+# gravados depois de $run_at ficam para a próxima rodada: o nó é marcado com
+# $run_at e continuaria pendente.
+SIMILARITY_PENDING_QUERY = """
+MATCH (n:MCP|RAG|ObsidianNote)
+WHERE n.embedding IS NOT NULL
+  AND (n.embedding_updated_at IS NULL OR n.embedding_updated_at <= $run_at)
+  AND (n.similarity_linked_at IS NULL
+       OR n.embedding_updated_at > n.similarity_linked_at
+       OR ($full AND n.similarity_linked_at < $run_at))
+RETURN elementId(n) AS element_id
+"""
+
+# Cada índice devolve k + 1 candidatos (o próprio nó volta como o mais
+# próximo); vetores nulos (notas vazias) não são comparáveis e ficam de fora.
+_SIMILARITY_BRANCH = """
+  WITH n
+  CALL db.index.vector.queryNodes('{index}', $k + 1, n.embedding) YIELD node, score
+  RETURN node, score"""
+SIMILARITY_LINK_QUERY = (
+    """
+UNWIND $ids AS nodeId
+MATCH (n) WHERE elementId(n) = nodeId AND any(x IN n.embedding WHERE x <> 0.0)
+CALL {"""
+    + "\n  UNION ALL".join(_SIMILARITY_BRANCH.format(index=i) for i in VECTOR_INDEXES)
+    + """
+}
+WITH n, node, score
+WHERE node <> n AND score >= $threshold
+WITH n, node, score ORDER BY score DESC
+WITH n, collect({node: node, score: score})[..$k] AS neighbours
+UNWIND neighbours AS neighbour
+WITH n, neighbour.node AS m, neighbour.score AS score
+MERGE (n)-[r:SIMILAR_TO]-(m)
+SET r.score = score, r.linked_at = $run_at
+RETURN count(r) AS linked
+"""
+)
+
+# Vizinhos (não pendentes) ligados aos nós reprocessados por arestas anteriores
+# à rodada: a poda abaixo também remove as arestas que eram do top-k deles, então
+# eles são religados no mesmo lote.
+SIMILARITY_NEIGHBOURS_QUERY = """
+UNWIND $ids AS nodeId
+MATCH (n) WHERE elementId(n) = nodeId
+MATCH (n)-[r:SIMILAR_TO]-(m)
+WHERE (r.linked_at IS NULL OR r.linked_at < $run_at)
+  AND m.embedding IS NOT NULL AND NOT elementId(m) IN $ids
+RETURN DISTINCT elementId(m) AS element_id
+"""
+
+# Arestas anteriores à rodada em volta dos nós reprocessados têm score de um
+# embedding antigo; as criadas nesta rodada (inclusive por outros nós) ficam.
+SIMILARITY_PRUNE_QUERY = """
+UNWIND $ids AS nodeId
+MATCH (n) WHERE elementId(n) = nodeId
+OPTIONAL MATCH (n)-[r:SIMILAR_TO]-()
+WHERE r.linked_at IS NULL OR r.linked_at < $run_at
+DELETE r
+RETURN count(r) AS removed
+"""
+
+SIMILARITY_MARK_QUERY = """
+UNWIND $ids AS nodeId
+MATCH (n) WHERE elementId(n) = nodeId
+SET n.similarity_linked_at = $run_at
+"""
+
+
+def description_hash(description: str, embedding_model: str) -> str:
+    """Hash da descrição + modelo: muda quando é preciso gerar outro embedding."""
+    return hashlib.sha256(f"{embedding_model}\0{description}".encode("utf-8")).hexdigest()
+
+
+def mcp_node_params(mcp_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha do MCP_UPSERT_QUERY (sem hash e embedding)."""
+    mcp_id = mcp_info.get("id", mcp_info.get("name", ""))
+    args = mcp_info.get("args", [])
+    return {
+        "id": mcp_id,
+        "name": mcp_info.get("name", mcp_id),
+        "command": mcp_info.get("command") or "",
+        "args": args if isinstance(args, list) else [],
+        "description": mcp_info.get("description") or "",
+        "enabled": mcp_info.get("enabled", True),
+    }
+
+
+def rag_node_params(rag_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha do RAG_UPSERT_QUERY (sem hash e embedding)."""
+    rag_id = rag_info.get("id", rag_info.get("name", ""))
+    return {
+        "id": rag_id,
+        "name": rag_info.get("name", rag_id),
+        "description": rag_info.get("description") or "",
+        "model": rag_info.get("model", ""),
+        "embedding_model": rag_info.get("embedding_model", ""),
+        "vector_store": rag_info.get("vector_store", ""),
+        "enabled": rag_info.get("enabled", True),
+    }
+
+
+# Busca textual do search_graph. Um único texto de query (plano cacheado) com
+# um ramo por label; o filtro de labels é parâmetro e o `WITH ... WHERE` antes
+# de cada MATCH descarta o ramo inteiro quando o label não foi pedido, então
+# cada ramo só varre o próprio label. $labels nulo busca em todos os nós.
+_SEARCH_BRANCH = """
+  WITH $labels AS wanted WHERE wanted IS NULL OR '{label}' IN wanted
+  MATCH (n:{label})
+  WHERE {predicate}
+  RETURN n LIMIT $limit"""
+_SEARCH_TEXT_PREDICATE = "n.name CONTAINS $query OR n.description CONTAINS $query"
+SEARCH_LABELS = ("MCP", "RAG", "ObsidianNote")
+SEARCH_QUERY = (
+    "CALL {"
+    + "\n  UNION".join(
+        _SEARCH_BRANCH.format(
+            label=label,
+            predicate=_SEARCH_TEXT_PREDICATE + (" OR n.content CONTAINS $query" if label == "ObsidianNote" else "")
+        )
+        for label in SEARCH_LABELS
+    )
+    + """
+  UNION
+  WITH $labels AS wanted WHERE wanted IS NULL OR any(label IN wanted WHERE NOT label IN $search_labels)
+  MATCH (n)
+  WHERE NOT any(label IN labels(n) WHERE label IN $search_labels)
+    AND (wanted IS NULL OR any(label IN labels(n) WHERE label IN wanted))
+    AND (""" + _SEARCH_TEXT_PREDICATE + """)
+  RETURN n LIMIT $limit
+}
+RETURN n, labels(n) AS __label__
+LIMIT $limit
+"""
+)
+
+
+def search_params(query: str, node_types: Optional[List[str]] = None, limit: int = 10) -> Dict[str, Any]:
+    """Parâmetros do SEARCH_QUERY; `node_types` casa nós com qualquer um dos labels."""
+    return {
+        "query": query,
+        "labels": list(node_types) if node_types else None,
+        "search_labels": list(SEARCH_LABELS),
+        "limit": limit,
+    }
+
+
+def search_results_to_nodes(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Propriedades de cada nó + `__label__` com seus labels."""
+    return [{**(record.get("n") or {}), "__label__": record.get("__label__", [])} for record in results]
+
+
+NODE_LIST_QUERY_TEMPLATE = """
+MATCH (n:{label})
+RETURN n.id AS id, n.name AS name
+ORDER BY n.name
+"""
+
+# Uma ida ao servidor; todas as contagens saem do count store (sem varrer nós)
+GRAPH_STATISTICS_QUERY = """
+CALL { MATCH (m:MCP) RETURN count(m) AS MCP_count }
+CALL { MATCH (r:RAG) RETURN count(r) AS RAG_count }
+CALL { MATCH (n:ObsidianNote) RETURN count(n) AS ObsidianNote_count }
+CALL { MATCH (t:Tag) RETURN count(t) AS Tag_count }
+CALL { MATCH ()-[r]->() RETURN count(r) AS relation_count }
+RETURN MCP_count, RAG_count, ObsidianNote_count, Tag_count, relation_count
+"""
+
+GRAPH_STATISTICS_KEYS = ("MCP_count", "RAG_count", "ObsidianNote_count", "Tag_count", "relation_count")
+
+_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def neo4j_to_python(value: Any) -> Any:
+    """
+    Converte valores do driver para tipos Python, como `Record.data()`.
+    
+    Nós viram dict de propriedades, relacionamentos viram
+    (início, tipo, fim) e caminhos viram listas alternando nós e tipos.
+    Escalares (a grande maioria dos valores) passam direto.
+    """
+    value_type = type(value)
+    if value_type in _SCALAR_TYPES:
+        return value
+    if value_type is list:
+        return [neo4j_to_python(v) for v in value]
+    if value_type is dict:
+        return {k: neo4j_to_python(v) for k, v in value.items()}
+    if isinstance(value, Node):
+        return dict(value)
+    if isinstance(value, Relationship):
+        return (dict(value.start_node), value.type, dict(value.end_node))
+    if isinstance(value, GraphPath):
+        path = [dict(value.start_node)]
+        for relationship, node in zip(value.relationships, value.nodes[1:]):
+            path.append(relationship.type)
+            path.append(dict(node))
+        return path
+    return value
+
+
+def _rows_transformer(result) -> List[Dict[str, Any]]:
+    keys = result.keys()
+    return [dict(zip(keys, map(neo4j_to_python, record))) for record in result]
+
+
+def _columns_transformer(result) -> Dict[str, List[Any]]:
+    keys = result.keys()
+    columns = [[] for _ in keys]
+    for record in result:
+        for column, value in zip(columns, record):
+            column.append(neo4j_to_python(value))
+    return dict(zip(keys, columns))
+
+
+def requires_auto_commit(error: Neo4jError) -> bool:
+    """CALL {...} IN TRANSACTIONS só roda em transação implícita (auto-commit)."""
+    message = error.message or ""
+    return (
+        "in an implicit transaction" in message
+        or "in an open transaction is not possible" in message
+        or "tried to execute in an explicit transaction" in message
+    )
+
+
+_TAG_PATTERN = re.compile(r'#(\w+)')
+_LINK_PATTERN = re.compile(r'\[\[([^\]]+)\]\]')
+
+
+def normalize_note_link(link: str) -> str:
+    """[[pasta/Nota#Seção|apelido]] -> Nota (o id das notas é o nome do arquivo)."""
+    target = link.split("|", 1)[0].split("#", 1)[0].split("^", 1)[0].strip()
+    target = target.replace("\\", "/").rsplit("/", 1)[-1]
+    return target[:-3] if target.lower().endswith(".md") else target
+
+
+def parse_obsidian_note(note_path: Path, content: str, mtime: Optional[float] = None) -> Dict[str, Any]:
+    """Extrai id, metadados, tags (#tag), links ([[link]]) e hash de uma nota."""
+    links = []
+    for link in _LINK_PATTERN.findall(content):
+        target = normalize_note_link(link)
+        if target and target not in links:
+            links.append(target)
+    return {
+        "id": note_path.stem,
+        "title": note_path.stem,
+        "folder": note_path.parent.name if note_path.parent.name else "root",
+        "path": str(note_path),
+        "content": content,
+        "tags": list(dict.fromkeys(_TAG_PATTERN.findall(content))),
+        "links": links,
+        "content_hash": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        "mtime": mtime,
+    }
+
+
+def load_obsidian_note(note_path: str) -> Optional[Dict[str, Any]]:
+    """Lê e analisa uma nota; em nível de módulo para rodar em processos filhos."""
+    path = Path(note_path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return parse_obsidian_note(path, f.read(), path.stat().st_mtime)
+    except Exception as e:
+        logger.error(f"Erro ao ler nota {path}: {e}")
+        return None
+
+
+# Abaixo disso o custo de subir os processos supera o ganho
+PARALLEL_PARSE_MIN_FILES = 500
+
+
+def parse_obsidian_files(files: List[Path], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Analisa notas em paralelo num pool de processos, preservando a ordem.
+    
+    Args:
+        files: Arquivos .md
+        workers: Processos (None = os.cpu_count(), 0/1 = sem paralelismo)
+    """
+    paths = [str(f) for f in files]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(paths) < PARALLEL_PARSE_MIN_FILES:
+        notes = map(load_obsidian_note, paths)
+        return [note for note in notes if note]
+    chunksize = max(1, min(256, len(paths) // (workers * 8)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [note for note in pool.map(load_obsidian_note, paths, chunksize=chunksize) if note]
+
+
+def _batches(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
 def add_messages(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
-    """Adiciona mensagens ao estado."""
+    """
+    Adiciona mensagens ao estado.
+    
+    O estado só carrega as mensagens do turno atual (o histórico da conversa
+    vem em `history`, já limitado pela sessão), então a concatenação é sempre
+    de listas curtas; sem mensagens novas a lista atual é devolvida sem cópia.
+    """
+    if not right:
+        return left
+    if not left:
+        return right
     return left + right
 
 
+def merge_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    """Junta as latências registradas por cada nó."""
+    return {**(left or {}), **(right or {})}
+
+
 class GraphState(TypedDict):
     """Estado do grafo para GraphRAG."""
     messages: Annotated[List[BaseMessage], add_messages]
     context: str
     question: str
+    history: List[BaseMessage]
+    timings: Annotated[Dict[str, float], merge_timings]
+
+
+GRAPHRAG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Você é um assistente especializado em analisar grafos de conhecimento.
+Use o contexto fornecido do grafo Neo4j para responder à pergunta.
+Se o contexto não contiver informações suficientes, diga que não tem informações suficientes.
+
+Contexto do grafo:
+{context}"""),
+    MessagesPlaceholder("history", optional=True),
+    ("human", "{question}")
+])
+
+GRAPHRAG_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Atualize o resumo de uma conversa sobre um grafo de conhecimento.
+Mantenha entidades, nomes de nós e conclusões citados; descarte cumprimentos e repetições.
+Responda só com o resumo, em poucas frases.
+
+Resumo atual:
+{summary}"""),
+    MessagesPlaceholder("messages"),
+    ("human", "Escreva o resumo atualizado incluindo as mensagens acima.")
+])
+
+# Quantas execuções recentes do GraphRAG entram no resumo de latências
+GRAPHRAG_TIMINGS_WINDOW = int(os.getenv("GRAPHRAG_TIMINGS_WINDOW", "200"))
+
+
+def _emit_graphrag_event(config: Optional[RunnableConfig], event: Dict[str, Any]) -> None:
+    """Entrega um evento ao consumidor do streaming, se houver um na config da execução."""
+    emit = ((config or {}).get("configurable") or {}).get("graphrag_emit")
+    if emit:
+        emit(event)
 
 
 class Neo4jGraphRAGManager:
@@ -72,6 +687,32 @@ class Neo4jGraphRAGManager:
         
         # Configurações adicionais
         self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        # "hybrid" (só nós encontrados) ou "expand" (nós + vizinhança no grafo)
+        self.retrieval_mode = os.getenv("GRAPHRAG_RETRIEVAL_MODE", "hybrid")
+        self.relationship_weights = dict(DEFAULT_RELATIONSHIP_WEIGHTS)
+        # "neo4j" (índices vetoriais do banco) ou "local" (índice IVF em processo)
+        self.vector_backend = os.getenv("GRAPHRAG_VECTOR_BACKEND", "neo4j")
+        
+        # Cache de expansões por conjunto de sementes
+        self.expansion_cache_size = 256
+        self.expansion_cache_ttl = 300.0
+        self._expansion_cache: "OrderedDict[Tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._expansion_cache_lock = threading.Lock()
+        
+        # Sessões de visualização paginada (estado da BFS por cursor)
+        self.subgraph_pager = SubgraphPager(self)
+        
+        # Snapshot das estatísticas do grafo (lido por dashboards e monitores)
+        self.statistics_ttl = float(os.getenv("GRAPH_STATS_TTL", "30"))
+        self._statistics: Optional[Dict[str, int]] = None
+        self._statistics_at = 0.0
+        self._statistics_lock = threading.Lock()
+        self._statistics_refresh_lock = threading.Lock()
+        self._statistics_refresher: Optional[threading.Thread] = None
+        self._statistics_stop = threading.Event()
+        
+        # Réplica de leitura em memória (opcional, ver start_graph_mirror)
+        self.graph_mirror: Optional[GraphMirror] = None
         
         # Conecta ao Neo4j
         try:
@@ -88,12 +729,12 @@ class Neo4jGraphRAGManager:
         
         # Carrega modelos
         try:
-            self.llm = load_llm(
+            self.llm = get_llm(
                 self.llm_name,
                 logger=logger,
                 config={"ollama_base_url": self.ollama_base_url}
             )
-            self.embeddings, self.embedding_dimension = load_embedding_model(
+            self.embeddings, self.embedding_dimension = get_embedding_model(
                 self.embedding_model_name,
                 logger=logger,
                 config={"ollama_base_url": self.ollama_base_url}
@@ -103,46 +744,30 @@ class Neo4jGraphRAGManager:
             logger.error(f"Erro ao carregar modelos: {e}")
             raise
         
-        # Cria índices e constraints
-        self._create_constraints()
-        self._create_indexes()
+        # Aplica migrações pendentes e confere os índices vetoriais (sem DDL se o schema estiver em dia)
+        try:
+            ensure_schema(self.graph, self.embedding_model_name, self.embedding_dimension, logger=logger)
+        except SchemaMigrationError as e:
+            logger.error(f"Erro ao atualizar schema do Neo4j: {e}")
+            raise
         
         # Inicializa GraphRAG chain
         self.graphrag_chain = None
+        self.answer_chain = None
+        self.summary_chain = None
+        self.graphrag_timings = deque(maxlen=GRAPHRAG_TIMINGS_WINDOW)
+        self.graphrag_sessions = GraphRAGSessionStore()
+        # Resumos de histórico rodam aqui, fora do caminho da resposta
+        self._graphrag_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="graphrag-summary")
         self._build_graphrag_chain()
     
-    def _create_constraints(self) -> None:
-        """Cria constraints no Neo4j."""
-        constraints = [
-            "CREATE CONSTRAINT mcp_id IF NOT EXISTS FOR (m:MCP) REQUIRE (m.id) IS UNIQUE",
-            "CREATE CONSTRAINT rag_id IF NOT EXISTS FOR (r:RAG) REQUIRE (r.id) IS UNIQUE",
-            "CREATE CONSTRAINT obsidian_note_id IF NOT EXISTS FOR (n:ObsidianNote) REQUIRE (n.id) IS UNIQUE",
-            "CREATE CONSTRAINT tag_name IF NOT EXISTS FOR (t:Tag) REQUIRE (t.name) IS UNIQUE",
-        ]
-        
-        for constraint in constraints:
-            try:
-                self.graph.query(constraint)
-            except Exception as e:
-                logger.debug(f"Constraint já existe ou erro: {e}")
-    
-    def _create_indexes(self) -> None:
-        """Cria índices no Neo4j."""
-        indexes = [
-            f"CREATE VECTOR INDEX mcp_embedding IF NOT EXISTS FOR (m:MCP) ON m.embedding OPTIONS {{indexConfig: {{`vector.dimensions`: {self.embedding_dimension}, `vector.similarity_function`: 'cosine'}}}}",
-            f"CREATE VECTOR INDEX rag_embedding IF NOT EXISTS FOR (r:RAG) ON r.embedding OPTIONS {{indexConfig: {{`vector.dimensions`: {self.embedding_dimension}, `vector.similarity_function`: 'cosine'}}}}",
-            f"CREATE VECTOR INDEX obsidian_embedding IF NOT EXISTS FOR (n:ObsidianNote) ON n.embedding OPTIONS {{indexConfig: {{`vector.dimensions`: {self.embedding_dimension}, `vector.similarity_function`: 'cosine'}}}}",
-        ]
-        
-        for index in indexes:
-            try:
-                self.graph.query(index)
-            except Exception as e:
-                logger.debug(f"Índice já existe ou erro: {e}")
-    
     def _build_graphrag_chain(self) -> None:
         """Constrói a chain de GraphRAG usando LangGraph."""
         try:
+            # Chain de resposta montada uma única vez e reaproveitada em todas as consultas
+            self.answer_chain = GRAPHRAG_PROMPT | self.llm | StrOutputParser()
+            self.summary_chain = GRAPHRAG_SUMMARY_PROMPT | self.llm | StrOutputParser()
+            
             # Cria o grafo LangGraph
             workflow = StateGraph(GraphState)
             
@@ -162,119 +787,454 @@ class Neo4jGraphRAGManager:
             logger.error(f"Erro ao construir GraphRAG chain: {e}")
             self.graphrag_chain = None
     
-    def _retrieve_context(self, state: GraphState) -> GraphState:
+    def hybrid_search(
+        self,
+        question: str,
+        k: int = 5,
+        embedding: Optional[List[float]] = None,
+        max_chars: int = 500
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca híbrida: índices vetoriais + índice full-text, fundidos por RRF.
+        
+        Args:
+            question: Pergunta ou texto de busca
+            k: Número de nós retornados
+            embedding: Embedding já calculado da pergunta (opcional)
+            max_chars: Tamanho máximo do texto retornado por nó
+            
+        Returns:
+            Nós ordenados por score fundido
+        """
+        if embedding is None:
+            embedding = self.embeddings.embed_query(question)
+        text = lucene_query(question)
+        params = {
+            "embedding": embedding,
+            "text": text,
+            # busca mais candidatos por fonte para a fusão ter onde escolher
+            "k": k * 2,
+            "max_chars": max_chars,
+        }
+        local = self.local_vector_index if self.vector_backend == "local" else None
+        try:
+            if local is not None:
+                records = local.search(embedding, k * 2)
+                if text:
+                    records += self.graph.query(HYBRID_FULLTEXT_QUERY, params)
+            else:
+                records = self.graph.query(HYBRID_QUERY if text else HYBRID_VECTOR_QUERY, params)
+        except Exception as e:
+            # Neo4j fora do ar: o índice local (se houver) ainda responde a parte vetorial
+            local = self.local_vector_index
+            if local is None:
+                raise
+            logger.warning(f"Busca no Neo4j falhou, usando índice vetorial local: {e}")
+            records = local.search(embedding, k * 2)
+        return fuse_ranked_results(records, k)
+    
+    @property
+    def local_vector_index(self) -> Optional[LocalVectorIndex]:
+        """Índice local (carregado sob demanda), se existir e for do mesmo modelo de embedding."""
+        index = get_local_vector_index()
+        if index is None:
+            return None
+        if index.embedding_model != self.embedding_model_name or index.dimension != self.embedding_dimension:
+            logger.debug(
+                f"Índice vetorial local ignorado: {index.embedding_model}/{index.dimension} != "
+                f"{self.embedding_model_name}/{self.embedding_dimension}"
+            )
+            return None
+        return index
+    
+    def build_local_vector_index(
+        self,
+        path: Optional[Path] = None,
+        nlist: Optional[int] = None,
+        max_chars: int = 500,
+        fetch_size: int = 2000
+    ) -> Dict[str, Any]:
+        """
+        Reconstrói o índice vetorial local a partir dos embeddings do grafo.
+        
+        Os nós são lidos em streaming; o índice é gravado em `path` (padrão:
+        LOCAL_VECTOR_INDEX_PATH) e passa a servir as buscas deste processo.
+        
+        Args:
+            path: Diretório do índice
+            nlist: Listas do IVF (padrão: ~sqrt(N))
+            max_chars: Texto guardado por nó (para montar contexto sem Neo4j)
+            fetch_size: Records por lote lido do servidor
+            
+        Returns:
+            count, nlist, path e seconds
+        """
+        path = Path(path) if path else default_index_path()
+        start = time.perf_counter()
+        index = LocalVectorIndex.build(
+            self.iter_query(LOCAL_INDEX_NODES_QUERY, {"max_chars": max_chars}, fetch_size=fetch_size),
+            embedding_model=self.embedding_model_name,
+            nlist=nlist,
+        )
+        index.save(path)
+        set_local_vector_index(LocalVectorIndex.load(path), path)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Índice vetorial local: {len(index)} vetores, {index.nlist} listas em {elapsed:.1f}s ({path})")
+        return {"count": len(index), "nlist": index.nlist, "path": str(path), "seconds": round(elapsed, 3)}
+    
+    def expand_neighbourhood(
+        self,
+        seeds: List[Dict[str, Any]],
+        max_hops: int = 2,
+        node_budget: int = 25,
+        per_seed: int = 50,
+        max_chars: int = 500,
+        max_hub_degree: int = MAX_EXPANSION_HUB_DEGREE
+    ) -> List[Dict[str, Any]]:
+        """
+        Expande a vizinhança de k saltos das sementes em uma única query.
+        
+        O score de cada nó alcançado é o score da semente multiplicado pelo
+        peso de cada relação do caminho (`relationship_weights`); vale o melhor
+        caminho. O resultado é cacheado por conjunto de sementes.
+        
+        Args:
+            seeds: Nós semente com `element_id` e `score` (ex.: de hybrid_search)
+            max_hops: Número máximo de saltos (1 a MAX_EXPANSION_HOPS)
+            node_budget: Número máximo de nós retornados (sementes incluídas)
+            per_seed: Número máximo de vizinhos considerados por semente
+            max_chars: Tamanho máximo do texto retornado por nó
+            max_hub_degree: Grau máximo de um nó intermediário do caminho
+            
+        Returns:
+            Nós ordenados por score, com o número de saltos até a semente
+        """
+        if not seeds:
+            return []
+        max_hops = max(1, min(int(max_hops), MAX_EXPANSION_HOPS))
+        key = (
+            tuple(sorted(s["element_id"] for s in seeds)), max_hops, node_budget, per_seed, max_chars, max_hub_degree
+        )
+        
+        now = time.monotonic()
+        with self._expansion_cache_lock:
+            cached = self._expansion_cache.get(key)
+            if cached and now - cached[0] < self.expansion_cache_ttl:
+                self._expansion_cache.move_to_end(key)
+                return cached[1]
+        
+        weights = self.relationship_weights
+        query = _EXPANSION_QUERY_TEMPLATE.format(
+            rel_types="|".join(sorted(weights)), hops=max_hops
+        )
+        results = self.graph.query(query, {
+            "seeds": [{"element_id": s["element_id"], "score": float(s["score"])} for s in seeds],
+            "weights": weights,
+            "default_weight": min(weights.values()) if weights else 0.5,
+            "per_seed": per_seed,
+            "max_hub_degree": max_hub_degree,
+            "budget": node_budget,
+            "max_chars": max_chars,
+        })
+        
+        with self._expansion_cache_lock:
+            self._expansion_cache[key] = (now, results)
+            self._expansion_cache.move_to_end(key)
+            while len(self._expansion_cache) > self.expansion_cache_size:
+                self._expansion_cache.popitem(last=False)
+        return results
+    
+    def clear_expansion_cache(self) -> None:
+        """Descarta as expansões cacheadas (ex.: após importações grandes)."""
+        with self._expansion_cache_lock:
+            self._expansion_cache.clear()
+    
+    def notify_graph_changed(self) -> None:
+        """Invalida o que é derivado do grafo depois de uma escrita (expansões e réplica)."""
+        self.clear_expansion_cache()
+        if self.graph_mirror is not None:
+            self.graph_mirror.request_refresh()
+    
+    def _retrieve_context(self, state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
         """Recupera contexto do grafo Neo4j."""
         question = state["question"]
+        session: Optional[GraphRAGSession] = ((config or {}).get("configurable") or {}).get("graphrag_session")
+        start = time.perf_counter()
+        _emit_graphrag_event(config, {"type": "node_start", "node": "retrieve"})
         
-        # Busca no grafo usando Cypher
-        query = """
-        MATCH (n)
-        WHERE n.description CONTAINS $query 
-           OR n.name CONTAINS $query
-           OR (n:ObsidianNote AND n.content CONTAINS $query)
-        WITH n, 
-             CASE 
-               WHEN n.description CONTAINS $query THEN 1.0
-               WHEN n.name CONTAINS $query THEN 0.8
-               ELSE 0.5
-             END AS score
-        RETURN n, score
-        ORDER BY score DESC
-        LIMIT 5
-        """
+        # Em uma sessão, a busca leva junto a pergunta anterior (continuações como
+        # "e quais dependem dele?" não têm os nomes) e buscas parecidas com as
+        # anteriores reaproveitam o contexto já recuperado
+        embedding = None
+        search_text = question
+        if session is not None:
+            search_text = session.retrieval_query(question)
+            try:
+                embedding = self.embeddings.embed_query(search_text)
+                context = session.cached_context(embedding)
+            except Exception as e:
+                logger.warning(f"Erro ao consultar contexto da sessão: {e}")
+                context = None
+            if context is not None:
+                elapsed = time.perf_counter() - start
+                _emit_graphrag_event(config, {
+                    "type": "node_end",
+                    "node": "retrieve",
+                    "seconds": elapsed,
+                    "cached": True
+                })
+                return {
+                    "context": context,
+                    "timings": {"retrieve": elapsed}
+                }
         
         try:
-            results = self.graph.query(query, {"query": question})
+            results = self.hybrid_search(search_text, k=5, embedding=embedding)
+            if self.retrieval_mode == "expand":
+                results = self.expand_neighbourhood(results)
             context_parts = []
             
             for record in results:
-                node = record.get("n")
-                if node:
-                    # Converte Node do Neo4j para dicionário
-                    node_dict = dict(node)
-                    node_type = list(node.labels)[0] if hasattr(node, 'labels') and node.labels else "Unknown"
-                    name = node_dict.get("name", node_dict.get("id", "Unknown"))
-                    description = node_dict.get("description", node_dict.get("content", ""))
-                    
-                    context_parts.append(
-                        f"{node_type}: {name}\n{description[:500] if description else 'Sem descrição'}"
-                    )
+                node_type = record["labels"][0] if record.get("labels") else "Unknown"
+                description = record.get("text")
+                context_parts.append(
+                    f"{node_type}: {record.get('name') or 'Unknown'}\n{description if description else 'Sem descrição'}"
+                )
             
             context = "\n\n".join(context_parts) if context_parts else "Nenhum contexto encontrado"
-            
-            return {
-                **state,
-                "context": context
-            }
+            if session is not None:
+                # O contexto do turno anterior continua valendo para a continuação
+                retrieved = context if context_parts else ""
+                context = session.with_previous_context(retrieved) or context
+                if embedding is not None and context_parts:
+                    session.remember_context(embedding, retrieved)
         except Exception as e:
             logger.error(f"Erro ao recuperar contexto: {e}")
-            return {
-                **state,
-                "context": "Erro ao recuperar contexto"
-            }
-    
-    def _generate_answer(self, state: GraphState) -> GraphState:
-        """Gera resposta usando LLM."""
-        question = state["question"]
-        context = state.get("context", "")
+            results = []
+            context = "Erro ao recuperar contexto"
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Você é um assistente especializado em analisar grafos de conhecimento.
-Use o contexto fornecido do grafo Neo4j para responder à pergunta.
-Se o contexto não contiver informações suficientes, diga que não tem informações suficientes.
-
-Contexto do grafo:
-{context}"""),
-            ("human", "{question}")
-        ])
+        elapsed = time.perf_counter() - start
+        _emit_graphrag_event(config, {
+            "type": "node_end",
+            "node": "retrieve",
+            "seconds": elapsed,
+            "results": len(results),
+            "cached": False
+        })
+        return {
+            "context": context,
+            "timings": {"retrieve": elapsed}
+        }
+    
+    def _generate_answer(self, state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """Gera resposta usando LLM, repassando os tokens ao consumidor à medida que chegam."""
+        start = time.perf_counter()
+        first_token = None
+        parts = []
+        _emit_graphrag_event(config, {"type": "node_start", "node": "generate"})
         
         try:
-            chain = prompt | self.llm | StrOutputParser()
-            answer = chain.invoke({"context": context, "question": question})
-            
-            return {
-                **state,
-                "messages": state["messages"] + [AIMessage(content=answer)]
-            }
+            for token in self.answer_chain.stream({
+                "context": state.get("context", ""),
+                "question": state["question"],
+                "history": state.get("history") or []
+            }):
+                if not token:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                parts.append(token)
+                _emit_graphrag_event(config, {"type": "token", "content": token})
+            answer = "".join(parts)
         except Exception as e:
             logger.error(f"Erro ao gerar resposta: {e}")
-            return {
-                **state,
-                "messages": state["messages"] + [AIMessage(content="Erro ao gerar resposta.")]
-            }
+            answer = "Erro ao gerar resposta."
+        
+        elapsed = time.perf_counter() - start
+        timings = {"generate": elapsed}
+        if first_token is not None:
+            timings["first_token"] = first_token
+        _emit_graphrag_event(config, {"type": "node_end", "node": "generate", "seconds": elapsed, "first_token_seconds": first_token})
+        return {
+            "messages": [AIMessage(content=answer)],
+            "timings": timings
+        }
     
-    def query_graphrag(self, question: str) -> str:
+    def run_graphrag(self, question: str, on_event=None, session_id: Optional[str] = None) -> Dict[str, Any]:
         """
-        Consulta o grafo usando GraphRAG.
+        Executa o pipeline GraphRAG (retrieve → generate) medindo cada nó.
         
         Args:
             question: Pergunta a ser respondida
+            on_event: Callback opcional que recebe os eventos estruturados
+                (node_start, node_end, token) durante a execução
+            session_id: Sessão de conversa; com ela a resposta considera o
+                histórico (resumido) e reaproveita o contexto já recuperado.
+                Um id desconhecido cria uma sessão nova com esse id
             
         Returns:
-            Resposta gerada
+            Dicionário com answer, timings (segundos por etapa), error e,
+            em sessões, session_id
         """
         if not self.graphrag_chain:
-            return "GraphRAG chain não está disponível"
+            return {"answer": "GraphRAG chain não está disponível", "timings": {}, "error": "unavailable"}
         
+        if session_id is None:
+            return self._run_graphrag_turn(question, on_event, None)
+        
+        session, _ = self.graphrag_sessions.get(session_id)
+        with session.lock:
+            result = self._run_graphrag_turn(question, on_event, session)
+        result["session_id"] = session.session_id
+        return result
+    
+    def _run_graphrag_turn(
+        self,
+        question: str,
+        on_event,
+        session: Optional[GraphRAGSession]
+    ) -> Dict[str, Any]:
+        """Um turno do GraphRAG; com sessão, registra o turno no histórico dela."""
+        start = time.perf_counter()
         try:
             initial_state = {
                 "messages": [HumanMessage(content=question)],
                 "context": "",
-                "question": question
+                "question": question,
+                "history": session.prompt_history() if session else [],
+                "timings": {}
             }
-            
-            result = self.graphrag_chain.invoke(initial_state)
-            
-            # Extrai a resposta das mensagens
-            if result.get("messages"):
-                last_message = result["messages"][-1]
-                if isinstance(last_message, AIMessage):
-                    return last_message.content
-            
-            return "Não foi possível gerar uma resposta"
+            configurable = {}
+            if on_event:
+                configurable["graphrag_emit"] = on_event
+            if session is not None:
+                configurable["graphrag_session"] = session
+            config = {"configurable": configurable} if configurable else None
+            result = self.graphrag_chain.invoke(initial_state, config=config)
         except Exception as e:
             logger.error(f"Erro ao consultar GraphRAG: {e}")
-            return f"Erro: {str(e)}"
+            return {"answer": f"Erro: {str(e)}", "timings": {}, "error": str(e)}
+        
+        # Extrai a resposta das mensagens
+        answer = "Não foi possível gerar uma resposta"
+        if result.get("messages"):
+            last_message = result["messages"][-1]
+            if isinstance(last_message, AIMessage):
+                answer = last_message.content
+        
+        timings = dict(result.get("timings") or {})
+        if session is not None and session.record_turn(question, answer):
+            self._graphrag_summary_executor.submit(self._summarize_session, session)
+        timings["total"] = time.perf_counter() - start
+        self.graphrag_timings.append(timings)
+        logger.info(
+            "GraphRAG: " + ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items())
+        )
+        return {"answer": answer, "timings": timings, "error": None}
+    
+    def _summarize_session(self, session: GraphRAGSession) -> None:
+        """Atualiza o resumo da sessão em segundo plano (não atrasa o evento done)."""
+        start = time.perf_counter()
+        try:
+            if session.summarize_pending(self._summarize_history):
+                self.graphrag_timings.append({"summarize": time.perf_counter() - start})
+        except Exception as e:
+            logger.warning(f"Erro ao resumir sessão do GraphRAG: {e}")
+    
+    def _summarize_history(self, summary: str, messages: List[BaseMessage]) -> str:
+        """Condensa mensagens que saem do histórico no resumo da sessão."""
+        try:
+            return self.summary_chain.invoke({"summary": summary or "(vazio)", "messages": messages}).strip()
+        except Exception as e:
+            logger.warning(f"Erro ao resumir histórico do GraphRAG: {e}")
+            # Sem LLM, guarda ao menos as perguntas feitas
+            questions = [m.content for m in messages if isinstance(m, HumanMessage)]
+            return "\n".join(filter(None, [summary, *(f"- {q}" for q in questions)]))
+    
+    def query_graphrag(self, question: str, session_id: Optional[str] = None) -> str:
+        """
+        Consulta o grafo usando GraphRAG.
+        
+        Args:
+            question: Pergunta a ser respondida
+            session_id: Sessão de conversa opcional (ver run_graphrag)
+            
+        Returns:
+            Resposta gerada
+        """
+        return self.run_graphrag(question, session_id=session_id)["answer"]
+    
+    def stream_graphrag(self, question: str, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Consulta o grafo usando GraphRAG, produzindo eventos conforme o pipeline avança.
+        
+        Os eventos são dicionários com "type": node_start/node_end (com "node" e,
+        ao fim, "seconds"), token (com "content") e, por último, done (com
+        "answer", "timings" e "error"). O pipeline roda em uma thread e os
+        eventos chegam por uma fila, então os primeiros tokens aparecem assim
+        que o LLM os produz.
+        
+        Args:
+            question: Pergunta a ser respondida
+            session_id: Sessão de conversa opcional (ver run_graphrag)
+            
+        Yields:
+            Eventos estruturados da execução
+        """
+        events = Queue()
+        job_done = object()
+        
+        def task():
+            try:
+                result = self.run_graphrag(question, on_event=events.put, session_id=session_id)
+                events.put({"type": "done", **result})
+            finally:
+                events.put(job_done)
+        
+        worker = threading.Thread(target=task, daemon=True)
+        worker.start()
+        while True:
+            event = events.get()
+            if event is job_done:
+                break
+            yield event
+        worker.join()
+    
+    def start_graphrag_session(self) -> str:
+        """Cria uma sessão de conversa do GraphRAG e retorna o id dela."""
+        session, _ = self.graphrag_sessions.get()
+        return session.session_id
+    
+    def end_graphrag_session(self, session_id: str) -> bool:
+        """Descarta o histórico e o contexto cacheado de uma sessão."""
+        return self.graphrag_sessions.end(session_id)
+    
+    def graphrag_session_stats(self, session_id: str) -> Optional[Dict[str, int]]:
+        """Turnos, tamanho do histórico e aproveitamento do cache de contexto da sessão."""
+        session = self.graphrag_sessions.peek(session_id)
+        return session.stats() if session else None
+    
+    def graphrag_timing_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Resume as latências das execuções recentes do GraphRAG por etapa.
+        
+        Returns:
+            Para cada etapa (retrieve, first_token, generate, total): count, p50 e p95 em segundos
+        """
+        samples: Dict[str, List[float]] = {}
+        for timings in list(self.graphrag_timings):
+            for name, seconds in timings.items():
+                samples.setdefault(name, []).append(seconds)
+        
+        summary = {}
+        for name, values in samples.items():
+            values.sort()
+            summary[name] = {
+                "count": len(values),
+                "p50": values[len(values) // 2],
+                "p95": values[max(int(len(values) * 0.95) - 1, 0)]
+            }
+        return summary
     
     def create_mcp_node(self, mcp_info: Dict[str, Any]) -> bool:
         """
@@ -286,54 +1246,7 @@ Contexto do grafo:
         Returns:
             True se criado com sucesso
         """
-        try:
-            # Gera embedding para descrição
-            description = mcp_info.get("description", "")
-            if description:
-                embedding = self.embeddings.embed_query(description)
-            else:
-                embedding = [0.0] * self.embedding_dimension
-            
-            # Prepara dados
-            mcp_id = mcp_info.get("id", mcp_info.get("name", ""))
-            name = mcp_info.get("name", mcp_id)
-            command = mcp_info.get("command", "")
-            args = mcp_info.get("args", [])
-            enabled = mcp_info.get("enabled", True)
-            
-            query = """
-            MERGE (m:MCP {id: $id})
-            SET m.name = $name,
-                m.command = $command,
-                m.args = $args,
-                m.description = $description,
-                m.enabled = $enabled,
-                m.embedding = $embedding,
-                m.created_at = datetime()
-            RETURN m
-            """
-            
-            # Converte lista de args para string se necessário
-            if isinstance(args, list):
-                args = args
-            else:
-                args = []
-            
-            self.graph.query(query, {
-                "id": mcp_id,
-                "name": name,
-                "command": command,
-                "args": args,
-                "description": description,
-                "enabled": enabled,
-                "embedding": embedding
-            })
-            
-            logger.info(f"Nó MCP '{name}' criado com sucesso")
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao criar nó MCP: {e}")
-            return False
+        return self.upsert_mcp_nodes([mcp_info])[0]["success"]
     
     def create_rag_node(self, rag_info: Dict[str, Any]) -> bool:
         """
@@ -345,51 +1258,83 @@ Contexto do grafo:
         Returns:
             True se criado com sucesso
         """
-        try:
-            # Gera embedding para descrição
-            description = rag_info.get("description", "")
-            if description:
-                embedding = self.embeddings.embed_query(description)
-            else:
-                embedding = [0.0] * self.embedding_dimension
-            
-            # Prepara dados
-            rag_id = rag_info.get("id", rag_info.get("name", ""))
-            name = rag_info.get("name", rag_id)
-            model = rag_info.get("model", "")
-            embedding_model = rag_info.get("embedding_model", "")
-            vector_store = rag_info.get("vector_store", "")
-            enabled = rag_info.get("enabled", True)
-            
-            query = """
-            MERGE (r:RAG {id: $id})
-            SET r.name = $name,
-                r.description = $description,
-                r.model = $model,
-                r.embedding_model = $embedding_model,
-                r.vector_store = $vector_store,
-                r.enabled = $enabled,
-                r.embedding = $embedding,
-                r.created_at = datetime()
-            RETURN r
-            """
-            
-            self.graph.query(query, {
-                "id": rag_id,
-                "name": name,
-                "description": description,
-                "model": model,
-                "embedding_model": embedding_model,
-                "vector_store": vector_store,
-                "enabled": enabled,
-                "embedding": embedding
-            })
+        return self.upsert_rag_nodes([rag_info])[0]["success"]
+    
+    def upsert_mcp_nodes(self, mcp_infos: List[Dict[str, Any]], batch_size: int = 500) -> List[Dict[str, Any]]:
+        """
+        Cria ou atualiza vários nós MCP de uma vez.
+        
+        Lê os hashes das descrições existentes numa query, gera embeddings
+        num único lote só para descrições novas ou alteradas e grava tudo com
+        UNWIND.
+        
+        Args:
+            mcp_infos: Informações dos MCPs (mesmo formato do create_mcp_node)
+            batch_size: Nós por query
             
-            logger.info(f"Nó RAG '{name}' criado com sucesso")
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao criar nó RAG: {e}")
-            return False
+        Returns:
+            Um resultado por item, na mesma ordem: id, success, status
+            (created/updated) e embedded; itens com falha trazem error
+        """
+        return self._upsert_nodes("MCP", MCP_UPSERT_QUERY, [mcp_node_params(i) for i in mcp_infos], batch_size)
+    
+    def upsert_rag_nodes(self, rag_infos: List[Dict[str, Any]], batch_size: int = 500) -> List[Dict[str, Any]]:
+        """Como upsert_mcp_nodes, para nós RAG."""
+        return self._upsert_nodes("RAG", RAG_UPSERT_QUERY, [rag_node_params(i) for i in rag_infos], batch_size)
+    
+    def _upsert_nodes(
+        self,
+        label: str,
+        upsert_query: str,
+        rows: List[Dict[str, Any]],
+        batch_size: int
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = [{"id": row["id"], "success": False} for row in rows]
+        valid = []
+        for i, row in enumerate(rows):
+            if row["id"]:
+                valid.append(i)
+            else:
+                results[i]["error"] = "id/name ausente"
+        
+        for chunk in _batches(valid, batch_size):
+            chunk_rows = [rows[i] for i in chunk]
+            try:
+                # graph.query levanta o erro: uma leitura que falha marca o lote
+                # como falho em vez de tratar tudo como novo e regerar embeddings
+                known = {
+                    r["id"]: r["description_hash"]
+                    for r in self.graph.query(
+                        DESCRIPTION_HASHES_QUERY_TEMPLATE.format(label=label),
+                        {"ids": [row["id"] for row in chunk_rows]}
+                    )
+                }
+                to_embed = []
+                for i, row in zip(chunk, chunk_rows):
+                    row["description_hash"] = description_hash(row["description"], self.embedding_model_name)
+                    results[i]["status"] = "updated" if row["id"] in known else "created"
+                    embed = known.get(row["id"]) != row["description_hash"]
+                    results[i]["embedded"] = embed
+                    row["embedding"] = None
+                    if embed:
+                        to_embed.append(row)
+                for row, vector in zip(to_embed, self._embed_texts([r["description"] for r in to_embed])):
+                    row["embedding"] = vector
+                
+                self.graph.query(upsert_query, {"rows": chunk_rows})
+                for i in chunk:
+                    results[i]["success"] = True
+            except Exception as e:
+                logger.error(f"Erro ao gravar lote de nós {label}: {e}")
+                for i in chunk:
+                    results[i]["error"] = str(e)
+        
+        written = sum(1 for r in results if r["success"])
+        embedded = sum(1 for r in results if r["success"] and r.get("embedded"))
+        logger.info(f"{written}/{len(rows)} nós {label} gravados ({embedded} com novo embedding)")
+        if written:
+            self.notify_graph_changed()
+        return results
     
     def create_obsidian_note_node(self, note_path: Path, content: str) -> bool:
         """
@@ -409,50 +1354,15 @@ Contexto do grafo:
             else:
                 embedding = [0.0] * self.embedding_dimension
             
-            # Extrai título e metadados
-            note_id = note_path.stem
-            title = note_path.stem
-            folder = note_path.parent.name if note_path.parent.name else "root"
-            
-            # Extrai tags do conteúdo (formato #tag)
-            tags = re.findall(r'#(\w+)', content)
+            note = parse_obsidian_note(note_path, content)
+            title = note["title"]
+            note["embedding"] = embedding
             
-            # Extrai links do conteúdo (formato [[link]])
-            links = re.findall(r'\[\[([^\]]+)\]\]', content)
-            
-            query = """
-            MERGE (n:ObsidianNote {id: $id})
-            ON CREATE SET n.title = $title,
-                n.content = $content,
-                n.folder = $folder,
-                n.path = $path,
-                n.embedding = $embedding,
-                n.created_at = datetime(),
-                n.updated_at = datetime()
-            ON MATCH SET n.content = $content,
-                n.updated_at = datetime(),
-                n.embedding = $embedding
-            WITH n
-            FOREACH (tagName IN $tags |
-                MERGE (t:Tag {name: tagName})
-                MERGE (n)-[:TAGGED]->(t)
-            )
-            RETURN n
-            """
-            
-            self.graph.query(query, {
-                "id": note_id,
-                "title": title,
-                "content": content,
-                "folder": folder,
-                "path": str(note_path),
-                "embedding": embedding,
-                "tags": tags
-            })
+            self.graph.query(NOTE_UPSERT_QUERY, {"rows": [note]})
             
-            # Cria relações com outras notas mencionadas
-            for link in links:
-                self._create_note_link(note_id, link)
+            # Cria relações com outras notas mencionadas (uma única query)
+            self._write_note_links([note], batch_size=500)
+            self.notify_graph_changed()
             
             logger.info(f"Nó ObsidianNote '{title}' criado com sucesso")
             return True
@@ -460,21 +1370,6 @@ Contexto do grafo:
             logger.error(f"Erro ao criar nó ObsidianNote: {e}")
             return False
     
-    def _create_note_link(self, source_id: str, target_id: str) -> None:
-        """Cria relação entre notas."""
-        try:
-            query = """
-            MATCH (source:ObsidianNote {id: $source_id})
-            MATCH (target:ObsidianNote {id: $target_id})
-            MERGE (source)-[:LINKS_TO]->(target)
-            """
-            self.graph.query(query, {
-                "source_id": source_id,
-                "target_id": target_id
-            })
-        except Exception as e:
-            logger.debug(f"Erro ao criar link entre notas: {e}")
-    
     def create_mcp_rag_relation(self, rag_id: str, mcp_id: str, relation_type: str = "USES") -> bool:
         """
         Cria relação entre RAG e MCP.
@@ -488,16 +1383,12 @@ Contexto do grafo:
             True se criado com sucesso
         """
         try:
-            query = f"""
-            MATCH (r:RAG {{id: $rag_id}})
-            MATCH (m:MCP {{id: $mcp_id}})
-            MERGE (r)-[:{relation_type}]->(m)
-            RETURN r, m
-            """
+            query = MCP_RAG_RELATION_QUERY_TEMPLATE.format(relation_type=relation_type)
             self.graph.query(query, {
                 "rag_id": rag_id,
                 "mcp_id": mcp_id
             })
+            self.notify_graph_changed()
             logger.info(f"Relação {relation_type} criada entre RAG '{rag_id}' e MCP '{mcp_id}'")
             return True
         except Exception as e:
@@ -517,111 +1408,369 @@ Contexto do grafo:
             True se criado com sucesso
         """
         try:
-            query = f"""
-            MATCH (m:MCP {{id: $mcp_id}})
-            MATCH (n:ObsidianNote {{id: $note_id}})
-            MERGE (m)-[:{relation_type}]->(n)
-            RETURN m, n
-            """
+            query = MCP_OBSIDIAN_RELATION_QUERY_TEMPLATE.format(relation_type=relation_type)
             self.graph.query(query, {
                 "mcp_id": mcp_id,
                 "note_id": note_id
             })
+            self.notify_graph_changed()
             logger.info(f"Relação {relation_type} criada entre MCP '{mcp_id}' e nota '{note_id}'")
             return True
         except Exception as e:
             logger.error(f"Erro ao criar relação: {e}")
             return False
     
-    def import_obsidian_vault(self, vault_path: Path) -> int:
+    def link_similar_nodes(
+        self,
+        threshold: Optional[float] = None,
+        k: Optional[int] = None,
+        batch_size: int = 200,
+        full: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Materializa arestas SIMILAR_TO entre MCPs, RAGs e notas por similaridade vetorial.
+        
+        Cada nó é ligado aos seus k vizinhos mais próximos (nos três índices
+        vetoriais) com score >= threshold; o score fica na aresta e pesa na
+        expansão de vizinhança do GraphRAG. É incremental: só processa nós
+        cujo embedding mudou desde a última rodada, em lotes de `batch_size`.
+        Os pendentes são lidos numa única varredura no início da rodada; os
+        vizinhos que perdem arestas na poda são religados no mesmo lote.
+        
+        Args:
+            threshold: Similaridade mínima (padrão: GRAPH_SIMILARITY_THRESHOLD ou 0.8)
+            k: Vizinhos por nó (padrão: GRAPH_SIMILARITY_K ou 5)
+            batch_size: Nós por query
+            full: Reprocessa todos os nós, não só os alterados
+        
+        Returns:
+            Contadores processed/relinked/linked/removed (e error, se a rodada parou)
+        """
+        if threshold is None:
+            threshold = float(os.getenv("GRAPH_SIMILARITY_THRESHOLD", "0.8"))
+        if k is None:
+            k = int(os.getenv("GRAPH_SIMILARITY_K", "5"))
+        
+        counters: Dict[str, Any] = {"processed": 0, "relinked": 0, "linked": 0, "removed": 0}
+        start = time.perf_counter()
+        try:
+            run_at = self.graph.query("RETURN datetime() AS now")[0]["now"]
+            pending = [r["element_id"] for r in self.iter_query(
+                SIMILARITY_PENDING_QUERY, {"full": full, "run_at": run_at}
+            )]
+            for ids in _batches(pending, batch_size):
+                params = {"ids": ids, "run_at": run_at}
+                neighbours = [r["element_id"] for r in self.graph.query(SIMILARITY_NEIGHBOURS_QUERY, params)]
+                removed = self.graph.query(SIMILARITY_PRUNE_QUERY, params)
+                linked = self.graph.query(SIMILARITY_LINK_QUERY, {
+                    "ids": ids + neighbours, "run_at": run_at, "k": k, "threshold": threshold
+                })
+                # Marca também os nós sem vizinhos (ou com vetor nulo) para não voltarem
+                self.graph.query(SIMILARITY_MARK_QUERY, params)
+                counters["processed"] += len(ids)
+                counters["relinked"] += len(neighbours)
+                counters["removed"] += removed[0]["removed"] if removed else 0
+                counters["linked"] += linked[0]["linked"] if linked else 0
+        except Exception as e:
+            logger.error(f"Erro ao ligar nós similares: {e}")
+            counters["error"] = str(e)
+        
+        if counters["processed"]:
+            self.notify_graph_changed()
+        logger.info(
+            f"SIMILAR_TO: {counters['processed']} nós processados ({counters['relinked']} vizinhos religados), "
+            f"{counters['linked']} arestas gravadas, "
+            f"{counters['removed']} removidas em {time.perf_counter() - start:.1f}s"
+        )
+        return counters
+    
+    def _embed_texts(self, texts: List[str], batch_size: int = 64) -> List[List[float]]:
+        """Gera embeddings em lotes; textos vazios recebem o vetor nulo."""
+        vectors: List[List[float]] = [[0.0] * self.embedding_dimension for _ in texts]
+        pending = [i for i, text in enumerate(texts) if text]
+        for chunk in _batches(pending, batch_size):
+            for i, vector in zip(chunk, self.embeddings.embed_documents([texts[i] for i in chunk])):
+                vectors[i] = vector
+        return vectors
+    
+    def _embed_note_rows(self, chunk: List[Dict[str, Any]], embed_batch_size: int) -> List[Dict[str, Any]]:
+        vectors = self._embed_texts([n["content"] for n in chunk], embed_batch_size)
+        return [{**note, "embedding": vector} for note, vector in zip(chunk, vectors)]
+    
+    def _write_notes(
+        self,
+        notes: List[Dict[str, Any]],
+        batch_size: int,
+        embed_batch_size: int,
+        embed_workers: int = 1
+    ) -> int:
+        """
+        Gera embeddings e grava notas + tags em lotes UNWIND.
+        
+        Com `embed_workers` > 1 os lotes são embedados em paralelo enquanto um
+        único escritor grava os já prontos, na ordem original; no máximo
+        `embed_workers + 1` lotes ficam em memória esperando o escritor.
+        """
+        written = 0
+        if embed_workers <= 1:
+            for chunk in _batches(notes, batch_size):
+                self.graph.query(NOTE_UPSERT_QUERY, {"rows": self._embed_note_rows(chunk, embed_batch_size)})
+                written += len(chunk)
+            return written
+        
+        chunks = _batches(notes, batch_size)
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=embed_workers, thread_name_prefix="note-embed") as pool:
+            for chunk in chunks:
+                in_flight.append(pool.submit(self._embed_note_rows, chunk, embed_batch_size))
+                if len(in_flight) > embed_workers:
+                    rows = in_flight.popleft().result()
+                    self.graph.query(NOTE_UPSERT_QUERY, {"rows": rows})
+                    written += len(rows)
+            while in_flight:
+                rows = in_flight.popleft().result()
+                self.graph.query(NOTE_UPSERT_QUERY, {"rows": rows})
+                written += len(rows)
+        return written
+    
+    def _write_note_links(self, notes: List[Dict[str, Any]], batch_size: int) -> int:
+        """Cria LINKS_TO em lotes; chamado depois que todas as notas existem."""
+        rows = [
+            {"source": note["id"], "target": target}
+            for note in notes
+            for target in note["links"]
+            if target != note["id"]
+        ]
+        linked = 0
+        for chunk in _batches(rows, batch_size):
+            result = self.graph.query(NOTE_LINKS_QUERY, {"rows": chunk})
+            linked += result[0]["linked"] if result else 0
+        return linked
+    
+    def import_obsidian_vault(
+        self,
+        vault_path: Path,
+        batch_size: int = 500,
+        embed_batch_size: int = 64,
+        parse_workers: Optional[int] = None,
+        embed_workers: Optional[int] = None
+    ) -> int:
         """
         Importa todas as notas do vault Obsidian para o Neo4j.
         
+        Analisa as notas num pool de processos, gera embeddings em lotes
+        paralelos e grava notas/tags em lotes UNWIND por um único escritor.
+        Os links são resolvidos numa segunda passada, para que notas que
+        aparecem depois no vault não sejam perdidas.
+        
         Args:
             vault_path: Caminho do vault Obsidian
+            batch_size: Notas (e links) por query de escrita
+            embed_batch_size: Textos por chamada ao modelo de embedding
+            parse_workers: Processos de parsing (padrão: OBSIDIAN_IMPORT_PARSE_WORKERS ou nº de CPUs)
+            embed_workers: Lotes embedados em paralelo (padrão: OBSIDIAN_IMPORT_EMBED_WORKERS ou 2)
             
         Returns:
             Número de notas importadas
         """
-        imported = 0
-        
+        vault_path = Path(vault_path)
         if not vault_path.exists():
             logger.error(f"Vault não encontrado: {vault_path}")
             return 0
         
-        # Busca todos os arquivos .md
-        for md_file in vault_path.rglob("*.md"):
+        if parse_workers is None and os.getenv("OBSIDIAN_IMPORT_PARSE_WORKERS"):
+            parse_workers = int(os.getenv("OBSIDIAN_IMPORT_PARSE_WORKERS"))
+        if embed_workers is None:
+            embed_workers = int(os.getenv("OBSIDIAN_IMPORT_EMBED_WORKERS", "2"))
+        
+        start = time.perf_counter()
+        notes = parse_obsidian_files(list(vault_path.rglob("*.md")), parse_workers)
+        parsed_at = time.perf_counter()
+        
+        try:
+            imported = self._write_notes(notes, batch_size, embed_batch_size, embed_workers)
+            linked = self._write_note_links(notes, batch_size)
+        except Exception as e:
+            logger.error(f"Erro ao importar vault {vault_path}: {e}")
+            return 0
+        
+        self.notify_graph_changed()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"{imported} notas importadas do vault Obsidian ({linked} links) em {elapsed:.1f}s "
+            f"(parsing {parsed_at - start:.1f}s, {imported / max(elapsed, 1e-9):.0f} notas/s)"
+        )
+        return imported
+    
+    def sync_obsidian_vault(
+        self,
+        vault_path: Path,
+        batch_size: int = 500,
+        embed_batch_size: int = 64
+    ) -> Dict[str, int]:
+        """
+        Sincroniza incrementalmente o vault com o grafo.
+        
+        Lê o estado (path, hash, mtime) de todas as notas do vault numa única
+        query e compara com o sistema de arquivos: só notas alteradas são
+        relidas, re-embedadas e regravadas; notas com mtime novo mas mesmo
+        conteúdo só têm o mtime atualizado; arquivos removidos viram DETACH DELETE.
+        
+        Args:
+            vault_path: Caminho do vault Obsidian
+            batch_size: Notas por query de escrita
+            embed_batch_size: Textos por chamada ao modelo de embedding
+            
+        Returns:
+            Contadores: added, updated, touched, unchanged, removed, linked
+        """
+        vault_path = Path(vault_path)
+        if not vault_path.exists():
+            logger.error(f"Vault não encontrado: {vault_path}")
+            return {}
+        
+        root = os.path.join(str(vault_path), "")
+        state = {r["path"]: r for r in self.graph.query(NOTE_SYNC_STATE_BY_ROOT_QUERY, {"root": root})}
+        files = list(vault_path.rglob("*.md"))
+        removed = set(state) - {str(f) for f in files}
+        return self._sync_note_files(files, state, removed, batch_size, embed_batch_size)
+    
+    def sync_obsidian_paths(
+        self,
+        paths: List[Path],
+        batch_size: int = 500,
+        embed_batch_size: int = 64
+    ) -> Dict[str, int]:
+        """
+        Sincroniza só os arquivos informados (criados, alterados ou removidos).
+        
+        Usado quando quem chama já sabe o que mudou (ex.: o watcher do vault).
+        """
+        paths = list(dict.fromkeys(Path(p) for p in paths if str(p).endswith(".md")))
+        if not paths:
+            return {}
+        state = {
+            r["path"]: r
+            for r in self.graph.query(NOTE_SYNC_STATE_BY_PATHS_QUERY, {"paths": [str(p) for p in paths]})
+        }
+        files = [p for p in paths if p.exists()]
+        removed = {str(p) for p in paths if not p.exists()} & set(state)
+        return self._sync_note_files(files, state, removed, batch_size, embed_batch_size)
+    
+    def _sync_note_files(
+        self,
+        files: List[Path],
+        state: Dict[str, Dict[str, Any]],
+        removed: set,
+        batch_size: int,
+        embed_batch_size: int
+    ) -> Dict[str, int]:
+        """Compara arquivos com o estado do grafo e grava só as diferenças."""
+        stats = {"added": 0, "updated": 0, "touched": 0, "unchanged": 0, "removed": 0, "linked": 0}
+        changed: List[Dict[str, Any]] = []
+        touched: List[Dict[str, Any]] = []
+        new_ids: List[str] = []
+        
+        for md_file in files:
             try:
+                mtime = md_file.stat().st_mtime
+                known = state.get(str(md_file))
+                if known and known.get("mtime") == mtime:
+                    stats["unchanged"] += 1
+                    continue
                 with open(md_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Cria nó da nota
-                if self.create_obsidian_note_node(md_file, content):
-                    imported += 1
+                    note = parse_obsidian_note(md_file, f.read(), mtime)
+                if known and known.get("content_hash") == note["content_hash"]:
+                    touched.append({"path": note["path"], "mtime": mtime})
+                    continue
+                changed.append(note)
+                if known:
+                    stats["updated"] += 1
+                else:
+                    stats["added"] += 1
+                    new_ids.append(note["id"])
             except Exception as e:
-                logger.error(f"Erro ao importar nota {md_file}: {e}")
+                logger.error(f"Erro ao ler nota {md_file}: {e}")
         
-        logger.info(f"{imported} notas importadas do vault Obsidian")
-        return imported
+        try:
+            if removed:
+                result = self.graph.query(NOTE_DELETE_QUERY, {"paths": sorted(removed)})
+                stats["removed"] = result[0]["removed"] if result else 0
+            for chunk in _batches(touched, batch_size):
+                self.graph.query(NOTE_TOUCH_QUERY, {"rows": chunk})
+            stats["touched"] = len(touched)
+            self._write_notes(changed, batch_size, embed_batch_size)
+            stats["linked"] = self._write_note_links(changed, batch_size)
+            changed_ids = [note["id"] for note in changed]
+            for chunk in _batches(new_ids, batch_size):
+                result = self.graph.query(NOTE_BACKLINKS_QUERY, {"ids": chunk, "changed": changed_ids})
+                stats["linked"] += result[0]["linked"] if result else 0
+        except Exception as e:
+            logger.error(f"Erro ao sincronizar notas: {e}")
+            stats["error"] = str(e)
+            return stats
+        
+        if changed or removed:
+            self.notify_graph_changed()
+        logger.info(f"Sincronização do vault: {stats}")
+        return stats
     
-    def query_graph(self, cypher_query: str, parameters: Optional[Dict] = None) -> List[Dict]:
+    def query_graph(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict] = None,
+        columnar: bool = False
+    ) -> Union[List[Dict], Dict[str, List]]:
         """
         Executa uma query Cypher no grafo.
         
+        Usa o driver diretamente: os records são convertidos uma única vez,
+        dentro da transação, sem a passada extra do Neo4jGraph.query.
+        
         Args:
             cypher_query: Query Cypher
             parameters: Parâmetros da query
+            columnar: Retorna {coluna: [valores]} em vez de uma lista de dicts
             
         Returns:
             Resultados da query
         """
+        transformer = _columns_transformer if columnar else _rows_transformer
         try:
-            results = self.graph.query(cypher_query, parameters or {})
-            converted_results = []
-            
-            for record in results:
-                # O Neo4jGraph retorna Record objects que podem ser convertidos para dict
-                try:
-                    # Tenta converter diretamente para dict
-                    converted_record = dict(record)
-                    
-                    # Converte valores que são Nodes do Neo4j
-                    for key, value in converted_record.items():
-                        if hasattr(value, 'labels') or (hasattr(value, '__class__') and 'Node' in str(value.__class__)):
-                            # É um Node do Neo4j - extrai propriedades
-                            if hasattr(value, 'items'):
-                                # Se já tem items, é um dict-like
-                                converted_record[key] = dict(value)
-                            elif hasattr(value, '__dict__'):
-                                # Tenta usar __dict__
-                                converted_record[key] = {k: v for k, v in value.__dict__.items() if not k.startswith('_')}
-                            else:
-                                # Tenta acessar diretamente
-                                try:
-                                    converted_record[key] = {k: getattr(value, k) for k in dir(value) if not k.startswith('_')}
-                                except:
-                                    converted_record[key] = str(value)
-                        elif isinstance(value, list):
-                            # Lista de valores
-                            converted_record[key] = [
-                                dict(v) if (hasattr(v, 'labels') or (hasattr(v, '__class__') and 'Node' in str(v.__class__))) else v
-                                for v in value
-                            ]
-                    
-                    converted_results.append(converted_record)
-                except Exception as e:
-                    # Se falhar, tenta usar get() do Record
-                    logger.debug(f"Erro ao converter record: {e}")
-                    try:
-                        converted_record = {k: record.get(k) for k in record.keys()}
-                        converted_results.append(converted_record)
-                    except:
-                        continue
-            
-            return converted_results
+            try:
+                return self.graph._driver.execute_query(
+                    Query(cypher_query, timeout=self.graph.timeout),
+                    parameters_=parameters or {},
+                    database_=self.graph._database,
+                    result_transformer_=transformer
+                )
+            except Neo4jError as e:
+                if not requires_auto_commit(e):
+                    raise
+            with self.graph._driver.session(database=self.graph._database) as session:
+                return transformer(session.run(Query(cypher_query, timeout=self.graph.timeout), parameters or {}))
         except Exception as e:
             logger.error(f"Erro ao executar query: {e}")
-            return []
+            return {} if columnar else []
+    
+    def iter_query(
+        self,
+        cypher_query: str,
+        parameters: Optional[Dict] = None,
+        fetch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Executa uma query e devolve os resultados sob demanda.
+        
+        Os records chegam do servidor em lotes de `fetch_size`, então a
+        memória fica constante mesmo para milhões de linhas. A sessão fica
+        aberta até o iterador ser consumido ou fechado; erros são propagados.
+        """
+        with self.graph._driver.session(database=self.graph._database, fetch_size=fetch_size) as session:
+            result = session.run(Query(cypher_query, timeout=self.graph.timeout), parameters or {})
+            keys = result.keys()
+            for record in result:
+                yield dict(zip(keys, map(neo4j_to_python, record)))
     
     def search_graph(self, query: str, node_types: Optional[List[str]] = None, limit: int = 10) -> List[Dict]:
         """
@@ -635,130 +1784,213 @@ Contexto do grafo:
         Returns:
             Lista de nós encontrados
         """
-        node_filter = ""
-        if node_types:
-            labels = ":".join(node_types)
-            node_filter = f":{labels}"
-        
-        cypher_query = f"""
-        MATCH (n{node_filter})
-        WHERE n.name CONTAINS $query 
-           OR n.description CONTAINS $query
-           OR (n:ObsidianNote AND n.content CONTAINS $query)
-        RETURN n, labels(n) as __label__
-        LIMIT $limit
+        if self.graph_mirror is not None and self.graph_mirror.ready and self.graph_mirror.covers(node_types):
+            return self.graph_mirror.search(query, node_types, limit)
+        results = self.query_graph(SEARCH_QUERY, search_params(query, node_types, limit))
+        return search_results_to_nodes(results)
+    
+    def list_nodes(self, label: str) -> List[Dict[str, Any]]:
         """
+        Lista id e nome dos nós MCP ou RAG, ordenados por nome (para seletores da UI).
         
-        results = self.query_graph(cypher_query, {
-            "query": query,
-            "limit": limit
-        })
-        
-        # Converte resultados para dicionário
-        nodes = []
-        for record in results:
-            node = record.get("n", {})
-            node_labels = record.get("__label__", [])
+        Args:
+            label: "MCP" ou "RAG"
             
-            # Se node já é um dicionário, usa diretamente
-            if isinstance(node, dict):
-                node_dict = node.copy()
-                node_dict["__label__"] = node_labels
-                nodes.append(node_dict)
-            else:
-                # Tenta converter Node para dicionário
-                try:
-                    node_dict = dict(node) if hasattr(node, '__dict__') else {}
-                    node_dict["__label__"] = node_labels
-                    nodes.append(node_dict)
-                except Exception as e:
-                    logger.debug(f"Erro ao converter nó: {e}")
-                    continue
-        
-        return nodes
+        Returns:
+            Lista de {id, name}
+        """
+        if label not in ("MCP", "RAG"):
+            raise ValueError(f"Label não suportado: {label}")
+        if self.graph_mirror is not None and self.graph_mirror.ready:
+            return self.graph_mirror.list_nodes(label)
+        return self.query_graph(NODE_LIST_QUERY_TEMPLATE.format(label=label))
     
-    def get_graph_statistics(self) -> Dict[str, int]:
+    def get_graph_statistics(self, force_refresh: bool = False) -> Dict[str, int]:
         """
         Obtém estatísticas do grafo.
         
+        Devolve o snapshot em cache; quando ele passa de `statistics_ttl`
+        segundos, é atualizado em segundo plano e o snapshot anterior continua
+        sendo servido. Só a primeira chamada (ou `force_refresh`) espera a query.
+        Com a réplica em memória ativa, o snapshot é o da última atualização dela.
+        
         Returns:
             Dicionário com estatísticas
         """
-        stats = {}
+        if self.graph_mirror is not None and self.graph_mirror.ready and not force_refresh:
+            return self.graph_mirror.statistics()
+        with self._statistics_lock:
+            snapshot, taken_at = self._statistics, self._statistics_at
         
-        queries = {
-            "MCP_count": "MATCH (m:MCP) RETURN count(m) as count",
-            "RAG_count": "MATCH (r:RAG) RETURN count(r) as count",
-            "ObsidianNote_count": "MATCH (n:ObsidianNote) RETURN count(n) as count",
-            "Tag_count": "MATCH (t:Tag) RETURN count(t) as count",
-            "relation_count": "MATCH ()-[r]->() RETURN count(r) as count"
-        }
+        if snapshot is None or force_refresh:
+            return dict(self.refresh_graph_statistics())
+        if time.monotonic() - taken_at > self.statistics_ttl:
+            self._refresh_statistics_async()
+        return dict(snapshot)
+    
+    def refresh_graph_statistics(self) -> Dict[str, int]:
+        """Recalcula as estatísticas numa única query e atualiza o snapshot."""
+        with self._statistics_refresh_lock:
+            results = self.query_graph(GRAPH_STATISTICS_QUERY)
+            if not results:
+                # Mantém o último snapshot bom se a query falhar
+                with self._statistics_lock:
+                    if self._statistics is not None:
+                        return self._statistics
+                return {key: 0 for key in GRAPH_STATISTICS_KEYS}
+            stats = {key: results[0].get(key, 0) for key in GRAPH_STATISTICS_KEYS}
+            self.update_statistics_snapshot(stats)
+            return stats
+    
+    def statistics_snapshot(self) -> Tuple[Optional[Dict[str, int]], float]:
+        """Snapshot atual das estatísticas e sua idade em segundos."""
+        with self._statistics_lock:
+            if self._statistics is None:
+                return None, float("inf")
+            return dict(self._statistics), time.monotonic() - self._statistics_at
+    
+    def update_statistics_snapshot(self, stats: Dict[str, int]) -> None:
+        """Substitui o snapshot (usado também pelo gerenciador assíncrono)."""
+        with self._statistics_lock:
+            self._statistics = dict(stats)
+            self._statistics_at = time.monotonic()
+    
+    def _refresh_statistics_async(self) -> None:
+        # Se já há uma atualização em andamento, não dispara outra
+        if self._statistics_refresh_lock.locked():
+            return
+        threading.Thread(target=self.refresh_graph_statistics, name="graph-stats", daemon=True).start()
+    
+    def start_statistics_refresher(self, interval: Optional[float] = None) -> None:
+        """Mantém o snapshot sempre fresco com uma thread periódica."""
+        if self._statistics_refresher and self._statistics_refresher.is_alive():
+            return
+        interval = interval or self.statistics_ttl
+        self._statistics_stop.clear()
         
-        for key, query in queries.items():
-            try:
-                results = self.query_graph(query)
-                if results:
-                    stats[key] = results[0].get("count", 0)
-                else:
-                    stats[key] = 0
-            except Exception as e:
-                logger.error(f"Erro ao obter estatística {key}: {e}")
-                stats[key] = 0
+        def loop():
+            while True:
+                try:
+                    self.refresh_graph_statistics()
+                except Exception as e:
+                    logger.debug(f"Erro ao atualizar estatísticas do grafo: {e}")
+                if self._statistics_stop.wait(interval):
+                    return
         
-        return stats
+        self._statistics_refresher = threading.Thread(target=loop, name="graph-stats-refresher", daemon=True)
+        self._statistics_refresher.start()
     
-    def get_graph_visualization_data(self, node_types: Optional[List[str]] = None, limit: int = 50) -> Dict[str, List]:
+    def stop_statistics_refresher(self) -> None:
+        """Para a thread de atualização periódica."""
+        self._statistics_stop.set()
+    
+    def start_graph_mirror(self, refresh_interval: Optional[float] = None) -> GraphMirror:
         """
-        Obtém dados para visualização do grafo.
+        Liga a réplica de leitura em memória.
+        
+        Carrega o grafo MCP/RAG/ObsidianNote/Tag e passa a responder
+        get_graph_statistics, search_graph e a visualização localmente; uma
+        thread a mantém atualizada a cada `refresh_interval` segundos
+        (GRAPH_MIRROR_REFRESH) e logo após escritas feitas por este gerenciador.
+        Também mantém o snapshot de estatísticas, dispensando o refresher.
+        """
+        if self.graph_mirror is None:
+            self.graph_mirror = GraphMirror(self, refresh_interval=refresh_interval)
+        self.graph_mirror.start()
+        return self.graph_mirror
+    
+    def stop_graph_mirror(self) -> None:
+        """Desliga a réplica; as leituras voltam a ir ao Neo4j."""
+        if self.graph_mirror is not None:
+            self.graph_mirror.stop()
+            self.graph_mirror = None
+    
+    def get_subgraph(
+        self,
+        focus: Optional[str] = None,
+        query: Optional[str] = None,
+        node_types: Optional[List[str]] = None,
+        max_depth: int = 2,
+        max_degree: int = 50,
+        page_size: int = 500,
+        seeds: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Primeira página colunar de um subgrafo conexo em torno de um foco.
         
         Args:
+            focus: elementId ou id de um nó (tem prioridade sobre `query`)
+            query: Texto; os nós da busca híbrida viram sementes
             node_types: Tipos de nós para incluir (None para todos)
-            limit: Limite de nós
+            max_depth: Saltos máximos a partir das sementes
+            max_degree: Vizinhos máximos por nó expandido
+            page_size: Nós novos por página (aproximado)
+            seeds: Número de sementes sem foco
             
         Returns:
-            Dicionário com nós e arestas
+            Página com colunas `nodes`/`edges`, dicionários de labels/tipos
+            e `cursor` para get_subgraph_page
         """
-        node_filter = ""
-        if node_types:
-            labels = ":".join(node_types)
-            node_filter = f":{labels}"
-        
-        # Busca nós
-        nodes_query = f"""
-        MATCH (n{node_filter})
-        RETURN n.id as id, n.name as name, labels(n) as label
-        LIMIT $limit
+        return self.subgraph_pager.start(
+            focus=focus,
+            query=query,
+            node_types=node_types,
+            seeds=seeds,
+            max_depth=max_depth,
+            max_degree=max_degree,
+            page_size=page_size
+        )
+    
+    def get_subgraph_page(
+        self,
+        cursor: str,
+        page_size: int = 500,
+        expand: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Próxima página de um subgrafo; `expand` expande nós específicos primeiro."""
+        return self.subgraph_pager.next_page(cursor, page_size=page_size, expand=expand)
+    
+    def get_graph_visualization_data(
+        self,
+        node_types: Optional[List[str]] = None,
+        limit: int = 50,
+        focus: Optional[str] = None,
+        query: Optional[str] = None
+    ) -> Dict[str, List]:
         """
+        Obtém dados para visualização do grafo.
         
-        nodes_results = self.query_graph(nodes_query, {"limit": limit})
+        Monta um subgrafo conexo (toda aresta liga dois nós retornados) a
+        partir de um foco, de uma busca ou de algumas sementes.
         
-        # Busca relações
-        relations_query = f"""
-        MATCH (a{node_filter})-[r]->(b{node_filter})
-        RETURN a.id as source, b.id as target, type(r) as relation
-        LIMIT $limit
+        Args:
+            node_types: Tipos de nós para incluir (None para todos)
+            limit: Limite de nós
+            focus: elementId ou id de um nó para centralizar
+            query: Texto para escolher as sementes
+            
+        Returns:
+            Dicionário com nós e arestas
         """
+        try:
+            pages = [self.get_subgraph(
+                focus=focus,
+                query=query,
+                node_types=node_types,
+                page_size=limit,
+                seeds=max(1, limit // 10)
+            )]
+            while pages[-1]["has_more"] and pages[-1]["total_nodes"] < limit:
+                pages.append(self.get_subgraph_page(pages[-1]["cursor"], page_size=limit - pages[-1]["total_nodes"]))
+            self.subgraph_pager.close(pages[-1]["cursor"])
+        except Exception as e:
+            logger.error(f"Erro ao obter dados de visualização: {e}")
+            return {"nodes": [], "edges": []}
         
-        relations_results = self.query_graph(relations_query, {"limit": limit})
-        
-        # Formata nós
-        nodes = []
-        for record in nodes_results:
-            nodes.append({
-                "id": record.get("id", ""),
-                "name": record.get("name", ""),
-                "label": record.get("label", [])
-            })
-        
-        # Formata arestas
-        edges = []
-        for record in relations_results:
-            edges.append({
-                "source": record.get("source", ""),
-                "target": record.get("target", ""),
-                "relation": record.get("relation", "")
-            })
-        
+        graph_data = pages_to_node_edge_lists(pages)
+        nodes = graph_data["nodes"][:limit]
+        kept = {node["id"] for node in nodes}
+        edges = [e for e in graph_data["edges"] if e["source"] in kept and e["target"] in kept]
         return {
             "nodes": nodes,
             "edges": edges
@@ -0,0 +1,310 @@
+"""
+Sincronização contínua do vault Obsidian com o Neo4j.
+
+Observa `ObsidianManager.vault_path` e envia para o grafo apenas os arquivos
+que mudaram, via `Neo4jGraphRAGManager.sync_obsidian_paths`:
+- usa eventos do sistema de arquivos (watchdog/inotify) quando disponível e
+  cai para polling de mtime caso contrário;
+- agrupa rajadas de edições (o Obsidian salva a cada poucos segundos enquanto
+  se digita) e só sincroniza quando o vault fica quieto por `debounce` segundos,
+  ou no máximo a cada `max_delay` segundos sob edição contínua.
+
+Uso:
+    python -m src.agents.obsidian_vault_watcher --vault /caminho/do/vault
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from src.agents.mcp_obsidian_integration import ObsidianManager
+from src.agents.mcp_neo4j_integration import Neo4jGraphRAGManager, get_neo4j_manager
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+    WATCHDOG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+IGNORED_DIRS = {".obsidian", ".trash", ".git"}
+
+
+def is_vault_note(path: str, vault_path: Path) -> bool:
+    """True para arquivos .md do vault fora das pastas internas do Obsidian."""
+    if not path.endswith(".md"):
+        return False
+    try:
+        parts = Path(path).relative_to(vault_path).parts
+    except ValueError:
+        return False
+    return not any(part in IGNORED_DIRS for part in parts[:-1])
+
+
+class _VaultEventHandler(FileSystemEventHandler):
+    """Repassa eventos do watchdog para a fila do watcher."""
+
+    def __init__(self, watcher: "VaultWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            # Pasta movida/removida: não sabemos quais notas estavam dentro
+            if event.event_type in ("moved", "deleted"):
+                self.watcher.request_rescan()
+            return
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+        self.watcher.notify([p for p in paths if p])
+
+
+class VaultWatcher:
+    """Observa o vault e sincroniza lotes de notas alteradas com o Neo4j."""
+
+    def __init__(
+        self,
+        vault_path: Optional[Path] = None,
+        neo4j_manager: Optional[Neo4jGraphRAGManager] = None,
+        debounce: float = 2.0,
+        max_delay: float = 30.0,
+        poll_interval: float = 5.0,
+        use_native_events: bool = True,
+        max_retry_delay: float = 300.0
+    ):
+        """
+        Inicializa o watcher.
+
+        Args:
+            vault_path: Vault a observar (padrão: o detectado pelo ObsidianManager)
+            neo4j_manager: Gerenciador Neo4j (padrão: instância global)
+            debounce: Segundos sem eventos antes de sincronizar um lote
+            max_delay: Atraso máximo de um lote sob edição contínua
+            poll_interval: Intervalo do polling quando não há inotify
+            use_native_events: Usa watchdog se estiver instalado
+            max_retry_delay: Espera máxima entre tentativas de um lote que falhou
+                (a espera dobra a cada falha seguida)
+        """
+        self.vault_path = Path(vault_path) if vault_path else ObsidianManager().vault_path
+        if not self.vault_path:
+            raise ValueError("Vault do Obsidian não configurado")
+        self.neo4j_manager = neo4j_manager or get_neo4j_manager()
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.use_native_events = use_native_events and WATCHDOG_AVAILABLE
+        self.max_retry_delay = max_retry_delay
+
+        self._pending: Dict[str, None] = {}
+        self._rescan = False
+        self._first_event_at: Optional[float] = None
+        self._last_event_at = 0.0
+        # Backoff depois de falhas: nenhum flush antes de _retry_at
+        self._retry_at = 0.0
+        self._failures = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._observer = None
+        self.stats: Dict[str, Any] = {
+            "mode": "inotify" if self.use_native_events else "polling",
+            "batches": 0,
+            "paths_synced": 0,
+            "last_sync_at": None,
+            "last_sync_seconds": None,
+            "last_error": None,
+            "consecutive_failures": 0,
+        }
+
+    def notify(self, paths: Iterable[str]) -> None:
+        """Enfileira arquivos alterados; o flush acontece após o debounce."""
+        now = time.monotonic()
+        with self._condition:
+            added = False
+            for path in paths:
+                if is_vault_note(str(path), self.vault_path):
+                    self._pending[str(path)] = None
+                    added = True
+            if not added:
+                return
+            self._last_event_at = now
+            if self._first_event_at is None:
+                self._first_event_at = now
+            self._condition.notify()
+
+    def request_rescan(self) -> None:
+        """Pede uma sincronização incremental do vault inteiro no próximo flush."""
+        with self._condition:
+            self._rescan = True
+            self._pending.setdefault(str(self.vault_path), None)
+            now = time.monotonic()
+            self._last_event_at = now
+            if self._first_event_at is None:
+                self._first_event_at = now
+            self._condition.notify()
+
+    def start(self) -> None:
+        """Inicia a observação e a thread de sincronização."""
+        if self._threads:
+            return
+        self._stop.clear()
+        if self.use_native_events:
+            self._observer = Observer()
+            self._observer.schedule(_VaultEventHandler(self), str(self.vault_path), recursive=True)
+            self._observer.start()
+        else:
+            self._threads.append(threading.Thread(target=self._poll_loop, name="vault-poll", daemon=True))
+        self._threads.append(threading.Thread(target=self._flush_loop, name="vault-sync", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Observando vault {self.vault_path} ({self.stats['mode']})")
+
+    def stop(self, flush: bool = True) -> None:
+        """Para o watcher; por padrão sincroniza o que ainda estiver pendente."""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if flush:
+            self._flush()
+
+    def run_forever(self) -> None:
+        """Inicia e bloqueia até Ctrl+C."""
+        self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _snapshot(self) -> Dict[str, float]:
+        """mtime de cada nota do vault (só stat, sem ler conteúdo)."""
+        snapshot = {}
+        stack = [str(self.vault_path)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in IGNORED_DIRS:
+                                stack.append(entry.path)
+                        elif entry.name.endswith(".md"):
+                            snapshot[entry.path] = entry.stat().st_mtime
+            except OSError as e:
+                logger.debug(f"Erro ao listar diretório do vault: {e}")
+        return snapshot
+
+    def _poll_loop(self) -> None:
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            changed = [p for p, mtime in current.items() if previous.get(p) != mtime]
+            changed.extend(p for p in previous if p not in current)
+            previous = current
+            if changed:
+                self.notify(changed)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            with self._condition:
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                now = time.monotonic()
+                quiet_until = self._last_event_at + self.debounce
+                deadline = self._first_event_at + self.max_delay
+                flush_at = max(min(quiet_until, deadline), self._retry_at)
+                if now < flush_at:
+                    self._condition.wait(flush_at - now)
+                    continue
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._condition:
+            paths = list(self._pending)
+            rescan = self._rescan
+            self._pending.clear()
+            self._rescan = False
+            self._first_event_at = None
+        if not paths:
+            return
+        start = time.perf_counter()
+        try:
+            if rescan:
+                result = self.neo4j_manager.sync_obsidian_vault(self.vault_path)
+            else:
+                result = self.neo4j_manager.sync_obsidian_paths([Path(p) for p in paths])
+            # A sincronização devolve falhas de escrita em "error" em vez de levantar
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            self.stats["last_error"] = None
+        except Exception as e:
+            with self._condition:
+                self._failures += 1
+                delay = min(self.max_retry_delay, max(self.debounce, 1.0) * 2 ** (self._failures - 1))
+                self._retry_at = time.monotonic() + delay
+            logger.error(f"Erro ao sincronizar lote do vault (nova tentativa em {delay:.0f}s): {e}")
+            self.stats["last_error"] = str(e)
+            self.stats["consecutive_failures"] = self._failures
+            # Devolve o lote para a próxima tentativa
+            self.notify(paths)
+            if rescan:
+                self.request_rescan()
+            return
+        with self._condition:
+            self._failures = 0
+            self._retry_at = 0.0
+        self.stats["consecutive_failures"] = 0
+        self.stats["batches"] += 1
+        self.stats["paths_synced"] += len(paths)
+        self.stats["last_sync_at"] = time.time()
+        self.stats["last_sync_seconds"] = round(time.perf_counter() - start, 3)
+        logger.info(f"Vault: {len(paths)} arquivo(s) sincronizado(s): {result}")
+
+
+def main():
+    """Função principal para execução como serviço."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sincroniza alterações do vault Obsidian com o Neo4j")
+    parser.add_argument("--vault", default=os.getenv("OBSIDIAN_VAULT_PATH"), help="Caminho do vault")
+    parser.add_argument("--debounce", type=float, default=float(os.getenv("OBSIDIAN_WATCH_DEBOUNCE", "2")))
+    parser.add_argument("--max-delay", type=float, default=float(os.getenv("OBSIDIAN_WATCH_MAX_DELAY", "30")))
+    parser.add_argument("--poll-interval", type=float, default=float(os.getenv("OBSIDIAN_WATCH_POLL_INTERVAL", "5")))
+    parser.add_argument("--polling", action="store_true", help="Força polling mesmo com watchdog instalado")
+    parser.add_argument(
+        "--initial-sync",
+        action="store_true",
+        help="Roda uma sincronização incremental completa antes de observar"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    watcher = VaultWatcher(
+        vault_path=Path(args.vault) if args.vault else None,
+        debounce=args.debounce,
+        max_delay=args.max_delay,
+        poll_interval=args.poll_interval,
+        use_native_events=not args.polling
+    )
+    if args.initial_sync:
+        watcher.neo4j_manager.sync_obsidian_vault(watcher.vault_path)
+    watcher.run_forever()
+
+
+if __name__ == "__main__":
+    main()
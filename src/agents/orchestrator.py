@@ -5,20 +5,25 @@ Este módulo atua como um Tech Lead, planejando e distribuindo tarefas
 entre os agentes especializados do sistema.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
 import logging
+import os
 from pathlib import Path
 
 from src.agents.mcp_manager import MCPManager, get_mcp_manager
 from src.agents.mcp_docker_integration import DockerMCPDetector
 from src.agents.mcp_obsidian_integration import ObsidianManager
 from src.agents.mcp_neo4j_integration import Neo4jGraphRAGManager, get_neo4j_manager
+from src.agents.async_neo4j_integration import AsyncNeo4jGraphRAGManager, get_async_neo4j_manager
 from src.agents.mcp_kestra_integration import KestraAgent, get_kestra_agent
 from src.agents.kestra_langchain_master import KestraLangChainMaster, get_master_agent
 from src.agents.agent_helper_system import AgentHelperSystem, get_helper_system, get_monitor_helper, get_optimizer_helper
 from src.agents.git_integration import GitIntegrationAgent, get_git_agent
+from src.agents.local_vector_index import get_local_vector_index, local_results_to_nodes
+from src.agents.graph_snapshot import export_snapshot, import_snapshot
+from src.apps.model_registry import get_embedding_model, get_model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -254,23 +259,37 @@ class Orchestrator:
             imported = self.neo4j_manager.import_obsidian_vault(vault_path)
             return {"imported_count": imported}
         
+        elif action == "sync_to_neo4j":
+            if not self.neo4j_available:
+                raise RuntimeError("Neo4j não está disponível")
+            vault_path = Path(task.parameters.get("vault_path") or self.obsidian_manager.vault_path)
+            return self.neo4j_manager.sync_obsidian_vault(vault_path)
+        
         else:
             raise ValueError(f"Ação não suportada: {action}")
     
     def _execute_neo4j_task(self, task: Task) -> Any:
         """Executa tarefas do Neo4j GraphRAG Agent."""
+        action = task.parameters.get("action")
+        
+        # Busca funciona mesmo sem Neo4j, pelo índice vetorial local
+        if action == "search_graph":
+            return self.search_graph(
+                task.parameters.get("query"),
+                task.parameters.get("node_types"),
+                task.parameters.get("limit", 10)
+            )
+        
         if not self.neo4j_available:
             raise RuntimeError("Neo4j não está disponível")
         
-        action = task.parameters.get("action")
-        
         if action == "create_mcp_node":
             mcp_info = task.parameters.get("mcp_info")
             return self.neo4j_manager.create_mcp_node(mcp_info)
         
         elif action == "query_graphrag":
             question = task.parameters.get("question")
-            return {"answer": self.neo4j_manager.query_graphrag(question)}
+            return self.neo4j_manager.run_graphrag(question, session_id=task.parameters.get("session_id"))
         
         elif action == "get_statistics":
             return self.neo4j_manager.get_graph_statistics()
@@ -280,6 +299,33 @@ class Orchestrator:
             limit = task.parameters.get("limit", 50)
             return self.neo4j_manager.get_graph_visualization_data(node_types, limit)
         
+        elif action == "graph_overview":
+            return self.get_graph_overview(task.parameters.get("search"), task.parameters.get("limit", 10))
+        
+        elif action == "build_local_vector_index":
+            return self.neo4j_manager.build_local_vector_index()
+        
+        elif action == "link_similar_nodes":
+            return self.neo4j_manager.link_similar_nodes(
+                threshold=task.parameters.get("threshold"),
+                k=task.parameters.get("k"),
+                full=task.parameters.get("full", False)
+            )
+        
+        elif action == "export_graph_snapshot":
+            return export_snapshot(
+                self.neo4j_manager,
+                Path(task.parameters.get("path")),
+                fmt=task.parameters.get("format", "parquet")
+            )
+        
+        elif action == "import_graph_snapshot":
+            return import_snapshot(
+                self.neo4j_manager,
+                Path(task.parameters.get("path")),
+                skip_embeddings=task.parameters.get("skip_embeddings", False)
+            )
+        
         else:
             raise ValueError(f"Ação não suportada: {action}")
     
@@ -382,32 +428,102 @@ class Orchestrator:
         
         servers = [self.mcp_manager.get_server(server_name)] if server_name else self.mcp_manager.list_servers()
         
-        synced = 0
-        failed = 0
+        mcp_infos = [
+            {
+                "name": server.name,
+                "id": server.name,
+                "command": server.command,
+                "args": server.args,
+                "description": server.description or "",
+                "enabled": server.enabled
+            }
+            for server in servers
+            if server
+        ]
         
-        for server in servers:
-            if server:
-                mcp_info = {
-                    "name": server.name,
-                    "id": server.name,
-                    "command": server.command,
-                    "args": server.args,
-                    "description": server.description or "",
-                    "enabled": server.enabled
-                }
-                
-                try:
-                    if self.neo4j_manager.create_mcp_node(mcp_info):
-                        synced += 1
-                    else:
-                        failed += 1
-                except Exception as e:
-                    logger.error(f"Erro ao sincronizar servidor {server.name}: {e}")
-                    failed += 1
+        # Um lote: embeddings só das descrições alteradas e uma escrita UNWIND
+        try:
+            results = self.neo4j_manager.upsert_mcp_nodes(mcp_infos)
+        except Exception as e:
+            logger.error(f"Erro ao sincronizar servidores MCP: {e}")
+            return {"synced": 0, "failed": len(mcp_infos)}
+        
+        synced = sum(1 for r in results if r["success"])
+        failed = len(results) - synced
+        for result in results:
+            if not result["success"]:
+                logger.error(f"Erro ao sincronizar servidor {result['id']}: {result.get('error')}")
         
         logger.info(f"Sincronização MCP→Neo4j: {synced} sucessos, {failed} falhas")
         return {"synced": synced, "failed": failed}
     
+    def run_graph_operations(
+        self,
+        operations: Dict[str, Callable[[AsyncNeo4jGraphRAGManager], Awaitable[Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Executa operações independentes no grafo ao mesmo tempo.
+        
+        Args:
+            operations: Nome -> função que recebe o gerenciador assíncrono e
+                devolve a corrotina (ex.: lambda g: g.search_graph("docker"))
+            
+        Returns:
+            Nome -> resultado; operações que falharam trazem {"error": ...}
+        """
+        if not self.neo4j_available:
+            raise RuntimeError("Neo4j não está disponível")
+        
+        graph = get_async_neo4j_manager()
+        names = list(operations)
+        results = graph.gather(*(operations[name](graph) for name in names))
+        return {
+            name: {"error": str(result)} if isinstance(result, Exception) else result
+            for name, result in zip(names, results)
+        }
+    
+    def get_graph_overview(self, search: Optional[str] = None, limit: int = 10) -> Dict[str, Any]:
+        """
+        Estatísticas do grafo e, opcionalmente, resultados de busca, consultados em paralelo.
+        
+        Args:
+            search: Termo de busca (None para só estatísticas)
+            limit: Limite de resultados por busca
+        """
+        operations = {"statistics": lambda graph: graph.get_graph_statistics()}
+        if search:
+            operations["text_matches"] = lambda graph: graph.search_graph(search, limit=limit)
+            operations["related"] = lambda graph: graph.hybrid_search(search, k=limit)
+        return self.run_graph_operations(operations)
+    
+    def search_graph(
+        self,
+        query: str,
+        node_types: Optional[List[str]] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca no grafo; sem Neo4j, busca por similaridade no índice vetorial local.
+        
+        Args:
+            query: Texto de busca
+            node_types: Tipos de nós para buscar (None para todos)
+            limit: Limite de resultados
+        """
+        if self.neo4j_available:
+            return self.neo4j_manager.search_graph(query, node_types, limit)
+        
+        index = get_local_vector_index()
+        if index is None:
+            raise RuntimeError("Neo4j não está disponível e não há índice vetorial local")
+        embeddings, _ = get_embedding_model(
+            index.embedding_model,
+            logger=logger,
+            config={"ollama_base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")}
+        )
+        results = index.search(embeddings.embed_query(query), k=limit, labels=node_types)
+        return local_results_to_nodes(results)
+    
     def sync_mcp_to_obsidian(self, server_name: Optional[str] = None) -> Dict[str, int]:
         """
         Sincroniza servidores MCP para o Obsidian.
@@ -482,6 +598,14 @@ class Orchestrator:
             )
             pipeline.append(task3)
         
+        # 4. Ligar nós similares (só os que mudaram nas etapas anteriores)
+        task4 = self.create_task(
+            AgentType.NEO4J_GRAPHRAG,
+            "Ligar nós similares no Neo4j",
+            {"action": "link_similar_nodes"}
+        )
+        pipeline.append(task4)
+        
         return pipeline
     
     def get_system_status(self) -> Dict[str, Any]:
@@ -520,6 +644,7 @@ class Orchestrator:
             "agent_helper_system": {
                 "available": self.helper_available
             },
+            "models": get_model_registry().memory_report(),
             "git_integration": {
                 "available": self.git_available,
                 "status": self.git_agent.get_status().__dict__ if self.git_available else None
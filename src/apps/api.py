@@ -2,17 +2,18 @@ import os
 
 from langchain_neo4j import Neo4jGraph
 from dotenv import load_dotenv
-from src.apps.utils import (
-    create_vector_index,
-    BaseLogger,
-)
+from src.apps.utils import BaseLogger
+from src.apps.graph_schema import ensure_schema
 from src.apps.chains import (
-    load_embedding_model,
-    load_llm,
     configure_llm_only_chain,
     configure_qa_rag_chain,
+    configure_speculative_chain,
+    configure_ticket_chain,
+    draft_tickets_for_unanswered,
     generate_ticket,
+    stream_ticket,
 )
+from src.apps.model_registry import get_embedding_model, get_llm
 from fastapi import FastAPI, Depends
 from pydantic import BaseModel
 from langchain.callbacks.base import BaseCallbackHandler
@@ -34,7 +35,7 @@ llm_name = os.getenv("LLM")
 # Remapping for Langchain Neo4j integration
 os.environ["NEO4J_URL"] = url
 
-embeddings, dimension = load_embedding_model(
+embeddings, dimension = get_embedding_model(
     embedding_model_name,
     config={"ollama_base_url": ollama_base_url},
     logger=BaseLogger(),
@@ -44,16 +45,26 @@ embeddings, dimension = load_embedding_model(
 neo4j_graph = Neo4jGraph(
     url=url, username=username, password=password, refresh_schema=False
 )
-create_vector_index(neo4j_graph)
+ensure_schema(neo4j_graph, embedding_model_name, dimension, logger=BaseLogger())
 
-llm = load_llm(
+llm = get_llm(
     llm_name, logger=BaseLogger(), config={"ollama_base_url": ollama_base_url}
 )
 
 llm_chain = configure_llm_only_chain(llm)
+ticket_chain = configure_ticket_chain(llm)
 rag_chain = configure_qa_rag_chain(
     llm, embeddings, embeddings_store_url=url, username=username, password=password
 )
+speculative_chain = configure_speculative_chain(
+    llm,
+    embeddings,
+    embeddings_store_url=url,
+    username=username,
+    password=password,
+    score_threshold=float(os.getenv("SPECULATIVE_SCORE_THRESHOLD", "0.85")),
+    deadline=float(os.getenv("SPECULATIVE_DEADLINE", "0.6")),
+)
 
 
 class QueueCallback(BaseCallbackHandler):
@@ -113,6 +124,8 @@ async def root():
 class Question(BaseModel):
     text: str
     rag: bool = False
+    # Start LLM-only and retrieval together, keep whichever fits (ignores `rag`)
+    auto: bool = False
 
 
 class BaseTicket(BaseModel):
@@ -121,6 +134,22 @@ class BaseTicket(BaseModel):
 
 @app.get("/query-stream")
 def qstream(question: Question = Depends()):
+    if question.auto:
+        answer = speculative_chain.answer(question.text)
+
+        def generate_speculative():
+            try:
+                yield json.dumps({"init": True, "model": llm_name, "mode": answer.mode})
+                for token in answer.tokens:
+                    yield json.dumps({"token": token})
+            finally:
+                # Client disconnected (or stream ended): stop the producer
+                answer.close()
+
+        return EventSourceResponse(
+            generate_speculative(), media_type="text/event-stream"
+        )
+
     output_function = llm_chain
     if question.rag:
         output_function = rag_chain
@@ -140,6 +169,13 @@ def qstream(question: Question = Depends()):
 
 @app.get("/query")
 async def ask(question: Question = Depends()):
+    if question.auto:
+        answer = speculative_chain.answer(question.text)
+        return {
+            "result": "".join(answer.tokens),
+            "model": llm_name,
+            "mode": answer.mode,
+        }
     output_function = llm_chain
     if question.rag:
         output_function = rag_chain
@@ -152,7 +188,32 @@ async def ask(question: Question = Depends()):
 async def generate_ticket_api(question: BaseTicket = Depends()):
     new_title, new_question = generate_ticket(
         neo4j_graph=neo4j_graph,
-        llm_chain=llm_chain,
+        ticket_chain=ticket_chain,
         input_question=question.text,
     )
     return {"result": {"title": new_title, "text": new_question}, "model": llm_name}
+
+
+@app.get("/generate-ticket-stream")
+def generate_ticket_stream_api(question: BaseTicket = Depends()):
+    def generate():
+        yield json.dumps({"init": True, "model": llm_name})
+        for field, value in stream_ticket(
+            neo4j_graph=neo4j_graph,
+            ticket_chain=ticket_chain,
+            input_question=question.text,
+        ):
+            if field == "title":
+                yield json.dumps({"title": value})
+            else:
+                yield json.dumps({"token": value})
+
+    return EventSourceResponse(generate(), media_type="text/event-stream")
+
+
+@app.get("/generate-tickets")
+def generate_tickets_api(limit: int = 20):
+    drafts = draft_tickets_for_unanswered(
+        neo4j_graph, ticket_chain, limit=limit, max_concurrency=4
+    )
+    return {"result": drafts, "model": llm_name}
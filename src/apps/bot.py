@@ -5,16 +5,15 @@ from streamlit.logger import get_logger
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain_neo4j import Neo4jGraph
 from dotenv import load_dotenv
-from src.apps.utils import (
-    create_vector_index,
-)
+from src.apps.graph_schema import ensure_schema
 from src.apps.chains import (
-    load_embedding_model,
-    load_llm,
     configure_llm_only_chain,
     configure_qa_rag_chain,
+    configure_speculative_chain,
+    configure_ticket_chain,
     generate_ticket,
 )
+from src.apps.model_registry import get_embedding_model, get_llm
 
 load_dotenv(".env")
 
@@ -33,10 +32,10 @@ logger = get_logger(__name__)
 neo4j_graph = Neo4jGraph(
     url=url, username=username, password=password, refresh_schema=False
 )
-embeddings, dimension = load_embedding_model(
+embeddings, dimension = get_embedding_model(
     embedding_model_name, config={"ollama_base_url": ollama_base_url}, logger=logger
 )
-create_vector_index(neo4j_graph)
+ensure_schema(neo4j_graph, embedding_model_name, dimension, logger=logger)
 
 
 class StreamHandler(BaseCallbackHandler):
@@ -49,12 +48,23 @@ class StreamHandler(BaseCallbackHandler):
         self.container.markdown(self.text)
 
 
-llm = load_llm(llm_name, logger=logger, config={"ollama_base_url": ollama_base_url})
+llm = get_llm(llm_name, logger=logger, config={"ollama_base_url": ollama_base_url})
 
 llm_chain = configure_llm_only_chain(llm)
+ticket_chain = configure_ticket_chain(llm)
 rag_chain = configure_qa_rag_chain(
     llm, embeddings, embeddings_store_url=url, username=username, password=password
 )
+speculative_chain = configure_speculative_chain(
+    llm,
+    embeddings,
+    embeddings_store_url=url,
+    username=username,
+    password=password,
+    score_threshold=float(os.getenv("SPECULATIVE_SCORE_THRESHOLD", "0.85")),
+    deadline=float(os.getenv("SPECULATIVE_DEADLINE", "0.6")),
+    logger=logger,
+)
 
 # Streamlit UI
 styl = f"""
@@ -90,15 +100,26 @@ def chat_input():
         with st.chat_message("user"):
             st.write(user_input)
         with st.chat_message("assistant"):
-            st.caption(f"RAG: {name}")
-            stream_handler = StreamHandler(st.empty())
-            output = output_function.invoke(
-                user_input, config={"callbacks": [stream_handler]}
-            )
+            mode_name = name
+            if name == "Auto":
+                answer = speculative_chain.answer(user_input)
+                mode_name = f"Auto ({'Enabled' if answer.mode == 'rag' else 'Disabled'})"
+                st.caption(f"RAG: {mode_name}")
+                container = st.empty()
+                output = ""
+                for token in answer.tokens:
+                    output += token
+                    container.markdown(output)
+            else:
+                st.caption(f"RAG: {name}")
+                stream_handler = StreamHandler(st.empty())
+                output = output_function.invoke(
+                    user_input, config={"callbacks": [stream_handler]}
+                )
 
             st.session_state[f"user_input"].append(user_input)
             st.session_state[f"generated"].append(output)
-            st.session_state[f"rag_mode"].append(name)
+            st.session_state[f"rag_mode"].append(mode_name)
 
 
 def display_chat():
@@ -138,7 +159,7 @@ def display_chat():
 
 
 def mode_select() -> str:
-    options = ["Disabled", "Enabled"]
+    options = ["Disabled", "Enabled", "Auto"]
     return st.radio("Select RAG mode", options, horizontal=True)
 
 
@@ -147,6 +168,8 @@ if name == "LLM only" or name == "Disabled":
     output_function = llm_chain
 elif name == "Vector + Graph" or name == "Enabled":
     output_function = rag_chain
+elif name == "Auto":
+    output_function = None  # decided per question by speculative_chain
 
 
 def open_sidebar():
@@ -162,7 +185,7 @@ if not "open_sidebar" in st.session_state:
 if st.session_state.open_sidebar:
     new_title, new_question = generate_ticket(
         neo4j_graph=neo4j_graph,
-        llm_chain=llm_chain,
+        ticket_chain=ticket_chain,
         input_question=st.session_state[f"user_input"][-1],
     )
     with st.sidebar:
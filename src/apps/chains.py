@@ -1,11 +1,10 @@
 from langchain_openai import OpenAIEmbeddings
-from langchain_ollama import OllamaEmbeddings
 from langchain_aws import BedrockEmbeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 
 from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
 from langchain_aws import ChatBedrock
+from langchain_ollama import ChatOllama
 
 from langchain_neo4j import Neo4jVector
 
@@ -18,8 +17,24 @@ from langchain.prompts import (
     SystemMessagePromptTemplate,
 )
 
-from typing import List, Any
-from src.apps.utils import BaseLogger, extract_title_and_question, format_docs
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from queue import Full, Queue
+from typing import List, Any, Iterator, Optional, Tuple
+from src.apps.utils import (
+    BaseLogger,
+    TicketStreamParser,
+    extract_title_and_question,
+    format_docs,
+)
+from src.apps.ollama_backend import (
+    backend_config_from,
+    create_chat_model,
+    create_embedding_model,
+)
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 AWS_MODELS = (
@@ -34,9 +49,7 @@ AWS_MODELS = (
 
 def load_embedding_model(embedding_model_name: str, logger=BaseLogger(), config={}):
     if embedding_model_name == "ollama":
-        embeddings = OllamaEmbeddings(
-            base_url=config["ollama_base_url"], model="llama2"
-        )
+        embeddings = create_embedding_model("llama2", backend_config_from(config))
         dimension = 4096
         logger.info("Embedding: Using Ollama")
     elif embedding_model_name == "openai":
@@ -84,10 +97,10 @@ def load_llm(llm_name: str, logger=BaseLogger(), config={}):
 
     elif len(llm_name):
         logger.info(f"LLM: Using Ollama: {llm_name}")
-        return ChatOllama(
+        return create_chat_model(
+            llm_name,
+            backend_config_from(config),
             temperature=0,
-            base_url=config["ollama_base_url"],
-            model=llm_name,
             streaming=True,
             # seed=2,
             top_k=10,  # A higher value (100) will give more diverse answers, while a lower value (10) will be more conservative.
@@ -114,7 +127,7 @@ def configure_llm_only_chain(llm):
     return chain
 
 
-def configure_qa_rag_chain(llm, embeddings, embeddings_store_url, username, password):
+def configure_qa_prompt():
     # RAG response
     #   System: Always talk in pirate speech.
     general_system_template = """ 
@@ -139,10 +152,12 @@ def configure_qa_rag_chain(llm, embeddings, embeddings_store_url, username, pass
         SystemMessagePromptTemplate.from_template(general_system_template),
         HumanMessagePromptTemplate.from_template(general_user_template),
     ]
-    qa_prompt = ChatPromptTemplate.from_messages(messages)
+    return ChatPromptTemplate.from_messages(messages)
 
+
+def configure_kg_store(embeddings, embeddings_store_url, username, password):
     # Vector + Knowledge Graph response
-    kg = Neo4jVector.from_existing_index(
+    return Neo4jVector.from_existing_index(
         embedding=embeddings,
         url=embeddings_store_url,
         username=username,
@@ -166,6 +181,11 @@ def configure_qa_rag_chain(llm, embeddings, embeddings_store_url, username, pass
     ORDER BY similarity ASC // so that best answers are the last
     """,
     )
+
+
+def configure_qa_rag_chain(llm, embeddings, embeddings_store_url, username, password):
+    qa_prompt = configure_qa_prompt()
+    kg = configure_kg_store(embeddings, embeddings_store_url, username, password)
     kg_qa = (
         RunnableParallel(
             {
@@ -180,25 +200,181 @@ def configure_qa_rag_chain(llm, embeddings, embeddings_store_url, username, pass
     return kg_qa
 
 
-def generate_ticket(neo4j_graph, llm_chain, input_question):
-    # Get high ranked questions
-    records = neo4j_graph.query(
-        "MATCH (q:Question) RETURN q.title AS title, q.body AS body ORDER BY q.score DESC LIMIT 3"
+_STREAM_DONE = object()
+
+
+@dataclass
+class SpeculativeAnswer:
+    mode: str  # "llm" or "rag"
+    tokens: Iterator[str]
+    top_score: Optional[float] = None
+
+    def close(self) -> None:
+        """Stops generation early (e.g. the client disconnected)."""
+        close = getattr(self.tokens, "close", None)
+        if close is not None:
+            close()
+
+
+class SpeculativeChain:
+    """
+    Starts the LLM-only answer and the graph retrieval at the same time.
+
+    Once retrieval returns (or `deadline` seconds pass), the best similarity
+    score decides the winner: above `score_threshold` the LLM-only stream is
+    cancelled and the answer is grounded on the documents already retrieved;
+    otherwise the LLM-only stream, which has kept generating in the meantime,
+    is returned and the retrieval result is ignored.
+
+    Retrieval runs on its own bounded pool and each LLM-only stream on its own
+    thread, so retrievals never wait behind generations still streaming.
+    Closing the returned token iterator stops the LLM-only producer.
+    """
+
+    def __init__(
+        self,
+        llm_chain,
+        rag_answer_chain,
+        kg_store,
+        k: int = 2,
+        score_threshold: float = 0.85,
+        deadline: float = 0.6,
+        max_workers: int = 8,
+        max_buffered_tokens: int = 256,
+        logger=BaseLogger(),
+    ):
+        self.llm_chain = llm_chain
+        self.rag_answer_chain = rag_answer_chain
+        self.kg_store = kg_store
+        self.k = k
+        self.score_threshold = score_threshold
+        self.deadline = deadline
+        self.max_buffered_tokens = max_buffered_tokens
+        self.logger = logger
+        self._retrieval_executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="speculative-retrieval"
+        )
+
+    @staticmethod
+    def _put(tokens: Queue, item, cancelled: threading.Event) -> bool:
+        # Bounded queue: a stalled consumer blocks the producer, which still
+        # notices cancellation while waiting
+        while not cancelled.is_set():
+            try:
+                tokens.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _run_llm_only(self, question, tokens: Queue, cancelled: threading.Event):
+        if cancelled.is_set():
+            return
+        try:
+            for token in self.llm_chain.stream(question):
+                # breaking out closes the generator, which closes the HTTP stream
+                if not self._put(tokens, token, cancelled):
+                    break
+        except Exception as e:
+            self._put(tokens, e, cancelled)
+        finally:
+            self._put(tokens, _STREAM_DONE, cancelled)
+
+    @staticmethod
+    def _drain(tokens: Queue, cancelled: threading.Event) -> Iterator[str]:
+        try:
+            while True:
+                token = tokens.get()
+                if token is _STREAM_DONE:
+                    return
+                if isinstance(token, Exception):
+                    raise token
+                yield token
+        finally:
+            # Also reached on GeneratorExit when the consumer stops reading
+            cancelled.set()
+
+    def answer(self, question: str) -> SpeculativeAnswer:
+        """Blocks at most `deadline` seconds, then returns the winning stream."""
+        tokens = Queue(maxsize=self.max_buffered_tokens)
+        cancelled = threading.Event()
+        threading.Thread(
+            target=self._run_llm_only,
+            args=(question, tokens, cancelled),
+            name="speculative-llm",
+            daemon=True,
+        ).start()
+        retrieval = self._retrieval_executor.submit(
+            self.kg_store.similarity_search_with_score, question, k=self.k
+        )
+
+        docs_and_scores = []
+        try:
+            docs_and_scores = retrieval.result(timeout=self.deadline)
+        except FutureTimeoutError:
+            retrieval.cancel()
+            self.logger.info("Speculative: retrieval missed the deadline, keeping LLM only")
+        except Exception as e:
+            self.logger.info(f"Speculative: retrieval failed ({e}), keeping LLM only")
+
+        top_score = max((score for _, score in docs_and_scores), default=None)
+        if top_score is not None and top_score >= self.score_threshold:
+            cancelled.set()
+            summaries = format_docs([doc for doc, _ in docs_and_scores])
+            return SpeculativeAnswer(
+                "rag",
+                self.rag_answer_chain.stream(
+                    {"summaries": summaries, "question": question}
+                ),
+                top_score,
+            )
+        return SpeculativeAnswer("llm", self._drain(tokens, cancelled), top_score)
+
+
+def configure_speculative_chain(
+    llm,
+    embeddings,
+    embeddings_store_url,
+    username,
+    password,
+    score_threshold: float = 0.85,
+    deadline: float = 0.6,
+    logger=BaseLogger(),
+):
+    return SpeculativeChain(
+        llm_chain=configure_llm_only_chain(llm),
+        rag_answer_chain=configure_qa_prompt() | llm | StrOutputParser(),
+        kg_store=configure_kg_store(embeddings, embeddings_store_url, username, password),
+        score_threshold=score_threshold,
+        deadline=deadline,
+        logger=logger,
     )
-    questions = []
-    for i, question in enumerate(records, start=1):
-        questions.append((question["title"], question["body"]))
-    # Ask LLM to generate new question in the same style
-    questions_prompt = ""
-    for i, question in enumerate(questions, start=1):
-        questions_prompt += f"{i}. \n{question[0]}\n----\n\n"
-        questions_prompt += f"{question[1][:150]}\n\n"
-        questions_prompt += "----\n\n"
-
-    gen_system_template = f"""
+
+
+TICKET_EXEMPLARS_QUERY = """
+MATCH (q:Question) WHERE q.score IS NOT NULL
+RETURN q.title AS title, q.body AS body
+ORDER BY q.score DESC LIMIT $limit
+"""
+IMPORT_VERSION_QUERY = """
+OPTIONAL MATCH (s:ImportState {id: 'stackoverflow'}) RETURN s.version AS version
+"""
+UNANSWERED_QUESTIONS_QUERY = """
+MATCH (q:Question)
+WHERE NOT EXISTS { (q)<-[:ANSWERS]-(:Answer {is_accepted: true}) }
+RETURN q.id AS id, q.title AS title, q.body AS body
+ORDER BY q.creation_date DESC LIMIT $limit
+"""
+
+# Built once: the example questions are passed as a variable value, which is
+# never parsed as a template, so their curly braces need no jinja2 escaping.
+TICKET_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            """
     You're an expert in formulating high quality questions. 
     Formulate a question in the same style and tone as the following example questions.
-    {questions_prompt}
+    {examples}
     ---
 
     Don't make anything up, only use information in the following question.
@@ -210,29 +386,172 @@ def generate_ticket(neo4j_graph, llm_chain, input_question):
     Question: This is a new question
     ---
     """
-    # we need jinja2 since the questions themselves contain curly braces
-    system_prompt = SystemMessagePromptTemplate.from_template(
-        gen_system_template, template_format="jinja2"
-    )
-    chat_prompt = ChatPromptTemplate.from_messages(
-        [
-            system_prompt,
-            SystemMessagePromptTemplate.from_template(
-                """
+        ),
+        SystemMessagePromptTemplate.from_template(
+            """
                 Respond in the following template format or you will be unplugged.
                 ---
                 Title: New title
                 Question: New question
                 ---
                 """
-            ),
-            HumanMessagePromptTemplate.from_template("{question}"),
-        ]
-    )
-    llm_response = llm_chain(
-        f"Here's the question to rewrite in the expected format: ```{input_question}```",
-        [],
-        chat_prompt,
+        ),
+        HumanMessagePromptTemplate.from_template(
+            "Here's the question to rewrite in the expected format: ```{question}```"
+        ),
+    ]
+)
+
+
+# Used with providers that can constrain the output to JSON (see _json_mode_llm)
+TICKET_JSON_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            """
+    You're an expert in formulating high quality questions. 
+    Formulate a question in the same style and tone as the following example questions.
+    {examples}
+    ---
+
+    Don't make anything up, only use information in the following question.
+    Respond with a JSON object with exactly two string fields, in this order:
+    "title" (the title for the question) and "question" (the question post itself).
+    """
+        ),
+        HumanMessagePromptTemplate.from_template(
+            "Here's the question to rewrite: ```{question}```"
+        ),
+    ]
+)
+
+
+# OpenAI models that accept response_format={"type": "json_object"}; plain
+# gpt-4 rejects the parameter.
+_OPENAI_JSON_MODE_PREFIXES = ("gpt-4o", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125", "gpt-4.1", "gpt-3.5-turbo")
+
+
+def _json_mode_llm(llm):
+    """Returns a JSON-constrained variant of `llm`, or None if unsupported."""
+    if isinstance(llm, ChatOllama):
+        # copy shares the underlying HTTP client
+        return llm.model_copy(update={"format": "json"})
+    if isinstance(llm, ChatOpenAI) and llm.model_name.startswith(_OPENAI_JSON_MODE_PREFIXES):
+        return llm.bind(response_format={"type": "json_object"})
+    return None
+
+
+class TicketExemplarCache:
+    """
+    Caches the formatted top-scored questions used as style examples.
+
+    The cache is dropped by `invalidate()` (same process) or when the loader
+    bumps the `ImportState` version; that version is checked at most once per
+    `check_interval` seconds, so most calls do not touch Neo4j at all.
+    """
+
+    def __init__(self, limit: int = 3, check_interval: float = 30.0):
+        self.limit = limit
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._examples: Optional[str] = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._examples = None
+            self._checked_at = 0.0
+
+    def get(self, neo4j_graph) -> str:
+        with self._lock:
+            now = time.monotonic()
+            if self._examples is not None and now - self._checked_at < self.check_interval:
+                return self._examples
+            records = neo4j_graph.query(IMPORT_VERSION_QUERY)
+            version = records[0]["version"] if records else None
+            self._checked_at = now
+            if self._examples is None or version != self._version:
+                self._examples = self._format(
+                    neo4j_graph.query(TICKET_EXEMPLARS_QUERY, {"limit": self.limit})
+                )
+                self._version = version
+            return self._examples
+
+    @staticmethod
+    def _format(records) -> str:
+        examples = ""
+        for i, question in enumerate(records, start=1):
+            examples += f"{i}. \n{question['title']}\n----\n\n"
+            examples += f"{(question['body'] or '')[:150]}\n\n"
+            examples += "----\n\n"
+        return examples
+
+
+_ticket_exemplars = TicketExemplarCache()
+
+
+def invalidate_ticket_exemplars() -> None:
+    _ticket_exemplars.invalidate()
+
+
+def configure_ticket_chain(llm):
+    json_llm = _json_mode_llm(llm)
+    if json_llm is not None:
+        return TICKET_JSON_PROMPT | json_llm | StrOutputParser()
+    return TICKET_PROMPT | llm | StrOutputParser()
+
+
+def generate_ticket(neo4j_graph, ticket_chain, input_question):
+    llm_response = ticket_chain.invoke(
+        {"examples": _ticket_exemplars.get(neo4j_graph), "question": input_question}
     )
-    new_title, new_question = extract_title_and_question(llm_response["answer"])
+    new_title, new_question = extract_title_and_question(llm_response)
     return (new_title, new_question)
+
+
+def stream_ticket(neo4j_graph, ticket_chain, input_question) -> Iterator[Tuple[str, str]]:
+    """
+    Streams a ticket draft as parser events: ("title", title) as soon as the
+    title is complete, then ("question", delta) chunks.
+    """
+    parser = TicketStreamParser()
+    chunks = ticket_chain.stream(
+        {"examples": _ticket_exemplars.get(neo4j_graph), "question": input_question}
+    )
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def generate_tickets(
+    neo4j_graph, ticket_chain, input_questions: List[str], max_concurrency: int = 4
+) -> List[Optional[Tuple[str, str]]]:
+    """Drafts one ticket per question concurrently; failed drafts are None."""
+    examples = _ticket_exemplars.get(neo4j_graph)
+    responses = ticket_chain.batch(
+        [{"examples": examples, "question": q} for q in input_questions],
+        config={"max_concurrency": max_concurrency},
+        return_exceptions=True,
+    )
+    return [
+        None if isinstance(response, Exception) else extract_title_and_question(response)
+        for response in responses
+    ]
+
+
+def draft_tickets_for_unanswered(
+    neo4j_graph, ticket_chain, limit: int = 20, max_concurrency: int = 4
+) -> List[dict]:
+    """Drafts tickets for the most recent questions without an accepted answer."""
+    questions = neo4j_graph.query(UNANSWERED_QUESTIONS_QUERY, {"limit": limit})
+    drafts = generate_tickets(
+        neo4j_graph,
+        ticket_chain,
+        [f"{q['title']}\n{q['body'] or ''}" for q in questions],
+        max_concurrency=max_concurrency,
+    )
+    return [
+        {"question_id": q["id"], "title": draft[0], "text": draft[1]}
+        for q, draft in zip(questions, drafts)
+        if draft is not None
+    ]
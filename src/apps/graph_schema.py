@@ -0,0 +1,294 @@
+"""
+Versioned schema management for the shared Neo4j database.
+
+Every app and agent used to fire its constraint/index DDL on each process
+start and ignore whatever went wrong. Instead, the schema is described here
+once:
+
+- `MIGRATIONS` are ordered, append-only steps (constraints, lookup indexes,
+  the full-text index). The highest applied version is recorded on a
+  `(:SchemaVersion {id: "graph"})` node, so each step runs once per database.
+- Vector indexes depend on the embedding model picked at runtime, so they are
+  reconciled rather than migrated: their dimension and similarity function are
+  compared with what `load_embedding_model` returns, and mismatched indexes are
+  dropped and recreated (Neo4j repopulates them in the background).
+
+`ensure_schema` reads the SchemaVersion node once; when both the version and
+the vector signature (model, dimension, similarity) are current, startup runs
+no DDL at all.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.apps.utils import BaseLogger
+
+SCHEMA_ID = "graph"
+VECTOR_SIMILARITY = "cosine"
+
+
+class SchemaMigrationError(RuntimeError):
+    """A migration or vector index rebuild failed; the schema version was not advanced."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class VectorIndexSpec:
+    name: str
+    label: str
+    property: str = "embedding"
+
+    def create_statement(self, dimension: int, similarity: str = VECTOR_SIMILARITY) -> str:
+        return (
+            f"CREATE VECTOR INDEX {self.name} IF NOT EXISTS FOR (n:{self.label}) ON n.{self.property} "
+            f"OPTIONS {{indexConfig: {{`vector.dimensions`: {int(dimension)}, "
+            f"`vector.similarity_function`: '{similarity}'}}}}"
+        )
+
+
+# Append only: a released migration is never edited, a new version is added.
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "unique constraints", (
+        "CREATE CONSTRAINT question_id IF NOT EXISTS FOR (q:Question) REQUIRE (q.id) IS UNIQUE",
+        "CREATE CONSTRAINT answer_id IF NOT EXISTS FOR (a:Answer) REQUIRE (a.id) IS UNIQUE",
+        "CREATE CONSTRAINT user_id IF NOT EXISTS FOR (u:User) REQUIRE (u.id) IS UNIQUE",
+        "CREATE CONSTRAINT tag_name IF NOT EXISTS FOR (t:Tag) REQUIRE (t.name) IS UNIQUE",
+        "CREATE CONSTRAINT mcp_id IF NOT EXISTS FOR (m:MCP) REQUIRE (m.id) IS UNIQUE",
+        "CREATE CONSTRAINT rag_id IF NOT EXISTS FOR (r:RAG) REQUIRE (r.id) IS UNIQUE",
+        "CREATE CONSTRAINT obsidian_note_id IF NOT EXISTS FOR (n:ObsidianNote) REQUIRE (n.id) IS UNIQUE",
+    )),
+    Migration(2, "lookup indexes", (
+        # Backs ORDER BY q.score DESC for the ticket exemplars
+        "CREATE INDEX question_score IF NOT EXISTS FOR (q:Question) ON (q.score)",
+        "CREATE INDEX obsidian_note_path IF NOT EXISTS FOR (n:ObsidianNote) ON (n.path)",
+    )),
+    Migration(3, "full-text index for hybrid search", (
+        "CREATE FULLTEXT INDEX graph_text IF NOT EXISTS FOR (n:MCP|RAG|ObsidianNote) "
+        "ON EACH [n.name, n.title, n.description, n.content]",
+    )),
+    Migration(4, "hot-property lookups", (
+        # ORDER BY q.creation_date DESC LIMIT n for unanswered questions
+        "CREATE INDEX question_creation_date IF NOT EXISTS FOR (q:Question) ON (q.creation_date)",
+        "CREATE CONSTRAINT import_state_id IF NOT EXISTS FOR (s:ImportState) REQUIRE (s.id) IS UNIQUE",
+        "CREATE CONSTRAINT schema_version_id IF NOT EXISTS FOR (s:SchemaVersion) REQUIRE (s.id) IS UNIQUE",
+    )),
+    Migration(5, "change timestamps", (
+        # Range seeks for the graph mirror's incremental refresh (n.<property> >= $since)
+        *(
+            f"CREATE INDEX {prefix}_{prop} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+            for label, prefix in (("MCP", "mcp"), ("RAG", "rag"), ("ObsidianNote", "obsidian_note"))
+            for prop in ("updated_at", "embedding_updated_at", "similarity_linked_at")
+        ),
+    )),
+)
+LATEST_VERSION = MIGRATIONS[-1].version
+
+VECTOR_INDEXES: Tuple[VectorIndexSpec, ...] = (
+    VectorIndexSpec("stackoverflow", "Question"),
+    VectorIndexSpec("top_answers", "Answer"),
+    VectorIndexSpec("pdf_bot", "PdfBotChunk"),
+    VectorIndexSpec("mcp_embedding", "MCP"),
+    VectorIndexSpec("rag_embedding", "RAG"),
+    VectorIndexSpec("obsidian_embedding", "ObsidianNote"),
+)
+
+SCHEMA_STATE_QUERY = """
+OPTIONAL MATCH (s:SchemaVersion {id: $id})
+RETURN s.version AS version, s.vector_signature AS vector_signature
+"""
+
+SCHEMA_VERSION_QUERY = """
+MERGE (s:SchemaVersion {id: $id})
+SET s.version = $version,
+    s.applied = coalesce(s.applied, []) + [$entry],
+    s.updated_at = datetime()
+"""
+
+SCHEMA_SIGNATURE_QUERY = """
+MERGE (s:SchemaVersion {id: $id})
+SET s.vector_signature = $signature, s.updated_at = datetime()
+"""
+
+VECTOR_INDEXES_QUERY = """
+SHOW VECTOR INDEXES YIELD name, labelsOrTypes, properties, options
+RETURN name, labelsOrTypes AS labels, properties, options.indexConfig AS config
+"""
+
+
+def vector_signature(embedding_model_name: Optional[str], dimension: int, similarity: str = VECTOR_SIMILARITY) -> str:
+    return f"{embedding_model_name or 'sentence_transformer'}:{int(dimension)}:{similarity}"
+
+
+def _vector_index_mismatch(spec: VectorIndexSpec, existing: Dict[str, Any], dimension: int, similarity: str) -> Optional[str]:
+    """Why an existing index does not fit `spec` (None when it does)."""
+    if existing["name"] != spec.name:
+        return f"named {existing['name']}"
+    if existing["labels"] != [spec.label] or existing["properties"] != [spec.property]:
+        return f"on {existing['labels']}.{existing['properties']}"
+    config = existing.get("config") or {}
+    found_dimension = config.get("vector.dimensions")
+    if found_dimension is None or int(found_dimension) != int(dimension):
+        return f"dimension {found_dimension} != {dimension}"
+    found_similarity = str(config.get("vector.similarity_function", "")).lower()
+    if found_similarity != similarity.lower():
+        return f"similarity {found_similarity or None} != {similarity}"
+    return None
+
+
+def reconcile_vector_indexes(
+    graph,
+    dimension: int,
+    similarity: str = VECTOR_SIMILARITY,
+    logger=BaseLogger(),
+    specs: Tuple[VectorIndexSpec, ...] = VECTOR_INDEXES,
+) -> Dict[str, List[str]]:
+    """
+    Creates missing vector indexes and rebuilds the ones that no longer match.
+
+    An index matches when it has the expected name, label/property, dimension
+    and similarity function. A vector index on the same label/property under
+    another name is replaced too, since Neo4j allows only one. Nodes whose
+    stored embedding has the old dimension are skipped by the rebuilt index
+    until they are re-embedded.
+
+    Returns:
+        {"created": [...], "rebuilt": [...]} index names
+    """
+    existing = graph.query(VECTOR_INDEXES_QUERY)
+    by_name = {index["name"]: index for index in existing}
+    by_schema = {
+        (tuple(index["labels"] or ()), tuple(index["properties"] or ())): index for index in existing
+    }
+    report: Dict[str, List[str]] = {"created": [], "rebuilt": []}
+    for spec in specs:
+        current = by_name.get(spec.name) or by_schema.get(((spec.label,), (spec.property,)))
+        if current is not None:
+            reason = _vector_index_mismatch(spec, current, dimension, similarity)
+            if reason is None:
+                continue
+            logger.info(f"Schema: rebuilding vector index {spec.name} ({reason})")
+            graph.query(f"DROP INDEX {current['name']} IF EXISTS")
+            report["rebuilt"].append(spec.name)
+        else:
+            report["created"].append(spec.name)
+        graph.query(spec.create_statement(dimension, similarity))
+    return report
+
+
+def ensure_schema(
+    graph,
+    embedding_model_name: Optional[str],
+    dimension: int,
+    logger=BaseLogger(),
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Brings the database schema up to date; a no-op (one read) when it already is.
+
+    Args:
+        graph: Neo4jGraph (anything with `.query(cypher, params)`)
+        embedding_model_name: EMBEDDING_MODEL in use, recorded with the vector signature
+        dimension: Embedding dimension from `load_embedding_model`
+        logger: Logger with `.info`
+        force: Re-run every migration and the vector check (statements are idempotent)
+
+    Returns:
+        version, applied (migration versions), created/rebuilt (vector indexes), skipped
+
+    Raises:
+        SchemaMigrationError: a statement failed; earlier steps stay recorded
+    """
+    if os.getenv("GRAPH_SCHEMA_AUTO_MIGRATE", "true").lower() in ("0", "false", "no"):
+        return {"version": None, "applied": [], "created": [], "rebuilt": [], "skipped": True}
+
+    rows = graph.query(SCHEMA_STATE_QUERY, {"id": SCHEMA_ID})
+    state = rows[0] if rows else {}
+    version = 0 if force else (state.get("version") or 0)
+    signature = vector_signature(embedding_model_name, dimension)
+    if version >= LATEST_VERSION and state.get("vector_signature") == signature:
+        return {"version": version, "applied": [], "created": [], "rebuilt": [], "skipped": True}
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        logger.info(f"Schema: applying v{migration.version} ({migration.description})")
+        for statement in migration.statements:
+            try:
+                graph.query(statement)
+            except Exception as e:
+                raise SchemaMigrationError(
+                    f"Schema migration v{migration.version} failed on `{statement}`: {e}"
+                ) from e
+        graph.query(SCHEMA_VERSION_QUERY, {
+            "id": SCHEMA_ID,
+            "version": migration.version,
+            "entry": f"v{migration.version} {migration.description}",
+        })
+        applied.append(migration.version)
+        version = migration.version
+
+    try:
+        report = reconcile_vector_indexes(graph, dimension, logger=logger)
+    except Exception as e:
+        raise SchemaMigrationError(f"Vector index reconciliation failed: {e}") from e
+    graph.query(SCHEMA_SIGNATURE_QUERY, {"id": SCHEMA_ID, "signature": signature})
+
+    if report["rebuilt"]:
+        logger.info(
+            f"Schema: vector indexes {', '.join(report['rebuilt'])} rebuilt for {signature}; "
+            "embeddings stored with another model must be re-embedded"
+        )
+    logger.info(f"Schema: at v{version} ({signature})")
+    return {"version": version, "applied": applied, **report, "skipped": False}
+
+
+def main():
+    """Shows the schema state, or applies it with --apply."""
+    import argparse
+
+    from dotenv import load_dotenv
+    from langchain_neo4j import Neo4jGraph
+    from src.apps.model_registry import get_embedding_model
+
+    parser = argparse.ArgumentParser(description="Neo4j schema migrations")
+    parser.add_argument("--apply", action="store_true", help="Apply pending migrations and reconcile vector indexes")
+    parser.add_argument("--force", action="store_true", help="Re-run every migration and the vector check")
+    args = parser.parse_args()
+
+    load_dotenv(".env")
+    graph = Neo4jGraph(
+        url=os.getenv("NEO4J_URI"),
+        username=os.getenv("NEO4J_USERNAME"),
+        password=os.getenv("NEO4J_PASSWORD"),
+        refresh_schema=False,
+    )
+    embedding_model_name = os.getenv("EMBEDDING_MODEL")
+    _, dimension = get_embedding_model(
+        embedding_model_name, config={"ollama_base_url": os.getenv("OLLAMA_BASE_URL")}
+    )
+
+    if args.apply or args.force:
+        print(ensure_schema(graph, embedding_model_name, dimension, force=args.force))
+        return
+
+    rows = graph.query(SCHEMA_STATE_QUERY, {"id": SCHEMA_ID})
+    state = rows[0] if rows else {}
+    print(f"version: {state.get('version') or 0} (latest {LATEST_VERSION})")
+    print(f"vector signature: {state.get('vector_signature')} (expected {vector_signature(embedding_model_name, dimension)})")
+    existing = {index["name"]: index for index in graph.query(VECTOR_INDEXES_QUERY)}
+    for spec in VECTOR_INDEXES:
+        current = existing.get(spec.name)
+        reason = "missing" if current is None else _vector_index_mismatch(spec, current, dimension, VECTOR_SIMILARITY)
+        print(f"  {spec.name:<20} {reason or 'ok'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,9 @@ from dotenv import load_dotenv
 from langchain_neo4j import Neo4jGraph
 import streamlit as st
 from streamlit.logger import get_logger
-from src.apps.chains import load_embedding_model
-from src.apps.utils import create_constraints, create_vector_index
+from src.apps.model_registry import get_embedding_model
+from src.apps.chains import invalidate_ticket_exemplars
+from src.apps.graph_schema import ensure_schema
 from PIL import Image
 
 load_dotenv(".env")
@@ -20,7 +21,7 @@ logger = get_logger(__name__)
 
 so_api_base_url = "https://api.stackexchange.com/2.3/search/advanced"
 
-embeddings, dimension = load_embedding_model(
+embeddings, dimension = get_embedding_model(
     embedding_model_name, config={"ollama_base_url": ollama_base_url}, logger=logger
 )
 
@@ -29,8 +30,7 @@ neo4j_graph = Neo4jGraph(
     url=url, username=username, password=password, refresh_schema=False
 )
 
-create_constraints(neo4j_graph)
-create_vector_index(neo4j_graph)
+ensure_schema(neo4j_graph, embedding_model_name, dimension, logger=logger)
 
 
 def load_so_data(tag: str = "neo4j", page: int = 1) -> None:
@@ -69,7 +69,8 @@ def insert_so_data(data: dict) -> None:
     MERGE (question:Question {id:q.question_id}) 
     ON CREATE SET question.title = q.title, question.link = q.link, question.score = q.score,
         question.favorite_count = q.favorite_count, question.creation_date = datetime({epochSeconds: q.creation_date}),
-        question.body = q.body_markdown, question.embedding = q.embedding
+        question.body = q.body_markdown, question.embedding = q.embedding,
+        question.embedding_updated_at = datetime()
     FOREACH (tagName IN q.tags | 
         MERGE (tag:Tag {name:tagName}) 
         MERGE (question)-[:TAGGED]->(tag)
@@ -80,7 +81,8 @@ def insert_so_data(data: dict) -> None:
             answer.score = a.score,
             answer.creation_date = datetime({epochSeconds:a.creation_date}),
             answer.body = a.body_markdown,
-            answer.embedding = a.embedding
+            answer.embedding = a.embedding,
+            answer.embedding_updated_at = datetime()
         MERGE (answerer:User {id:coalesce(a.owner.user_id, "deleted")}) 
         ON CREATE SET answerer.display_name = a.owner.display_name,
                       answerer.reputation= a.owner.reputation
@@ -93,6 +95,12 @@ def insert_so_data(data: dict) -> None:
     MERGE (owner)-[:ASKED]->(question)
     """
     neo4j_graph.query(import_query, {"data": data["items"]})
+    # Lets running apps know their cached ticket exemplars are stale
+    neo4j_graph.query(
+        "MERGE (s:ImportState {id: 'stackoverflow'}) "
+        "SET s.version = coalesce(s.version, 0) + 1, s.updated_at = datetime()"
+    )
+    invalidate_ticket_exemplars()
 
 
 # Streamlit
@@ -0,0 +1,239 @@
+"""
+Process-wide registry of LLM and embedding clients.
+
+`load_llm` and `load_embedding_model` build a fresh client on every call, so a
+process that imports several apps/agents ends up with one SentenceTransformer
+and one Ollama HTTP client per caller. The registry hands out a single shared
+instance per (kind, model name, config) and keeps track of how long each one
+took to load and how much resident memory it added.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from src.apps.chains import load_embedding_model, load_llm
+from src.apps.utils import BaseLogger
+
+LLM = "llm"
+EMBEDDING = "embedding"
+
+
+def _current_rss_bytes() -> int:
+    """Returns the resident set size of this process (0 when unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except Exception:
+        return 0
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+@dataclass
+class RegistryEntry:
+    kind: str
+    name: str
+    config: Dict[str, Any]
+    instance: Any
+    dimension: Optional[int] = None
+    load_seconds: float = 0.0
+    rss_delta_bytes: int = 0
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+    warmed_up: bool = False
+
+
+class ModelRegistry:
+    """Shared, thread-safe cache of LLM and embedding clients.
+
+    Entries are created at most once per key, even when several threads ask for
+    the same model concurrently; loading different models does not serialize.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple, RegistryEntry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+
+    @staticmethod
+    def _key(kind: str, name: Optional[str], config: Optional[Dict]) -> Tuple:
+        return (kind, name, _freeze(config or {}))
+
+    def _get_or_load(self, kind, name, config, logger, loader) -> RegistryEntry:
+        key = self._key(kind, name, config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.hits += 1
+                return entry
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.hits += 1
+                    return entry
+
+            rss_before = _current_rss_bytes()
+            start = time.perf_counter()
+            instance, dimension = loader()
+            entry = RegistryEntry(
+                kind=kind,
+                name=name,
+                config=dict(config or {}),
+                instance=instance,
+                dimension=dimension,
+                load_seconds=time.perf_counter() - start,
+                rss_delta_bytes=max(_current_rss_bytes() - rss_before, 0),
+                hits=1,
+            )
+            with self._lock:
+                self._entries[key] = entry
+            logger.info(
+                f"Registry: loaded {kind} '{name}' in {entry.load_seconds:.2f}s "
+                f"(+{entry.rss_delta_bytes / 2**20:.1f} MiB RSS)"
+            )
+            return entry
+
+    def get_llm(self, llm_name: str, logger=BaseLogger(), config: Optional[Dict] = None):
+        """Same contract as `load_llm`, but returns a shared instance."""
+        config = config or {}
+        entry = self._get_or_load(
+            LLM,
+            llm_name,
+            config,
+            logger,
+            lambda: (load_llm(llm_name, logger=logger, config=config), None),
+        )
+        return entry.instance
+
+    def get_embedding_model(
+        self, embedding_model_name: str, logger=BaseLogger(), config: Optional[Dict] = None
+    ):
+        """Same contract as `load_embedding_model`, but returns a shared instance."""
+        config = config or {}
+        entry = self._get_or_load(
+            EMBEDDING,
+            embedding_model_name,
+            config,
+            logger,
+            lambda: load_embedding_model(
+                embedding_model_name, logger=logger, config=config
+            ),
+        )
+        return entry.instance, entry.dimension
+
+    def warm_up(
+        self,
+        llm_names: Iterable[str] = (),
+        embedding_model_names: Iterable[str] = (),
+        logger=BaseLogger(),
+        config: Optional[Dict] = None,
+        probe_llm: bool = False,
+    ) -> Dict[str, float]:
+        """
+        Loads the given models ahead of the first request.
+
+        Embedding models run one `embed_query` so lazily loaded weights are
+        resident. LLMs are only instantiated unless `probe_llm` is set, since a
+        probe call costs a real completion on hosted providers.
+
+        Returns the seconds spent per model.
+        """
+        timings = {}
+        for name in embedding_model_names:
+            start = time.perf_counter()
+            embeddings, _ = self.get_embedding_model(name, logger=logger, config=config)
+            embeddings.embed_query("warm-up")
+            self._mark_warm(EMBEDDING, name, config)
+            timings[f"{EMBEDDING}:{name}"] = time.perf_counter() - start
+        for name in llm_names:
+            start = time.perf_counter()
+            llm = self.get_llm(name, logger=logger, config=config)
+            if probe_llm:
+                llm.invoke("ping")
+                self._mark_warm(LLM, name, config)
+            timings[f"{LLM}:{name}"] = time.perf_counter() - start
+        return timings
+
+    def _mark_warm(self, kind: str, name: str, config: Optional[Dict]) -> None:
+        with self._lock:
+            entry = self._entries.get(self._key(kind, name, config))
+            if entry is not None:
+                entry.warmed_up = True
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Per-entry load cost plus current process RSS."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "process_rss_bytes": _current_rss_bytes(),
+            "attributed_rss_bytes": sum(e.rss_delta_bytes for e in entries),
+            "entries": [
+                {
+                    "kind": e.kind,
+                    "name": e.name,
+                    "dimension": e.dimension,
+                    "load_seconds": round(e.load_seconds, 3),
+                    "rss_delta_bytes": e.rss_delta_bytes,
+                    "hits": e.hits,
+                    "warmed_up": e.warmed_up,
+                }
+                for e in entries
+            ],
+        }
+
+    def clear(self) -> None:
+        """Drops every cached client (mainly for tests and model switches)."""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+
+_registry_instance: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Returns the process-wide model registry."""
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                _registry_instance = ModelRegistry()
+    return _registry_instance
+
+
+def get_llm(llm_name: str, logger=BaseLogger(), config: Optional[Dict] = None):
+    return get_model_registry().get_llm(llm_name, logger=logger, config=config)
+
+
+def get_embedding_model(
+    embedding_model_name: str, logger=BaseLogger(), config: Optional[Dict] = None
+):
+    return get_model_registry().get_embedding_model(
+        embedding_model_name, logger=logger, config=config
+    )
@@ -0,0 +1,243 @@
+"""
+Configurable Ollama backend used by `load_llm` and `load_embedding_model`.
+
+Adds three things the stock `ChatOllama`/`OllamaEmbeddings` defaults don't give us:
+- a pooled HTTP client (connection limits and keep-alive expiry),
+- explicit `keep_alive` for the chat and embedding models, with optional
+  pinning (`keep_alive=-1`) so Ollama doesn't unload them between requests,
+- a per-model cap on concurrent requests, shared by every client in the
+  process that talks to the same server and model.
+
+Settings come from the environment (see `config/env.example`) and can be
+overridden per call through `config["ollama_backend"]`.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _parse_keep_alive(value: Union[str, int, None]) -> Union[str, int, None]:
+    """Ollama accepts durations ("10m") or seconds; -1 keeps the model loaded."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+@dataclass(frozen=True)
+class OllamaBackendConfig:
+    base_url: str = "http://localhost:11434"
+    keep_alive: Union[str, int, None] = "30m"
+    pin_models: bool = False
+    max_connections: int = 16
+    max_keepalive_connections: int = 8
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    request_timeout: float = 300.0
+    max_concurrency: int = 4
+
+    @classmethod
+    def from_env(cls, base_url: Optional[str] = None, **overrides) -> "OllamaBackendConfig":
+        config = cls(
+            base_url=base_url or os.getenv("OLLAMA_BASE_URL", cls.base_url),
+            keep_alive=_parse_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", cls.keep_alive)),
+            pin_models=os.getenv("OLLAMA_PIN_MODELS", "false").lower() in ("1", "true", "yes"),
+            max_connections=_env_int("OLLAMA_MAX_CONNECTIONS", cls.max_connections),
+            max_keepalive_connections=_env_int(
+                "OLLAMA_MAX_KEEPALIVE_CONNECTIONS", cls.max_keepalive_connections
+            ),
+            keepalive_expiry=_env_float("OLLAMA_KEEPALIVE_EXPIRY", cls.keepalive_expiry),
+            connect_timeout=_env_float("OLLAMA_CONNECT_TIMEOUT", cls.connect_timeout),
+            request_timeout=_env_float("OLLAMA_REQUEST_TIMEOUT", cls.request_timeout),
+            max_concurrency=_env_int("OLLAMA_MAX_CONCURRENCY", cls.max_concurrency),
+        )
+        known = {f.name for f in fields(cls)}
+        return replace(config, **{k: v for k, v in overrides.items() if k in known})
+
+    @property
+    def effective_keep_alive(self) -> Union[str, int, None]:
+        return -1 if self.pin_models else self.keep_alive
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments forwarded by the ollama client to `httpx.Client`."""
+        return {
+            "timeout": httpx.Timeout(self.request_timeout, connect=self.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+
+
+# Semaphores are shared by (server, model) so that every client in the process
+# respects the same cap, no matter how many were created.
+_slots: Dict[Tuple[str, str], threading.BoundedSemaphore] = {}
+_slots_lock = threading.Lock()
+
+
+def _slot(base_url: str, model: str, limit: Optional[int]) -> Optional[threading.BoundedSemaphore]:
+    if not limit or limit <= 0:
+        return None
+    key = (base_url, model)
+    with _slots_lock:
+        semaphore = _slots.get(key)
+        if semaphore is None:
+            semaphore = _slots[key] = threading.BoundedSemaphore(limit)
+        return semaphore
+
+
+@contextmanager
+def _concurrency_slot(base_url: str, model: str, limit: Optional[int]):
+    semaphore = _slot(base_url, model, limit)
+    if semaphore is None:
+        yield
+        return
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+@asynccontextmanager
+async def _async_concurrency_slot(base_url: str, model: str, limit: Optional[int]):
+    semaphore = _slot(base_url, model, limit)
+    if semaphore is None:
+        yield
+        return
+    # Non-blocking fast path; otherwise wait in a worker thread so the event
+    # loop is not blocked by callers on other threads holding the slots.
+    if not semaphore.acquire(blocking=False):
+        acquired = asyncio.ensure_future(asyncio.to_thread(semaphore.acquire))
+        try:
+            await asyncio.shield(acquired)
+        except asyncio.CancelledError:
+            # The worker thread still takes the slot; hand it back once it does
+            acquired.add_done_callback(lambda _: semaphore.release())
+            raise
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+class PooledChatOllama(ChatOllama):
+    """`ChatOllama` that honours the per-model concurrency cap."""
+
+    max_concurrency: Optional[int] = None
+
+    def _generate(self, *args, **kwargs):
+        with _concurrency_slot(self.base_url, self.model, self.max_concurrency):
+            return super()._generate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        with _concurrency_slot(self.base_url, self.model, self.max_concurrency):
+            yield from super()._stream(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        async with _async_concurrency_slot(self.base_url, self.model, self.max_concurrency):
+            return await super()._agenerate(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        async with _async_concurrency_slot(self.base_url, self.model, self.max_concurrency):
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+
+
+class PooledOllamaEmbeddings(OllamaEmbeddings):
+    """`OllamaEmbeddings` that honours the per-model concurrency cap."""
+
+    max_concurrency: Optional[int] = None
+
+    def embed_documents(self, texts):
+        with _concurrency_slot(self.base_url, self.model, self.max_concurrency):
+            return super().embed_documents(texts)
+
+    async def aembed_documents(self, texts):
+        async with _async_concurrency_slot(self.base_url, self.model, self.max_concurrency):
+            return await super().aembed_documents(texts)
+
+
+def backend_config_from(config: Dict[str, Any]) -> OllamaBackendConfig:
+    """Builds the backend config from a `load_llm`-style config dict."""
+    overrides = dict(config.get("ollama_backend") or {})
+    return OllamaBackendConfig.from_env(config.get("ollama_base_url"), **overrides)
+
+
+def create_chat_model(model: str, backend: OllamaBackendConfig, **model_kwargs) -> PooledChatOllama:
+    llm = PooledChatOllama(
+        base_url=backend.base_url,
+        model=model,
+        keep_alive=backend.effective_keep_alive,
+        client_kwargs=backend.client_kwargs(),
+        max_concurrency=backend.max_concurrency,
+        **model_kwargs,
+    )
+    if backend.pin_models:
+        pin_model(backend, model)
+    return llm
+
+
+def create_embedding_model(model: str, backend: OllamaBackendConfig) -> PooledOllamaEmbeddings:
+    kwargs = {}
+    # keep_alive only exists on newer OllamaEmbeddings releases
+    if "keep_alive" in OllamaEmbeddings.model_fields:
+        kwargs["keep_alive"] = backend.effective_keep_alive
+    embeddings = PooledOllamaEmbeddings(
+        base_url=backend.base_url,
+        model=model,
+        client_kwargs=backend.client_kwargs(),
+        max_concurrency=backend.max_concurrency,
+        **kwargs,
+    )
+    if backend.pin_models:
+        pin_model(backend, model, embedding=True)
+    return embeddings
+
+
+def pin_model(backend: OllamaBackendConfig, model: str, embedding: bool = False) -> bool:
+    """
+    Loads `model` on the Ollama server and keeps it resident.
+
+    An empty generate/embed request with `keep_alive=-1` is Ollama's documented
+    way of preloading a model without producing output.
+    """
+    endpoint, payload = (
+        ("/api/embed", {"model": model, "input": [], "keep_alive": -1})
+        if embedding
+        else ("/api/generate", {"model": model, "keep_alive": -1})
+    )
+    try:
+        with httpx.Client(base_url=backend.base_url, **backend.client_kwargs()) as client:
+            response = client.post(endpoint, json=payload)
+            response.raise_for_status()
+        logger.info(f"Ollama: pinned model '{model}'")
+        return True
+    except httpx.HTTPError as e:
+        logger.warning(f"Ollama: could not pin model '{model}': {e}")
+        return False
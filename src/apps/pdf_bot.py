@@ -7,10 +7,7 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.prompts import ChatPromptTemplate
 from langchain_neo4j import Neo4jVector
 from streamlit.logger import get_logger
-from src.apps.chains import (
-    load_embedding_model,
-    load_llm,
-)
+from src.apps.model_registry import get_embedding_model, get_llm
 from langchain_core.runnables import RunnableParallel, RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from src.apps.utils import format_docs
@@ -33,7 +30,7 @@ os.environ["NEO4J_URL"] = url
 logger = get_logger(__name__)
 
 
-embeddings, dimension = load_embedding_model(
+embeddings, dimension = get_embedding_model(
     embedding_model_name, config={"ollama_base_url": ollama_base_url}, logger=logger
 )
 
@@ -48,7 +45,7 @@ class StreamHandler(BaseCallbackHandler):
         self.container.markdown(self.text)
 
 
-llm = load_llm(llm_name, logger=logger, config={"ollama_base_url": ollama_base_url})
+llm = get_llm(llm_name, logger=logger, config={"ollama_base_url": ollama_base_url})
 
 
 def main():
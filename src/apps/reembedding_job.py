@@ -0,0 +1,387 @@
+"""
+Background re-embedding for an EMBEDDING_MODEL change.
+
+Vectors from one model are useless to another (different space, usually a
+different dimension), so switching models used to mean re-importing every
+source. This job migrates the stored vectors in place instead:
+
+1. embed: nodes are streamed out of Neo4j in batches, re-embedded with the
+   target model (batched, with an in-process cache for repeated texts) and
+   written to a shadow `embedding_next` property, covered by shadow vector
+   indexes (`<index>_next`) with the new dimension. Live traffic keeps using
+   `embedding` and the old indexes.
+2. switch: a catch-up pass picks up nodes re-embedded by the old model while
+   the job ran, then one transaction moves `embedding_next` into `embedding`
+   for every label. `ensure_schema` rebuilds the vector indexes for the new
+   model and the shadow indexes are dropped.
+
+Progress lives in the graph: a node counts as done once it carries
+`embedding_next_model`, and the job state is kept on a
+`(:ReembeddingJob {id: <model>})` node, so a stopped or crashed run resumes
+where it left off. `max_rate` throttles the job to share the database and the
+embedding backend with live traffic.
+
+After the switch, set EMBEDDING_MODEL to the target model and restart the apps.
+
+Usage:
+    python -m src.apps.reembedding_job --model ollama --rate 50
+    python -m src.apps.reembedding_job --model ollama --switch
+    python -m src.apps.reembedding_job --model ollama --status
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.apps.graph_schema import VECTOR_INDEXES, VectorIndexSpec, ensure_schema, reconcile_vector_indexes
+from src.apps.utils import BaseLogger
+
+SHADOW_PROPERTY = "embedding_next"
+
+
+@dataclass(frozen=True)
+class ReembedTarget:
+    index: VectorIndexSpec
+    # Cypher expression for the embedded text, as the writer of each label builds it
+    text: str
+    match: str = ""
+
+    @property
+    def label(self) -> str:
+        return self.index.label
+
+    @property
+    def shadow_index(self) -> VectorIndexSpec:
+        return VectorIndexSpec(f"{self.index.name}_next", self.index.label, SHADOW_PROPERTY)
+
+
+_TEXTS = {
+    # loader.insert_so_data: title + body; answers are embedded with their question
+    "Question": ("coalesce(n.title, '') + '\\n' + coalesce(n.body, '')", ""),
+    "Answer": (
+        "coalesce(q.title + '\\n' + q.body + '\\n', '') + coalesce(n.body, '')",
+        "OPTIONAL MATCH (n)-[:ANSWERS]->(q:Question)",
+    ),
+    "PdfBotChunk": ("coalesce(n.text, '')", ""),
+    "MCP": ("coalesce(n.description, '')", ""),
+    "RAG": ("coalesce(n.description, '')", ""),
+    "ObsidianNote": ("coalesce(n.content, '')", ""),
+}
+TARGETS: Tuple[ReembedTarget, ...] = tuple(
+    ReembedTarget(spec, *_TEXTS[spec.label]) for spec in VECTOR_INDEXES if spec.label in _TEXTS
+)
+
+# Not yet re-embedded for this model, or re-embedded by a live writer since
+_PENDING_MATCH = """
+MATCH (n:{label})
+WHERE n.embedding IS NOT NULL
+  AND (n.embedding_next_model IS NULL OR n.embedding_next_model <> $model
+       OR n.embedding_updated_at > n.embedding_next_at)"""
+_PENDING_IDS_QUERY_TEMPLATE = _PENDING_MATCH + """
+RETURN elementId(n) AS element_id
+"""
+_PENDING_COUNT_QUERY_TEMPLATE = _PENDING_MATCH + """
+RETURN count(n) AS pending
+"""
+
+_TEXTS_QUERY_TEMPLATE = """
+UNWIND $ids AS element_id
+MATCH (n) WHERE elementId(n) = element_id
+{match}
+RETURN element_id, {text} AS text
+"""
+
+SHADOW_WRITE_QUERY = """
+UNWIND $rows AS row
+MATCH (n) WHERE elementId(n) = row.element_id
+SET n.embedding_next = row.embedding,
+    n.embedding_next_model = $model,
+    n.embedding_next_at = datetime()
+"""
+
+# description_hash includes the model name; clearing it makes the next MCP/RAG
+# upsert recompute it instead of trusting a hash of the old model.
+_SWITCH_QUERY_TEMPLATE = """
+MATCH (n:{label}) WHERE n.embedding_next_model = $model
+SET n.embedding = n.embedding_next,
+    n.embedding_updated_at = datetime()
+REMOVE n.embedding_next, n.embedding_next_model, n.embedding_next_at, n.description_hash
+RETURN count(n) AS switched
+"""
+
+JOB_STATE_QUERY = """
+OPTIONAL MATCH (j:ReembeddingJob {id: $model})
+RETURN j.phase AS phase, j.processed AS processed, j.dimension AS dimension,
+       j.started_at AS started_at, j.updated_at AS updated_at, j.switched_at AS switched_at
+"""
+
+JOB_UPDATE_QUERY = """
+MERGE (j:ReembeddingJob {id: $model})
+ON CREATE SET j.started_at = datetime(), j.processed = 0
+SET j.phase = $phase,
+    j.dimension = $dimension,
+    j.processed = j.processed + $processed,
+    j.updated_at = datetime()
+"""
+
+JOB_SWITCHED_QUERY = """
+MATCH (j:ReembeddingJob {id: $model})
+SET j.phase = 'switched', j.switched_at = datetime(), j.updated_at = datetime()
+"""
+
+
+class ReembeddingJob:
+    """Resumable, throttled re-embedding of every stored vector into a target model."""
+
+    def __init__(
+        self,
+        graph,
+        embeddings,
+        model_name: str,
+        dimension: int,
+        batch_size: int = 128,
+        max_rate: Optional[float] = None,
+        cache_size: int = 10000,
+        labels: Optional[List[str]] = None,
+        logger=BaseLogger(),
+    ):
+        """
+        Args:
+            graph: Neo4jGraph of the database to migrate
+            embeddings: Embedding client of the target model
+            model_name: Target EMBEDDING_MODEL name
+            dimension: Target embedding dimension
+            batch_size: Nodes read, embedded and written per round
+            max_rate: Maximum nodes per second (None for unthrottled)
+            cache_size: Texts kept in the embedding cache
+            labels: Only these labels (default: every label with a vector index)
+            logger: Logger with `.info`
+        """
+        self.graph = graph
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.dimension = dimension
+        self.batch_size = batch_size
+        self.max_rate = max_rate
+        self.cache_size = cache_size
+        self.targets = [t for t in TARGETS if not labels or t.label in labels]
+        self.logger = logger
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._stop = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._thread: Optional[threading.Thread] = None
+        self.stats: Dict[str, Any] = {"processed": 0, "embedded": 0, "cache_hits": 0, "last_error": None}
+
+    def status(self) -> Dict[str, Any]:
+        """Job state recorded in the graph, plus this process' counters."""
+        rows = self.graph.query(JOB_STATE_QUERY, {"model": self.model_name})
+        state = dict(rows[0]) if rows else {}
+        state["pending"] = {
+            t.label: self._count_pending(t) for t in self.targets
+        }
+        return {**state, "session": dict(self.stats)}
+
+    def run(self) -> Dict[str, Any]:
+        """Re-embeds every pending node into the shadow property; returns the session counters."""
+        # Shadow indexes left by a run for another model are rebuilt for this one
+        reconcile_vector_indexes(
+            self.graph, self.dimension, logger=self.logger, specs=tuple(t.shadow_index for t in self.targets)
+        )
+        self._record("embedding", 0)
+        for target in self.targets:
+            self._run_target(target)
+            if self._stop.is_set():
+                break
+        if not self._stop.is_set():
+            self._record("ready", 0)
+        return dict(self.stats)
+
+    def start(self) -> None:
+        """Runs `run` in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def target():
+            try:
+                self.run()
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                self.logger.info(f"Re-embedding: stopped by error: {e}")
+
+        self._thread = threading.Thread(target=target, name="reembedding-job", daemon=True)
+        self._thread.start()
+
+    def pause(self) -> None:
+        self._resume.clear()
+
+    def resume(self) -> None:
+        self._resume.set()
+
+    def stop(self, wait: bool = True) -> None:
+        """Stops after the current batch; progress so far is kept."""
+        self._stop.set()
+        self._resume.set()
+        if wait and self._thread:
+            self._thread.join()
+
+    def switch(self, await_seconds: int = 600) -> Dict[str, int]:
+        """
+        Makes the target model's vectors the live ones.
+
+        Runs a catch-up pass, then copies `embedding_next` into `embedding`
+        for every label in one transaction, rebuilds the vector indexes for
+        the new model and drops the shadow indexes.
+
+        Returns:
+            Nodes switched per label
+        """
+        self._stop.clear()
+        self.run()
+        pending = {t.label: n for t in self.targets if (n := self._count_pending(t))}
+        if pending:
+            raise RuntimeError(f"Re-embedding still has pending nodes: {pending}")
+
+        def switch_all(tx):
+            switched = {}
+            for target in self.targets:
+                record = tx.run(_SWITCH_QUERY_TEMPLATE.format(label=target.label), {"model": self.model_name}).single()
+                switched[target.label] = record["switched"] if record else 0
+            return switched
+
+        with self.graph._driver.session(database=self.graph._database) as session:
+            switched = session.execute_write(switch_all)
+        self.logger.info(f"Re-embedding: switched {switched} to {self.model_name}")
+
+        ensure_schema(self.graph, self.model_name, self.dimension, logger=self.logger)
+        self.graph.query("CALL db.awaitIndexes($timeout)", {"timeout": await_seconds})
+        for target in self.targets:
+            self.graph.query(f"DROP INDEX {target.shadow_index.name} IF EXISTS")
+        self.graph.query(JOB_SWITCHED_QUERY, {"model": self.model_name})
+        return switched
+
+    def _count_pending(self, target: ReembedTarget) -> int:
+        rows = self.graph.query(_PENDING_COUNT_QUERY_TEMPLATE.format(label=target.label), {"model": self.model_name})
+        return rows[0]["pending"] if rows else 0
+
+    def _run_target(self, target: ReembedTarget) -> None:
+        # One label scan per pass lists the pending nodes; batches then go by id,
+        # so the scan is not repeated per batch. A later pass picks up nodes
+        # rewritten by live writers meanwhile.
+        ids_query = _PENDING_IDS_QUERY_TEMPLATE.format(label=target.label)
+        texts_query = _TEXTS_QUERY_TEMPLATE.format(match=target.match, text=target.text)
+        started = time.monotonic()
+        done = 0
+        while not self._stop.is_set():
+            pending = [row["element_id"] for row in self.graph.query(ids_query, {"model": self.model_name})]
+            if not pending:
+                break
+            for start in range(0, len(pending), self.batch_size):
+                self._resume.wait()
+                if self._stop.is_set():
+                    break
+                rows = self.graph.query(texts_query, {"ids": pending[start:start + self.batch_size]})
+                done += self._write_batch(rows)
+                if self.max_rate:
+                    # Sleeps off whatever the batch finished ahead of the rate limit
+                    ahead = done / self.max_rate - (time.monotonic() - started)
+                    if ahead > 0:
+                        self._stop.wait(ahead)
+        if done:
+            self.logger.info(f"Re-embedding: {done} {target.label} node(s) re-embedded")
+
+    def _write_batch(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        vectors = self._embed([row["text"] for row in rows])
+        self.graph.query(SHADOW_WRITE_QUERY, {
+            "rows": [{"element_id": row["element_id"], "embedding": v} for row, v in zip(rows, vectors)],
+            "model": self.model_name,
+        })
+        self.stats["processed"] += len(rows)
+        self._record("embedding", len(rows))
+        return len(rows)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        keys = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        for i, (key, text) in enumerate(zip(keys, texts)):
+            if not text:
+                vectors[i] = [0.0] * self.dimension
+            elif key in self._cache:
+                self._cache.move_to_end(key)
+                vectors[i] = self._cache[key]
+                self.stats["cache_hits"] += 1
+            else:
+                missing.setdefault(key, []).append(i)
+        if missing:
+            unique = list(missing)
+            embedded = self.embeddings.embed_documents([texts[missing[key][0]] for key in unique])
+            self.stats["embedded"] += len(unique)
+            for key, vector in zip(unique, embedded):
+                for i in missing[key]:
+                    vectors[i] = vector
+                self._cache[key] = vector
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vectors
+
+    def _record(self, phase: str, processed: int) -> None:
+        self.graph.query(JOB_UPDATE_QUERY, {
+            "model": self.model_name,
+            "phase": phase,
+            "dimension": self.dimension,
+            "processed": processed,
+        })
+
+
+def main():
+    import argparse
+
+    from dotenv import load_dotenv
+    from langchain_neo4j import Neo4jGraph
+    from src.apps.model_registry import get_embedding_model
+
+    parser = argparse.ArgumentParser(description="Re-embed stored vectors for a new EMBEDDING_MODEL")
+    parser.add_argument("--model", required=True, help="Target EMBEDDING_MODEL (e.g. ollama, openai)")
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--rate", type=float, default=None, help="Maximum nodes per second")
+    parser.add_argument("--labels", nargs="+", help="Only these labels")
+    parser.add_argument("--switch", action="store_true", help="Finish pending nodes and switch to the new vectors")
+    parser.add_argument("--status", action="store_true", help="Show progress and exit")
+    args = parser.parse_args()
+
+    load_dotenv(".env")
+    graph = Neo4jGraph(
+        url=os.getenv("NEO4J_URI"),
+        username=os.getenv("NEO4J_USERNAME"),
+        password=os.getenv("NEO4J_PASSWORD"),
+        refresh_schema=False,
+    )
+    embeddings, dimension = get_embedding_model(
+        args.model, config={"ollama_base_url": os.getenv("OLLAMA_BASE_URL")}
+    )
+    job = ReembeddingJob(
+        graph, embeddings, args.model, dimension,
+        batch_size=args.batch_size, max_rate=args.rate, labels=args.labels,
+    )
+    if args.status:
+        print(job.status())
+    elif args.switch:
+        print(job.switch())
+        print(f"Set EMBEDDING_MODEL={args.model} and restart the apps")
+    else:
+        try:
+            print(job.run())
+        except KeyboardInterrupt:
+            print("Interrupted; run again to resume")
+
+
+if __name__ == "__main__":
+    main()
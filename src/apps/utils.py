@@ -1,59 +1,212 @@
+import json
+import re
+
+
 class BaseLogger:
     def __init__(self) -> None:
         self.info = print
 
 
-def extract_title_and_question(input_string):
-    lines = input_string.strip().split("\n")
-
-    title = ""
-    question = ""
-    is_question = False  # flag to know if we are inside a "Question" block
-
-    for line in lines:
-        if line.startswith("Title:"):
-            title = line.split("Title: ", 1)[1].strip()
-        elif line.startswith("Question:"):
-            question = line.split("Question: ", 1)[1].strip()
-            is_question = (
-                True  # set the flag to True once we encounter a "Question:" line
+_TITLE_PREFIX = re.compile(r"^\W*title\W*:\s*", re.IGNORECASE)
+_QUESTION_PREFIX = re.compile(r"^\W*question\W*:\s*", re.IGNORECASE)
+_JSON_FIELD = '"{}"\\s*:\\s*"'
+
+
+class TicketStreamParser:
+    """
+    Single-pass parser for "Title: ... / Question: ..." ticket drafts.
+
+    Feed it the LLM output chunk by chunk; each call returns the events that
+    became available: ("title", title) once the title line is complete and
+    ("question", delta) as question text arrives. JSON output
+    ({"title": ..., "question": ...}) is recognised from the first character and
+    parsed incrementally as well. When the model ignores both formats, `close()`
+    falls back to first line = title, rest = question and sets `deviated`.
+    """
+
+    def __init__(self):
+        self.title = ""
+        self.question = ""
+        self.deviated = False
+        self._buffer = ""
+        self._mode = None  # None until decided, then "template" or "json"
+        self._state = "preamble"  # template: preamble | question
+        self._title_done = False
+        self._pending_newlines = 0
+        self._held = ""  # partial question line that might be the closing "---"
+        self._preamble = ""
+        self._json_question_pos = None
+        self._json_question_raw = ""
+
+    def feed(self, chunk: str):
+        self._buffer += chunk
+        if self._mode is None:
+            stripped = self._buffer.lstrip().lstrip("`")
+            if "json".startswith(stripped):
+                return []  # could still be the opening of a ```json fence
+            stripped = stripped.removeprefix("json").lstrip()
+            if not stripped:
+                return []
+            self._mode = "json" if stripped.startswith("{") else "template"
+        if self._mode == "json":
+            return self._feed_json()
+        return self._feed_template()
+
+    def close(self):
+        events = []
+        if self._mode == "json":
+            events = self._close_json()
+        elif self._mode == "template":
+            events = self._feed_template(final=True)
+            if self._held:
+                events += self._question_text("", complete=True)
+        if not self.title and not self.question:
+            events += self._fallback()
+        self.question = self.question.strip()
+        return events
+
+    # -- template mode -----------------------------------------------------
+
+    def _feed_template(self, final=False):
+        events = []
+        while True:
+            newline = self._buffer.find("\n")
+            if newline == -1:
+                if final and self._buffer:
+                    line, self._buffer = self._buffer, ""
+                    events += self._template_line(line, complete=True)
+                elif self._state == "question" and self._buffer:
+                    events += self._question_text(self._buffer, complete=False)
+                    self._buffer = ""
+                return events
+            line, self._buffer = self._buffer[:newline], self._buffer[newline + 1 :]
+            events += self._template_line(line, complete=True)
+
+    def _template_line(self, line, complete):
+        events = []
+        if self._state == "question":
+            events += self._question_text(line, complete=complete)
+            return events
+        if _TITLE_PREFIX.match(line):
+            self.title = _TITLE_PREFIX.sub("", line).strip()
+            events.append(("title", self.title))
+            self._title_done = True
+        elif _QUESTION_PREFIX.match(line):
+            self._state = "question"
+            events += self._question_text(_QUESTION_PREFIX.sub("", line), complete)
+        else:
+            self._preamble += line + "\n"
+        return events
+
+    def _question_text(self, text, complete):
+        text = self._held + text
+        self._held = ""
+        if not complete:
+            if "---".startswith(text.strip()) and text.strip():
+                self._held = text
+                return []
+            if not text:
+                return []
+        elif text.strip() == "---":
+            return []  # closing fence of the template
+        events = []
+        if text:
+            delta = "\n" * self._pending_newlines + text if self.question else text
+            self._pending_newlines = 0
+            self.question += delta
+            events.append(("question", delta))
+        if complete and self.question:
+            self._pending_newlines += 1
+        return events
+
+    # -- json mode ---------------------------------------------------------
+
+    def _feed_json(self):
+        events = []
+        if not self._title_done:
+            match = re.search(_JSON_FIELD.format("title"), self._buffer)
+            if match:
+                raw, closed = self._json_string(match.end())
+                if closed:
+                    self.title = json.loads(f'"{raw}"', strict=False).strip()
+                    self._title_done = True
+                    events.append(("title", self.title))
+        if self._json_question_pos is None:
+            match = re.search(_JSON_FIELD.format("question"), self._buffer)
+            if match:
+                self._json_question_pos = match.end()
+        if self._json_question_pos is not None:
+            raw, _ = self._json_string(self._json_question_pos)
+            if len(raw) > len(self._json_question_raw):
+                decoded = json.loads(f'"{raw}"', strict=False)
+                delta = decoded[len(self.question) :]
+                self._json_question_raw = raw
+                if delta:
+                    self.question += delta
+                    events.append(("question", delta))
+        return events
+
+    def _json_string(self, start):
+        """
+        Escaped body of the JSON string starting at `start`, cut before any
+        incomplete escape sequence, and whether the closing quote was seen.
+        """
+        i = start
+        while i < len(self._buffer):
+            char = self._buffer[i]
+            if char == "\\":
+                width = 6 if self._buffer[i + 1 : i + 2] == "u" else 2
+                if i + width > len(self._buffer):
+                    break
+                i += width
+                continue
+            if char == '"':
+                return self._buffer[start:i], True
+            i += 1
+        return self._buffer[start:i], False
+
+    def _close_json(self):
+        events = self._feed_json()
+        if self.title or self.question:
+            return events
+        try:
+            data = json.loads(
+                self._buffer.strip().strip("`").removeprefix("json"), strict=False
             )
-        elif is_question:
-            # if the line does not start with "Question:" but we are inside a "Question" block,
-            # then it is a continuation of the question
-            question += "\n" + line.strip()
-
-    return title, question
-
-
-def create_vector_index(driver) -> None:
-    index_query = "CREATE VECTOR INDEX stackoverflow IF NOT EXISTS FOR (m:Question) ON m.embedding"
-    try:
-        driver.query(index_query)
-    except:  # Already exists
-        pass
-    index_query = (
-        "CREATE VECTOR INDEX top_answers IF NOT EXISTS FOR (m:Answer) ON m.embedding"
-    )
-    try:
-        driver.query(index_query)
-    except:  # Already exists
-        pass
-
-
-def create_constraints(driver):
-    driver.query(
-        "CREATE CONSTRAINT question_id IF NOT EXISTS FOR (q:Question) REQUIRE (q.id) IS UNIQUE"
-    )
-    driver.query(
-        "CREATE CONSTRAINT answer_id IF NOT EXISTS FOR (a:Answer) REQUIRE (a.id) IS UNIQUE"
-    )
-    driver.query(
-        "CREATE CONSTRAINT user_id IF NOT EXISTS FOR (u:User) REQUIRE (u.id) IS UNIQUE"
-    )
-    driver.query(
-        "CREATE CONSTRAINT tag_name IF NOT EXISTS FOR (t:Tag) REQUIRE (t.name) IS UNIQUE"
-    )
+        except ValueError:
+            return events
+        if isinstance(data, dict):
+            self.title = str(data.get("title", "")).strip()
+            self.question = str(data.get("question", ""))
+            if self.title:
+                events.append(("title", self.title))
+            if self.question:
+                events.append(("question", self.question))
+        return events
+
+    # -- fallback ----------------------------------------------------------
+
+    def _fallback(self):
+        text = (self._preamble + self._buffer).strip()
+        if not text:
+            return []
+        self.deviated = True
+        lines = [line for line in text.split("\n") if line.strip() not in ("", "---")]
+        if not lines:
+            return []
+        self.title = lines[0].strip().lstrip("#").strip()
+        self.question = "\n".join(lines[1:])
+        events = [("title", self.title)]
+        if self.question:
+            events.append(("question", self.question))
+        return events
+
+
+def extract_title_and_question(input_string):
+    parser = TicketStreamParser()
+    parser.feed(input_string)
+    parser.close()
+    return parser.title, parser.question
 
 
 def format_docs(docs):